@@ -0,0 +1,184 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import godview
+import history
+
+# ==========================================
+# Vectorized Backtest
+# ==========================================
+# Turns per-bar trend_status / fw_status into long/short/flat positions on
+# the synthetic Close panel and reports returns, drawdowns and hit rates per
+# symbol and for the equal-weight basket. Everything works on (date, symbol)
+# matrices, so a multi-year run over all symbols takes seconds.
+#
+#   GODVIEW_STORE_DIR=.store python backtest.py --signal trend_status --cost-bps 2
+#   python backtest.py --history .history --signal fw_status --long-only --json bt.json
+
+PERIODS_PER_YEAR = 252
+BASKET = 'BASKET'
+
+# Status -> position: 1 long, -1 short, 0 (wait) and 2 (both) flat
+STATUS_POSITIONS = {1: 1.0, -1: -1.0, 0: 0.0, 2: 0.0}
+
+def status_matrix(hist, signal='trend_status', dates=None, symbols=None):
+    """Pivot a long (date, symbol, status) history into a (date, symbol) frame."""
+    status = hist.pivot(index='date', columns='symbol', values=signal)
+    if dates is not None or symbols is not None:
+        status = status.reindex(index=dates, columns=symbols)
+    return status
+
+def positions_from_status(status, long_only=False):
+    """Target position per bar; bars without a status (holidays, before history) carry the last one."""
+    pos = status.replace(STATUS_POSITIONS).astype(float)
+    if long_only:
+        pos = pos.clip(lower=0.0)
+    return pos.ffill().fillna(0.0)
+
+def run_backtest(close, positions, cost_bps=0.0, lag=1):
+    """Per-bar strategy returns for a (date, symbol) close panel.
+
+    The position decided on bar t is held from t + lag - 1 to t + lag, and
+    every unit of position change pays cost_bps on that bar. Days a symbol does not
+    trade earn zero. Returns (returns, held positions), both (date, symbol).
+    """
+    px = close.ffill().to_numpy(dtype=float)
+    ret = np.zeros_like(px)
+    ret[1:] = px[1:] / px[:-1] - 1.0
+    ret[~np.isfinite(ret)] = 0.0
+
+    held = np.zeros_like(px)
+    target = positions.reindex(index=close.index, columns=close.columns).to_numpy(dtype=float)
+    target = np.nan_to_num(target)
+    held[lag:] = target[:len(target) - lag]
+    costs = np.abs(np.diff(held, axis=0, prepend=0.0)) * cost_bps / 1e4
+
+    strat = held * ret - costs
+    returns = pd.DataFrame(strat, index=close.index, columns=close.columns)
+    return returns, pd.DataFrame(held, index=close.index, columns=close.columns)
+
+def basket_returns(returns, held, close):
+    """Equal weight over the symbols that have a price on each bar."""
+    live = close.ffill().notna().to_numpy()
+    n = live.sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        basket = np.where(n > 0, (returns.to_numpy() * live).sum(axis=1) / n, 0.0)
+        exposure = np.where(n > 0, (np.abs(held.to_numpy()) * live).sum(axis=1) / n, 0.0)
+    return pd.Series(basket, index=returns.index, name=BASKET), pd.Series(exposure, index=returns.index, name=BASKET)
+
+def trade_returns(returns, held):
+    """Compounded return of every trade (run of one non-zero position), per column.
+
+    Returns (trade returns, column index of each trade) as flat arrays.
+    """
+    r = returns.to_numpy(dtype=float).T.ravel()
+    h = held.to_numpy(dtype=float).T.ravel()
+    n_rows = returns.shape[0]
+    col = np.repeat(np.arange(returns.shape[1]), n_rows)
+
+    # A trade starts where the held position changes or a new column begins
+    start = np.ones(len(h), dtype=bool)
+    start[1:] = (h[1:] != h[:-1]) | (col[1:] != col[:-1])
+    starts = np.flatnonzero(start)
+    log_r = np.log1p(r)
+    trade = np.expm1(np.add.reduceat(log_r, starts)) if len(starts) else np.array([])
+    in_market = h[starts] != 0
+    return trade[in_market], col[starts][in_market]
+
+def performance(ret, exposure, periods_per_year=PERIODS_PER_YEAR):
+    """Stats of (date, column) return and exposure matrices. Returns one dict per column."""
+    ret = np.asarray(ret, dtype=float)
+    exposure = np.asarray(exposure, dtype=float)
+    n = ret.shape[0]
+    equity = np.cumprod(1.0 + ret, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+    years = n / periods_per_year
+    total = equity[-1] - 1.0 if n else np.zeros(ret.shape[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.where(equity[-1] > 0, equity[-1] ** (1.0 / years) - 1.0, -1.0) if n else total
+        vol = ret.std(axis=0, ddof=1) * np.sqrt(periods_per_year) if n > 1 else np.zeros(ret.shape[1])
+        sharpe = np.where(vol > 0, ret.mean(axis=0) * periods_per_year / vol, 0.0)
+        active = exposure != 0
+        day_hits = np.where(active.sum(0) > 0, ((ret > 0) & active).sum(0) / active.sum(0), np.nan)
+    return [{
+        'total_return': float(total[j]),
+        'cagr': float(cagr[j]),
+        'volatility': float(vol[j]),
+        'sharpe': float(sharpe[j]),
+        'max_drawdown': float(drawdown[:, j].min()) if n else 0.0,
+        'exposure': float(np.abs(exposure[:, j]).mean()) if n else 0.0,
+        'day_hit_rate': float(day_hits[j]),
+    } for j in range(ret.shape[1])]
+
+def summarize(returns, held, close, periods_per_year=PERIODS_PER_YEAR):
+    """Per-symbol and basket statistics as a DataFrame indexed by symbol."""
+    stats = performance(returns.to_numpy(), held.to_numpy(), periods_per_year)
+    trades, trade_col = trade_returns(returns, held)
+    n_trades = np.bincount(trade_col, minlength=returns.shape[1])
+    wins = np.bincount(trade_col, weights=trades > 0, minlength=returns.shape[1])
+    turnover = np.abs(np.diff(held.to_numpy(), axis=0, prepend=0.0)).sum(axis=0)
+    for j, s in enumerate(stats):
+        s['trades'] = int(n_trades[j])
+        s['hit_rate'] = float(wins[j] / n_trades[j]) if n_trades[j] else float('nan')
+        s['turnover'] = float(turnover[j])
+    table = pd.DataFrame(stats, index=returns.columns)
+
+    basket, exposure = basket_returns(returns, held, close)
+    b = performance(basket.to_numpy()[:, None], exposure.to_numpy()[:, None], periods_per_year)[0]
+    b['trades'] = int(n_trades.sum())
+    b['hit_rate'] = float(wins.sum() / n_trades.sum()) if n_trades.sum() else float('nan')
+    b['turnover'] = float(turnover.mean())
+    table.loc[BASKET] = pd.Series(b)
+    return table.astype({'trades': int})
+
+def backtest(close, hist, signal='trend_status', cost_bps=0.0, long_only=False, start=None, lag=1):
+    """Backtest one status column of a history frame on a close panel. Returns (summary, returns)."""
+    available = set(hist['symbol'].unique())
+    symbols = [s for s in close.columns if s in available]
+    close = close[symbols]
+    if start is not None:
+        close = close[close.index >= pd.Timestamp(start)]
+    status = status_matrix(hist, signal, close.index, symbols)
+    returns, held = run_backtest(close, positions_from_status(status, long_only), cost_bps, lag)
+    return summarize(returns, held, close), returns
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest GodView trend/First Wave signals")
+    parser.add_argument('--signal', default='trend_status', choices=['trend_status', 'fw_status'])
+    parser.add_argument('--cost-bps', type=float, default=1.0, help="cost per unit of position change, in bps")
+    parser.add_argument('--long-only', action='store_true')
+    parser.add_argument('--start', help="first date of the backtest (YYYY-MM-DD)")
+    parser.add_argument('--history', default=history.HISTORY_DIR,
+                        help="read signals from saved yearly files instead of recomputing them")
+    parser.add_argument('--json', help="write the summary table to this JSON file")
+    args = parser.parse_args(argv)
+
+    raw_data = godview.fetch_raw_data()
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return
+    df_syn, df_high, df_low = godview.calc_synthetic_ohlc(raw_data)
+
+    if args.history and os.path.isdir(args.history):
+        print(f"Loading signal history from {args.history}...")
+        hist = history.load_history(args.history)
+    else:
+        print("Calculating signal history...")
+        hist = history.calc_history(df_syn, df_high, df_low)
+
+    summary, _ = backtest(df_syn, hist, args.signal, args.cost_bps, args.long_only, args.start)
+    with pd.option_context('display.width', 200, 'display.max_rows', 100, 'display.max_columns', None, 'display.float_format', '{:.4f}'.format):
+        print(summary)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(json.loads(summary.to_json(orient='index')), f, indent=2)
+        print(f"Summary written to {args.json}")
+
+if __name__ == "__main__":
+    main()
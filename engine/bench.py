@@ -0,0 +1,315 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import subprocess
+import types
+import numpy as np
+import pandas as pd
+import godview
+
+# Offline benchmark for the engine: generates yfinance-shaped OHLC panels,
+# times each stage of the pipeline and checks the signals against a golden file.
+#
+#   python bench.py                                  # default grid, results in .bench/
+#   python bench.py --symbols 37,148 --bars 500,5000 --repeat 5
+#   python bench.py --compare .bench/old.json        # ratios against an earlier run
+#   python bench.py --golden                         # check signals vs bench_golden.json
+#   python bench.py --golden --update-golden         # regenerate bench_golden.json with the baseline main()
+#   python bench.py --float32                        # float32 price panel vs float64
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.bench')
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_golden.json')
+GOLDEN_BARS = 2400  # long enough for the monthly block (90 months)
+GOLDEN_SEED = 7
+GOLDEN_BASELINE = 'dfa7e27'  # commit whose main() bench_golden.json is generated with
+FLOAT32_RTOL = 1e-5  # max relative error of the float32 synthetic indices
+
+# ==========================================
+# Synthetic OHLC Generator
+# ==========================================
+# Daily log-return vol, drift, share of weekdays the market is closed and
+# share of bars missing from the feed, per asset class
+ASSET_CLASSES = {
+    'fx':        dict(vol=0.005, drift=0.0,    holidays=0.0,  gaps=0.01),
+    'commodity': dict(vol=0.015, drift=0.0001, holidays=0.03, gaps=0.02),
+    'index':     dict(vol=0.011, drift=0.0003, holidays=0.04, gaps=0.02),
+}
+
+def asset_class(ticker):
+    if ticker.endswith('=X'): return 'fx'
+    if ticker.endswith('=F'): return 'commodity'
+    return 'index'
+
+def make_ticker_bars(rng, dates, cls):
+    """One ticker's OHLCV on its own calendar (market holidays and feed gaps dropped)."""
+    p = ASSET_CLASSES[cls]
+    n = len(dates)
+    open_ = rng.random(n) >= p['holidays'] + p['gaps']
+    # Some tickers only start part-way (new listings, short Yahoo history)
+    if rng.random() < 0.15:
+        open_[:int(n * rng.uniform(0.3, 0.8))] = False
+    n_open = int(open_.sum())
+
+    base = np.exp(rng.uniform(np.log(0.5), np.log(40000)))
+    ret = rng.normal(p['drift'], p['vol'], n_open)
+    close = base * np.exp(np.cumsum(ret))
+    open_px = np.r_[base, close[:-1]] * np.exp(rng.normal(0, p['vol'] * 0.2, n_open))
+    high = np.maximum(open_px, close) * np.exp(np.abs(rng.normal(0, p['vol'] * 0.5, n_open)))
+    low = np.minimum(open_px, close) * np.exp(-np.abs(rng.normal(0, p['vol'] * 0.5, n_open)))
+    volume = np.zeros(n_open) if cls == 'fx' else rng.integers(10**5, 10**7, n_open).astype(float)
+    frame = pd.DataFrame({'Open': open_px, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                         index=dates[open_])
+    return frame
+
+def make_raw_data(n_bars, seed=0, tickers=None):
+    """A yf.download-style (field, ticker) frame of `n_bars` weekdays for every engine ticker."""
+    tickers = tickers or list(godview.SYMBOLS_MAP.values())
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-12-31', periods=n_bars)
+    pieces = {t: make_ticker_bars(rng, dates, asset_class(t)) for t in tickers}
+    data = pd.concat(pieces, axis=1, sort=True).swaplevel(axis=1).sort_index(axis=1)
+    data.columns.names = ['Price', 'Ticker']
+    return data
+
+# ==========================================
+# Staged Pipeline
+# ==========================================
+class StageTimer:
+    def __init__(self):
+        self.times = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        t0 = time.perf_counter()
+        yield
+        self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - t0
+
+def run_pipeline(raws, n_symbols=None, timer=None):
+    """The stages of godview.main() without download and push. Returns ({symbol: payload}, timer).
+
+    `raws` holds one generated universe (frame or PricePanel) per replica; replica k > 0 gets its
+    symbols suffixed with '.k' so the symbol count can be scaled past 37.
+    """
+    timer = timer or StageTimer()
+    last_update = '1970-01-01T00:00:00Z'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with timer('synthetic'):
+            frames = []
+            for k, raw in enumerate(raws):
+                fields = godview.calc_synthetic_ohlc(raw)
+                if k:
+                    fields = [f.add_suffix(f'.{k}') for f in fields]
+                frames.append(fields)
+            df_syn, df_high, df_low = [pd.concat([f[i] for f in frames], axis=1) for i in range(3)]
+            symbols = list(df_syn.columns)[:n_symbols]
+
+        with timer('resample'):
+            aligned = godview.AlignedBars(df_syn[symbols], df_high[symbols], df_low[symbols])
+            bars = {}
+            for symbol in symbols:
+                b = aligned.bars(symbol)
+                if b is not None:
+                    bars[symbol] = b
+
+        with timer('daily_indicators'):
+            batch_d = godview.calc_panel_indicators({s: b[0] for s, b in bars.items()}, tail_only=True)
+        with timer('weekly_indicators'):
+            batch_w = godview.calc_panel_indicators({s: b[1] for s, b in bars.items() if len(b[1][0]) >= 90}, tail_only=True)
+            batch_m = godview.calc_panel_indicators({s: b[2] for s, b in bars.items() if len(b[2][0]) >= 90}, tail_only=True)
+
+        # V24D votes and First Wave aggregation
+        with timer('signals'):
+            results = {s: godview.calc_symbol_payload(s, b, batch_d, batch_w, batch_m, last_update) for s, b in bars.items()}
+
+        with timer('serialization'):
+            rows = godview.clean_nan([godview.make_snapshot_row(s, d) for s, d in results.items()])
+            json.dumps(rows)
+
+    return results, timer
+
+# ==========================================
+# Benchmark Grid
+# ==========================================
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def bench_case(n_symbols, n_bars, repeat, seed=0):
+    """Best and median time per stage for one (symbols, bars) point."""
+    n_universe = len(godview.SYNTHETIC_FORMULAS)
+    raws = [make_raw_data(n_bars, seed + k) for k in range(-(-n_symbols // n_universe))]
+    runs = []
+    for _ in range(repeat):
+        results, timer = run_pipeline(raws, n_symbols)
+        runs.append(timer.times)
+    stages = {name: {'min': min(r[name] for r in runs), 'median': float(np.median([r[name] for r in runs]))}
+              for name in runs[0]}
+    total = [sum(r.values()) for r in runs]
+    return {'symbols': n_symbols, 'bars': n_bars, 'computed': len(results),
+            'total': {'min': min(total), 'median': float(np.median(total))}, 'stages': stages}
+
+def compare(current, old_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    old_cases = {(c['symbols'], c['bars']): c for c in old['cases']}
+    print(f"\nvs {old.get('commit') or old_path} (median, new/old):")
+    for case in current['cases']:
+        prev = old_cases.get((case['symbols'], case['bars']))
+        if prev is None:
+            continue
+        ratios = [f"{name} {case['stages'][name]['median'] / prev['stages'][name]['median']:.2f}x"
+                  for name in case['stages'] if name in prev['stages'] and prev['stages'][name]['median'] > 0]
+        print(f"  {case['symbols']:>4} sym {case['bars']:>5} bars: total "
+              f"{case['total']['median'] / prev['total']['median']:.2f}x | " + ', '.join(ratios))
+
+# ==========================================
+# Golden Output
+# ==========================================
+def golden_view(results):
+    """The parts of each payload a faster path must reproduce exactly, in the baseline's keys (daily/weekly)."""
+    return {s: {'trend_status': p['trend_status'], 'fw_status': p['fw_status'],
+                'signals': {k: {tf: v[tf] for tf in ('d', 'w')} for k, v in p['signals'].items()},
+                'fw_signals': p['fw_signals']}
+            for s, p in results.items()}
+
+def baseline_results(raw, rev=GOLDEN_BASELINE):
+    """Payloads of main() as of commit `rev`, run on `raw` in place of the Yahoo download."""
+    source = subprocess.run(['git', 'show', f'{rev}:engine/godview.py'], capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    yf = types.ModuleType('yfinance')
+    yf.download = lambda *args, **kwargs: raw.copy()
+    saved = sys.modules.get('yfinance')
+    sys.modules['yfinance'] = yf
+    try:
+        baseline = types.ModuleType('godview_baseline')
+        exec(compile(source, f'{rev}:engine/godview.py', 'exec'), baseline.__dict__)
+    finally:
+        if saved is None:
+            del sys.modules['yfinance']
+        else:
+            sys.modules['yfinance'] = saved
+    baseline.SUPABASE_URL = baseline.SUPABASE_KEY = None  # dump instead of push
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        baseline.main()
+    out = out.getvalue()
+    return json.loads(out[out.index('Dumping JSON.') + len('Dumping JSON.'):])
+
+def check_golden(update=False):
+    """Compare the batched and the per-symbol paths against bench_golden.json. Returns mismatch count."""
+    raws = [make_raw_data(GOLDEN_BARS, GOLDEN_SEED)]
+    if update:
+        golden = golden_view(baseline_results(raws[0]))
+        with open(GOLDEN_PATH, 'w') as f:
+            json.dump(golden, f, indent=1, sort_keys=True)
+        print(f"Golden output written for {len(golden)} symbols from {GOLDEN_BASELINE}: {GOLDEN_PATH}")
+
+    batched = golden_view(run_pipeline(raws)[0])
+
+    # Per-symbol path: no batch kernels, every context computed on its own
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_syn, df_high, df_low = godview.calc_synthetic_ohlc(raws[0])
+        single = {}
+        for symbol in df_syn.columns:
+            b = godview.prepare_bars(symbol, df_syn[symbol], df_high[symbol], df_low[symbol])
+            if b is not None:
+                single[symbol] = godview.calc_symbol_payload(symbol, b, {}, {}, {}, None)
+    single = golden_view(single)
+
+    with open(GOLDEN_PATH) as f:
+        golden = json.load(f)
+    bad = 0
+    for name, got in (('batched', batched), ('per-symbol', single)):
+        got = json.loads(json.dumps(got))
+        for s in sorted(set(golden) | set(got)):
+            if golden.get(s) != got.get(s):
+                bad += 1
+                print(f"MISMATCH [{name}] {s}: expected {golden.get(s)}, got {got.get(s)}")
+    print(f"Golden check: {len(golden)} symbols, {bad} mismatches.")
+    return bad
+
+def check_float32():
+    """Run the golden universe on float64 and float32 price panels. Returns failure count.
+
+    Fails on synthetic indices further than FLOAT32_RTOL from float64, or on
+    any symbol whose trend/First Wave statuses or signals differ.
+    """
+    raw = make_raw_data(GOLDEN_BARS, GOLDEN_SEED)
+    synthetic, views = {}, {}
+    for dtype in (np.float64, np.float32):
+        with contextlib.redirect_stdout(io.StringIO()):
+            panel = godview.PricePanel.from_frame(raw, dtype=dtype)
+            synthetic[dtype] = np.stack([f.to_numpy() for f in godview.calc_synthetic_ohlc(panel)])
+        views[dtype] = json.loads(json.dumps(golden_view(run_pipeline([panel])[0])))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rel = np.abs(synthetic[np.float32] - synthetic[np.float64]) / np.abs(synthetic[np.float64])
+    max_rel = float(np.nanmax(rel))
+    bad = int(max_rel > FLOAT32_RTOL)
+    for s in sorted(views[np.float64]):
+        if views[np.float32].get(s) != views[np.float64][s]:
+            bad += 1
+            print(f"MISMATCH [float32] {s}: float64 {views[np.float64][s]}, float32 {views[np.float32].get(s)}")
+    print(f"Float32 check: max relative error {max_rel:.2e} (tolerance {FLOAT32_RTOL:.0e}), "
+          f"{len(views[np.float64])} symbols, {bad} failures.")
+    return bad
+
+# ==========================================
+# Main
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline GodView engine benchmark")
+    parser.add_argument('--symbols', default='37,74,148', help="comma-separated symbol counts")
+    parser.add_argument('--bars', default='500,2500,5000', help="comma-separated daily history lengths")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="results file (default: .bench/<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to print ratios against")
+    parser.add_argument('--golden', action='store_true', help="only run the golden-output check")
+    parser.add_argument('--update-golden', action='store_true', help="regenerate bench_golden.json with the baseline main() first")
+    parser.add_argument('--float32', action='store_true', help="only check the float32 panel against float64")
+    args = parser.parse_args(argv)
+
+    if args.golden:
+        sys.exit(1 if check_golden(args.update_golden) else 0)
+    if args.float32:
+        sys.exit(1 if check_float32() else 0)
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': pd.Timestamp.now('UTC').isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'repeat': args.repeat,
+        'cases': [],
+    }
+    for n_bars in [int(x) for x in args.bars.split(',')]:
+        for n_symbols in [int(x) for x in args.symbols.split(',')]:
+            case = bench_case(n_symbols, n_bars, args.repeat, args.seed)
+            report['cases'].append(case)
+            stages = ', '.join(f"{k} {v['median'] * 1000:.0f}ms" for k, v in case['stages'].items())
+            print(f"{n_symbols:>4} sym {n_bars:>5} bars: total {case['total']['median'] * 1000:.0f}ms | {stages}")
+
+    out = args.out or os.path.join(BENCH_DIR, f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# Cross-Index Correlation
+# ==========================================
+# Rolling covariance/correlation of the synthetic indices' daily log returns
+# over several windows, and a per-bar cross-sectional strength ranking.
+#
+# The matrices are running sums over a ring buffer of the last `window`
+# returns: each bar adds its outer products and subtracts those of the bar
+# that left the window, O(symbols^2) per bar whatever the window length.
+# Sums are pairwise-complete (a pair only counts bars where both indices
+# have a return), like DataFrame.rolling().corr(), so holidays on one
+# calendar do not blank a whole row of the matrix.
+#
+# With a store, the ring buffers and sums are checkpointed under
+# <store>/state/correlation.json like godview's IndicatorState, a few bars
+# behind the last one, so each run only pushes the bars added since.
+#
+#   python correlation.py --window 60 --top 15        # most (anti-)correlated pairs
+#   python correlation.py --json matrix.json          # the published snapshot
+
+CORR_WINDOWS = [int(x) for x in os.environ.get("GODVIEW_CORR_WINDOWS", "20,60,120").split(',') if x.strip()]
+CORR_MIN_SHARE = 0.8        # share of a window a pair needs to get a value
+STRENGTH_LOOKBACK = int(os.environ.get("GODVIEW_STRENGTH_LOOKBACK", "20"))
+STRENGTH_BARS = 20          # bars of strength ranks in the snapshot
+RESYNC_BARS = 1000          # recompute the sums from the buffer this often (float drift)
+REVISION_BARS = 10          # trailing bars re-pushed on every run, as godview.REVISION_BARS
+STATE_FILE = 'correlation.json'
+MATRIX_TABLE = 'godview_matrix'
+
+def log_returns(close):
+    """Daily log returns of a (date, symbol) close panel; each symbol vs its own previous bar, NaN off its calendar."""
+    log_c = np.log(close)
+    return log_c - log_c.ffill().shift(1)
+
+class RollingMoments:
+    """Pairwise-complete running sums of a return stream over the last `window` bars.
+
+    push() takes one bar (n returns, NaN = missing); cov() and corr() give the
+    (n, n) sample matrices of the window, NaN for pairs with fewer than
+    `min_periods` common bars.
+    """
+    def __init__(self, n, window, min_periods=None):
+        self.window = window
+        self.min_periods = min_periods or max(2, int(np.ceil(window * CORR_MIN_SHARE)))
+        self.buf = np.full((window, n), np.nan)
+        self.pos = 0
+        self.bars = 0
+        self.cnt, self.sx, self.sxx, self.sxy = (np.zeros((n, n)) for _ in range(4))
+
+    def _add(self, x, sign):
+        m = (~np.isnan(x)).astype(float)
+        v = np.nan_to_num(x)
+        self.cnt += sign * np.outer(m, m)
+        self.sx += sign * np.outer(v, m)          # [i, j]: sum of x_i where j is there too
+        self.sxx += sign * np.outer(v * v, m)
+        self.sxy += sign * np.outer(v, v)
+
+    def push(self, x):
+        if self.bars >= self.window:
+            self._add(self.buf[self.pos], -1.0)
+        self.buf[self.pos] = x
+        self._add(self.buf[self.pos], 1.0)
+        self.pos = (self.pos + 1) % self.window
+        self.bars += 1
+        if self.bars % RESYNC_BARS == 0:
+            self.resync()
+
+    def resync(self):
+        """Recompute the sums from the buffered bars."""
+        m = (~np.isnan(self.buf)).astype(float)
+        v = np.nan_to_num(self.buf)
+        self.cnt, self.sx, self.sxx, self.sxy = m.T @ m, v.T @ m, (v * v).T @ m, v.T @ v
+
+    def _moments(self):
+        n = self.cnt
+        ok = n >= self.min_periods
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (self.sxy - self.sx * self.sx.T / n) / (n - 1)
+            var = (self.sxx - self.sx ** 2 / n) / (n - 1)   # [i, j]: variance of i over the pair's bars
+        return np.where(ok, cov, np.nan), np.where(ok, var, np.nan)
+
+    def cov(self):
+        return self._moments()[0]
+
+    def corr(self):
+        cov, var = self._moments()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.sqrt(np.clip(var, 0, None) * np.clip(var.T, 0, None))
+        return np.clip(corr, -1.0, 1.0)
+
+    def to_dict(self):
+        return {
+            'window': self.window,
+            'min_periods': self.min_periods,
+            'pos': self.pos,
+            'bars': self.bars,
+            'buf': np.where(np.isnan(self.buf), None, self.buf).tolist(),
+            'sums': [a.tolist() for a in (self.cnt, self.sx, self.sxx, self.sxy)],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        buf = np.array(d['buf'], dtype=float)
+        m = cls(buf.shape[1], d['window'], d['min_periods'])
+        m.buf = buf
+        m.pos, m.bars = d['pos'], d['bars']
+        m.cnt, m.sx, m.sxx, m.sxy = (np.array(a, dtype=float) for a in d['sums'])
+        return m
+
+def rolling_moments(returns, windows=CORR_WINDOWS, moments=None):
+    """Push every bar of a (date, symbol) return panel; returns {window: RollingMoments}.
+
+    Pass the `moments` of an earlier call to continue with only the new bars.
+    """
+    moments = moments or {w: RollingMoments(returns.shape[1], w) for w in windows}
+    for row in returns.to_numpy(dtype=float):
+        for m in moments.values():
+            m.push(row)
+    return moments
+
+def load_moments(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_moments(path, doc):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(doc, f)
+    os.replace(tmp, path)
+
+def close_checksum(c):
+    """Per-symbol sums of the closes a checkpoint was built from."""
+    return np.nansum(c, axis=0).tolist()
+
+def resume_moments(path, close, windows=CORR_WINDOWS, revision_bars=REVISION_BARS):
+    """rolling_moments() over every bar of `close`, resumed from the checkpoint at `path`.
+
+    As godview.resume_indicator_state: the checkpoint is kept `revision_bars`
+    behind the last bar and every run re-pushes the bars after it. It is
+    rebuilt from the full history when the symbols or windows changed, or the
+    closes it covers no longer match (a revision older than the checkpoint).
+    """
+    returns = log_returns(close)
+    c = close.to_numpy(dtype=float)
+    cut = max(len(close) - revision_bars, 0)
+
+    moments, start = None, 0
+    saved = load_moments(path)
+    if saved is not None and saved['last_date'] and saved['symbols'] == list(close.columns) \
+            and saved['windows'] == list(windows):
+        last_date = pd.Timestamp(saved['last_date'])
+        pos = close.index.searchsorted(last_date)
+        if (pos < cut and close.index[pos] == last_date and saved['count'] == pos + 1
+                and np.allclose(saved['checksum'], close_checksum(c[:pos + 1]), rtol=1e-12, atol=0)):
+            moments = {w: RollingMoments.from_dict(saved['moments'][str(w)]) for w in windows}
+            start = pos + 1
+
+    moments = rolling_moments(returns.iloc[start:cut], windows, moments)
+    save_moments(path, {
+        'symbols': list(close.columns),
+        'windows': list(windows),
+        'count': cut,
+        'last_date': close.index[cut - 1].isoformat() if cut else None,
+        'checksum': close_checksum(c[:cut]),
+        'moments': {str(w): m.to_dict() for w, m in moments.items()},
+    })
+    return rolling_moments(returns.iloc[cut:], windows, moments)
+
+def tail_start(valid, bars):
+    """First row of the shortest tail holding each symbol's last `bars` valid bars (doubling back from the end)."""
+    k = bars
+    while k < len(valid) and valid[-k:].sum(axis=0).min() < bars:
+        k *= 2
+    return max(len(valid) - k, 0)
+
+def strength_ranks(close, lookback=STRENGTH_LOOKBACK, bars=None):
+    """(date, symbol) rank of each index's log return over its last `lookback` bars; 1 = strongest.
+
+    Returns (ranks, score) for the last `bars` rows (all when None), computed
+    from only the tail that holds `bars + lookback` valid bars per symbol.
+    """
+    valid = close.notna().to_numpy()
+    start = 0 if bars is None else tail_start(valid, bars + lookback)
+    valid = valid[start:]
+    log_c = np.log(close.iloc[start:].to_numpy(dtype=float))
+    score = np.full(log_c.shape, np.nan)
+    for j in range(log_c.shape[1]):
+        rows = np.flatnonzero(valid[:, j])
+        later, earlier = rows[lookback:], rows[:max(len(rows) - lookback, 0)]
+        score[later, j] = log_c[later, j] - log_c[earlier, j]
+    score = pd.DataFrame(score, close.index[start:], close.columns)
+    if bars is not None:
+        score = score.iloc[-bars:]
+    return score.rank(axis=1, ascending=False, method='min'), score
+
+# ==========================================
+# Snapshot
+# ==========================================
+def compact(a, digits=4):
+    """Nested lists with `digits` significant digits, None for NaN."""
+    a = np.asarray(a, dtype=float)
+    out = np.array([float(f"{v:.{digits}g}") if np.isfinite(v) else None for v in a.ravel()], dtype=object)
+    return out.reshape(a.shape).tolist()
+
+def unpack_upper(values, n):
+    """Symmetric (n, n) matrix from its row-major upper triangle (diagonal included)."""
+    out = np.full((n, n), np.nan)
+    i, j = np.triu_indices(n)
+    out[i, j] = out[j, i] = np.array(values, dtype=float)
+    return out
+
+def calc_matrix_snapshot(close, windows=CORR_WINDOWS, lookback=STRENGTH_LOOKBACK, last_update=None, store_dir=None):
+    """The published document: latest correlation/covariance per window and recent strength ranks.
+
+    Matrices are stored as their row-major upper triangle, diagonal included
+    (see unpack_upper); ranks are 1 = strongest, null off the symbol's calendar.
+    store_dir: resume and advance the moments checkpointed there (None: push every bar).
+    """
+    close = close.dropna(how='all')
+    if store_dir:
+        moments = resume_moments(os.path.join(store_dir, 'state', STATE_FILE), close, windows)
+    else:
+        moments = rolling_moments(log_returns(close), windows)
+    recent, score = strength_ranks(close, lookback, STRENGTH_BARS)
+    upper = np.triu_indices(close.shape[1])
+    return {
+        'symbols': list(close.columns),
+        'as_of': close.index[-1].strftime('%Y-%m-%d') if len(close) else None,
+        'last_update': last_update,
+        'windows': list(windows),
+        'corr': {str(w): compact(m.corr()[upper], 3) for w, m in moments.items()},
+        'cov': {str(w): compact(m.cov()[upper]) for w, m in moments.items()},
+        'strength': {
+            'lookback': lookback,
+            'dates': [d.strftime('%Y-%m-%d') for d in recent.index],
+            'ranks': [[None if np.isnan(r) else int(r) for r in row] for row in recent.to_numpy()],
+            'score': compact(score.iloc[-1].to_numpy()) if len(score) else [],
+        },
+    }
+
+def top_pairs(corr, symbols, n=10):
+    """[(a, b, corr)] of the n strongest correlations (either sign), each pair once."""
+    i, j = np.triu_indices(len(symbols), k=1)
+    c = corr[i, j]
+    order = [k for k in np.argsort(-np.abs(np.nan_to_num(c))) if np.isfinite(c[k])][:n]
+    return [(symbols[i[k]], symbols[j[k]], float(c[k])) for k in order]
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    import godview
+    parser = argparse.ArgumentParser(description="Rolling cross-index correlation and strength ranking")
+    parser.add_argument('--window', type=int, default=CORR_WINDOWS[len(CORR_WINDOWS) // 2], help="window to print")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help="write the snapshot document to this file")
+    args = parser.parse_args(argv)
+
+    windows = sorted(set(CORR_WINDOWS) | {args.window})
+    raw_data = godview.fetch_raw_data()
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return
+    df_syn = godview.calc_synthetic_ohlc(raw_data, fields=['Close'])[0]
+    doc = calc_matrix_snapshot(df_syn, windows)
+
+    corr = unpack_upper(doc['corr'][str(args.window)], len(doc['symbols']))
+    print(f"Strongest {args.window}-bar correlations as of {doc['as_of']}:")
+    for a, b, c in top_pairs(corr, doc['symbols'], args.top):
+        print(f"  {a:>8} {b:<8} {c:+.3f}")
+    ranks = dict(zip(doc['symbols'], doc['strength']['ranks'][-1] if doc['strength']['ranks'] else []))
+    ranked = sorted((r, s) for s, r in ranks.items() if r is not None)
+    print(f"Strength ({doc['strength']['lookback']}-bar return): " + ' > '.join(s for _, s in ranked))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(doc, f)
+        print(f"Snapshot written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import re
+import json
+import argparse
+import configparser
+from fractions import Fraction
+import numpy as np
+
+# ==========================================
+# Formula Compiler
+# ==========================================
+# Synthetic indices written as TradingView expression strings, e.g.
+#
+#   EIGHTCAP:HK50/OANDA:USDHKD/2594+EIGHTCAP:HK50/OANDA:USDHKD/FX:EURUSD/2776+...
+#
+# are parsed into one hash-consed expression DAG (a sub-expression such as
+# HK50/USDHKD is a single node however often it is written), expanded into
+# the SYNTHETIC_FORMULAS table (terms = product of quotes / constant), and
+# the table into a FormulaPlan: every distinct partial product of quotes is
+# one multiply, shared by all the terms that start with it, so evaluation
+# grows with the distinct products, not with the formula strings.
+#
+# A formula file is either INI-style
+#
+#   [symbols]                 # extra quotes to download: NAME = Yahoo ticker
+#   KOSPI = ^KS11
+#   [formulas]                # NAME = expression
+#   KR200 = KOSPI/FX:USDKRW/1.9+KOSPI/FX:USDKRW/FX:EURUSD/2.1
+#
+# or a markdown file with one ``` block per "### N. NAME" heading (股指综合指数公式.md).
+#
+#   python formulas.py ../股指综合指数公式.md          # compile, compare with SYNTHETIC_FORMULAS
+#   GODVIEW_FORMULAS=indices.ini python godview.py    # add/override indices from a file
+
+TOKEN_RE = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+)|([A-Za-z_^][\w.=^!]*(?::[\w.=^!]+)?)|(\S))")
+QUOTE_CURRENCIES = ('USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'HKD', 'SGD', 'CNH', 'CNY')
+
+def resolve_symbol(symbol, symbols_map):
+    """{SYMBOLS_MAP name: power} of one quote in an expression.
+
+    The exchange prefix is dropped, then the rest is matched against the
+    names (HK50), the Yahoo tickers (^HSI), the FX pairs (EURUSD -> EUR,
+    JPYUSD -> JPY^-1 since the map holds USDJPY) and, for index CFDs quoted
+    with a currency suffix (CN50USD, SG30SGD), the name without it.
+    """
+    s = symbol.split(':')[-1]
+    by_ticker = {t: n for n, t in symbols_map.items()}
+    if s in symbols_map:
+        return {s: 1}
+    if s in by_ticker:
+        return {by_ticker[s]: 1}
+    if f"{s}=X" in by_ticker:
+        return {by_ticker[f"{s}=X"]: 1}
+    if len(s) == 6 and f"{s[3:]}{s[:3]}=X" in by_ticker:
+        return {by_ticker[f"{s[3:]}{s[:3]}=X"]: -1}
+    if s[-3:] in QUOTE_CURRENCIES and s[:-3] in symbols_map:
+        return {s[:-3]: 1}
+    raise ValueError(f"Unknown symbol {symbol!r}")
+
+class ExpressionGraph:
+    """Expression DAG shared by every formula parsed into it.
+
+    Nodes are (op, args) tuples interned in `ids`, so structurally equal
+    sub-expressions (factors of a product sorted) are one node; expand()
+    is memoized per node, so each is expanded once.
+    """
+    def __init__(self, symbols_map):
+        self.symbols_map = symbols_map
+        self.nodes = []
+        self.ids = {}
+        self.expanded = {}
+        self.refs = 0   # node references made while parsing (before sharing)
+
+    def node(self, op, *args):
+        if op == 'mul':
+            args = tuple(sorted(args))
+        key = (op, args)
+        self.refs += 1
+        if key not in self.ids:
+            self.ids[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.ids[key]
+
+    def parse(self, text):
+        """Root node of one expression (+ - * / unary minus, parentheses, numbers, quotes)."""
+        tokens = []
+        for number, symbol, other in TOKEN_RE.findall(text):
+            if number:
+                tokens.append(('num', Fraction(number)))
+            elif symbol:
+                tokens.append(('sym', symbol))
+            elif other:
+                if other not in '+-*/()':
+                    raise ValueError(f"Unexpected {other!r} in {text!r}")
+                tokens.append((other, None))
+        pos = 0
+
+        def peek():
+            return tokens[pos][0] if pos < len(tokens) else None
+
+        def take(kind=None):
+            nonlocal pos
+            if pos >= len(tokens) or (kind and tokens[pos][0] != kind):
+                raise ValueError(f"Expected {kind or 'a term'} in {text!r}")
+            pos += 1
+            return tokens[pos - 1]
+
+        def expr():
+            left = term()
+            while peek() in ('+', '-'):
+                op = take()[0]
+                right = term()
+                left = self.node('add', left, right) if op == '+' else self.node('add', left, self.node('neg', right))
+            return left
+
+        def term():
+            left = unary()
+            while peek() in ('*', '/'):
+                op = take()[0]
+                left = self.node('mul' if op == '*' else 'div', left, unary())
+            return left
+
+        def unary():
+            if peek() == '-':
+                take()
+                return self.node('neg', unary())
+            kind, value = take()
+            if kind == '(':
+                inner = expr()
+                take(')')
+                return inner
+            if kind == 'num':
+                return self.node('num', value)
+            if kind == 'sym':
+                legs = resolve_symbol(value, self.symbols_map)
+                return self.node('quote', tuple(sorted(legs.items())))
+            raise ValueError(f"Unexpected {kind!r} in {text!r}")
+
+        root = expr()
+        if pos != len(tokens):
+            raise ValueError(f"Unexpected {tokens[pos][0]!r} in {text!r}")
+        return root
+
+    def expand(self, node):
+        """Sum of monomials of a node: {((name, power), ...): coefficient}, in order of appearance."""
+        if node in self.expanded:
+            return self.expanded[node]
+        op, args = self.nodes[node]
+        if op == 'num':
+            out = {(): args[0]}
+        elif op == 'quote':
+            out = {args[0]: Fraction(1)}
+        elif op == 'neg':
+            out = {m: -c for m, c in self.expand(args[0]).items()}
+        elif op == 'add':
+            out = dict(self.expand(args[0]))
+            for m, c in self.expand(args[1]).items():
+                out[m] = out.get(m, 0) + c
+            out = {m: c for m, c in out.items() if c != 0}
+        else:
+            right = self.expand(args[1])
+            if op == 'div':
+                if len(right) != 1 or 0 in right.values():
+                    raise ValueError("Division by a sum or by zero cannot be expanded into terms")
+                (m, c), = right.items()
+                right = {tuple((k, -p) for k, p in m): 1 / c}
+            out = {}
+            for m1, c1 in self.expand(args[0]).items():
+                for m2, c2 in right.items():
+                    m = multiply_monomials(m1, m2)
+                    out[m] = out.get(m, 0) + c1 * c2
+            out = {m: c for m, c in out.items() if c != 0}
+        self.expanded[node] = out
+        return out
+
+def multiply_monomials(a, b):
+    powers = dict(a)
+    for k, p in b:
+        powers[k] = powers.get(k, 0) + p
+    return tuple(sorted((k, p) for k, p in powers.items() if p != 0))
+
+def compile_formulas(expressions, symbols_map, graph=None):
+    """{name: expression} -> SYNTHETIC_FORMULAS-style table {name: [({name: power}, divisor)]}.
+
+    Terms keep the order they are written in; like terms are merged.
+    """
+    graph = graph or ExpressionGraph(symbols_map)
+    table = {}
+    for name, text in expressions.items():
+        terms = graph.expand(graph.parse(text))
+        if () in terms:
+            raise ValueError(f"Formula {name} has a constant term")
+        table[name] = [({k: int(p) if p == int(p) else float(p) for k, p in m}, float(1 / c))
+                       for m, c in terms.items()]
+    return table
+
+def load_formulas(path):
+    """({name: ticker} extra symbols, {name: expression}) from an INI or markdown formula file."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith('.md'):
+        blocks = re.findall(r"^#{2,4}\s*(?:\d+\.\s*)?([A-Za-z][\w]*)[^\n]*\n+```[^\n]*\n(.*?)```", text, re.M | re.S)
+        return {}, {name: body.strip() for name, body in blocks}
+    parser = configparser.ConfigParser(delimiters=('=',), comment_prefixes=('#', ';'), inline_comment_prefixes=('#',))
+    parser.optionxform = str
+    parser.read_string(text)
+    symbols = dict(parser['symbols']) if parser.has_section('symbols') else {}
+    expressions = dict(parser['formulas']) if parser.has_section('formulas') else {}
+    return symbols, expressions
+
+# ==========================================
+# Evaluation Plan
+# ==========================================
+class FormulaPlan:
+    """A formula table compiled into shared partial products.
+
+    Each term's quotes are ordered rarest first (so an index's own quotes,
+    e.g. HK50/HKD, lead and are shared by its currency variants) and put in
+    a trie: every trie node is one product, computed once as its parent's
+    product times one (quote, power) leaf. evaluate() works level by level,
+    one gather and one multiply per level, with no log/exp.
+
+    `tickers` are the quotes' tickers in formula order, the last axis of
+    the price array evaluate() takes.
+    """
+    def __init__(self, formulas, symbols_map):
+        self.names = list(formulas.keys())
+        keys, count = [], {}
+        for terms in formulas.values():
+            for legs, _ in terms:
+                if not legs:
+                    raise ValueError("Formula terms need at least one quote")
+                keys.extend(k for k in legs if k not in keys)
+                for k in legs:
+                    count[k] = count.get(k, 0) + 1
+        col = {k: j for j, k in enumerate(keys)}
+        self.tickers = [symbols_map[k] for k in keys]
+
+        leaves, trie, paths = {}, {}, []
+        for terms in formulas.values():
+            for legs, _ in terms:
+                path = []
+                for k in sorted(legs, key=lambda k: (count[k], col[k])):
+                    leaf = leaves.setdefault((col[k], legs[k]), len(leaves))
+                    path.append(leaf)
+                    trie.setdefault(tuple(path), len(trie))
+                paths.append(tuple(path))
+
+        # Rows of the product array: the leaves, then the deeper nodes by depth,
+        # so each level writes one contiguous slice
+        deeper = sorted((p for p in trie if len(p) > 1), key=lambda p: (len(p), trie[p]))
+        row = {(leaf,): leaf for leaf in leaves.values()}
+        row.update((p, len(leaves) + i) for i, p in enumerate(deeper))
+        self.levels = []
+        for depth in range(2, max(map(len, paths)) + 1):
+            level = [p for p in deeper if len(p) == depth]
+            self.levels.append((row[level[0]], row[level[-1]] + 1,
+                                np.array([row[p[:-1]] for p in level]), np.array([p[-1] for p in level])))
+        self.n_products = len(leaves) + len(deeper)
+
+        by_leaf = sorted(leaves, key=leaves.get)
+        self.leaf_cols = np.array([c for c, _ in by_leaf])
+        self.leaf_powers = np.array([p for _, p in by_leaf], dtype=float)
+
+        # Terms of each index as (slot, index) rows and scales; padding points
+        # at the extra all-zero row with scale 0
+        n_slots = max(len(t) for t in formulas.values())
+        self.slots = np.full((n_slots, len(self.names)), self.n_products)
+        self.scales = np.zeros((n_slots, len(self.names)))
+        path = iter(paths)
+        for i, terms in enumerate(formulas.values()):
+            for s, (_, divisor) in enumerate(terms):
+                self.slots[s, i], self.scales[s, i] = row[next(path)], 1.0 / divisor
+        self.term_cols = [[col[k] for k in legs] for terms in formulas.values() for legs, _ in terms]
+        self.term_index = [i for i, terms in enumerate(formulas.values()) for _ in terms]
+
+    def evaluate(self, prices):
+        """(..., ticker) prices -> (..., index) synthetic values, in the dtype of `prices`.
+
+        A term is NaN when any of its own quotes is missing. Works on a
+        (product, bar) array so every gather moves whole rows.
+        """
+        bars = prices.reshape(-1, prices.shape[-1]).T
+        products = np.empty((self.n_products + 1, bars.shape[1]), dtype=prices.dtype)
+        leaves = products[:len(self.leaf_cols)]
+        np.take(bars, self.leaf_cols, axis=0, out=leaves)
+        products[-1] = 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse = self.leaf_powers == -1
+            leaves[inverse] = 1 / leaves[inverse]
+            other = (self.leaf_powers != 1) & ~inverse
+            if other.any():
+                leaves[other] **= self.leaf_powers[other, None].astype(prices.dtype)
+
+        for lo, hi, parents, leaf in self.levels:
+            np.multiply(products[parents], products[leaf], out=products[lo:hi])
+        scales = self.scales.astype(prices.dtype)
+        out = products[self.slots[0]] * scales[0, :, None]
+        for s in range(1, len(self.slots)):
+            out += products[self.slots[s]] * scales[s, :, None]
+        return out.T.reshape(prices.shape[:-1] + (len(self.names),))
+
+    def dependents(self):
+        """{ticker: set of index names} of the indices each quote feeds into."""
+        out = {t: set() for t in self.tickers}
+        for i, cols in zip(self.term_index, self.term_cols):
+            for j in cols:
+                out[self.tickers[j]].add(self.names[i])
+        return out
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    import godview
+    parser = argparse.ArgumentParser(description="Compile synthetic index formula strings")
+    parser.add_argument('path', help="INI-style or markdown (### N. NAME + ``` block) formula file")
+    parser.add_argument('--json', help="write the compiled table to this file")
+    args = parser.parse_args(argv)
+
+    symbols, expressions = load_formulas(args.path)
+    symbols_map = {**godview.SYMBOLS_MAP, **symbols}
+    graph = ExpressionGraph(symbols_map)
+    table = compile_formulas(expressions, symbols_map, graph)
+    plan = FormulaPlan(table, symbols_map)
+    n_terms = sum(len(t) for t in table.values())
+    print(f"{len(table)} formulas: {graph.refs} sub-expressions written, {len(graph.nodes)} distinct; "
+          f"{n_terms} terms in {plan.n_products - len(plan.leaf_cols)} multiplies over {len(plan.tickers)} quotes.")
+
+    for name, terms in table.items():
+        known = godview.SYNTHETIC_FORMULAS.get(name)
+        if known is None:
+            print(f"  {name}: new index, {len(terms)} terms")
+        elif known != terms:
+            print(f"  {name}: differs from SYNTHETIC_FORMULAS")
+            print(f"    compiled: {terms}")
+            print(f"    engine:   {known}")
+        else:
+            print(f"  {name}: matches SYNTHETIC_FORMULAS")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(table, f, indent=1)
+        print(f"Table written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,27 @@
 import os
-import yfinance as yf
+import sys
 import pandas as pd
 import numpy as np
-from supabase import create_client, Client
 import json
+import time
+import hashlib
+import argparse
+import tempfile
+import queue
+import threading
+import contextlib
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import store
+import providers
+import correlation
+import formulas
+import rules
 
 # ==========================================
 # Configuration
@@ -12,6 +29,54 @@ from datetime import datetime, timedelta
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 
+# Local OHLC store (see store.py). When set, only new bars are downloaded.
+STORE_DIR = os.environ.get("GODVIEW_STORE_DIR")
+
+# Snapshot push: rows per upsert request, retries per request, and whether
+# rows are pushed from a background thread while later symbols are computed
+SNAPSHOT_TABLE = 'godview_snapshot'
+PUSH_CHUNK_SIZE = int(os.environ.get("GODVIEW_PUSH_CHUNK_SIZE", "50"))
+PUSH_RETRIES = int(os.environ.get("GODVIEW_PUSH_RETRIES", "3"))
+PUSH_PIPELINE = os.environ.get("GODVIEW_PUSH_PIPELINE") == "1"
+
+# Aggregate snapshot: every payload in one columnar row, published through an
+# RPC that bumps its version only when the content hash changes. Dashboards
+# poll the version and download the document only when it moved.
+AGGREGATE_TABLE = 'godview_aggregate'
+AGGREGATE_RPC = 'publish_godview_aggregate'
+
+# Cross-index correlation/strength snapshot (correlation.py), one row per run, opt-in
+MATRIX = os.environ.get("GODVIEW_MATRIX") == "1"
+
+# V24D/First Wave matrix of every synthetic index pair (pairs.py), opt-in
+PAIRS = os.environ.get("GODVIEW_PAIRS") == "1"
+
+# Run instrumentation: JSON lines + Prometheus textfile go to this directory,
+# and the run summary is upserted into RUNS_TABLE next to the snapshots
+METRICS_DIR = os.environ.get("GODVIEW_METRICS_DIR")
+RUNS_TABLE = 'godview_runs'
+
+# Intraday frames: one hourly download (Yahoo keeps 730 days of hourly bars)
+# is resampled to every frame. Each frame keeps its last INTRADAY_BARS bars,
+# far past the warm-up of the longest average (RSI SMA 369 / EMA 200).
+INTRADAY = os.environ.get("GODVIEW_INTRADAY") == "1"
+INTRADAY_PERIOD = "730d"
+INTRADAY_FRAMES = {'1h': '1h', '2h': '2h', '4h': '4h'}
+INTRADAY_BARS = int(os.environ.get("GODVIEW_INTRADAY_BARS", "3000"))
+
+# Price panel precision: float32 halves the (field, time, ticker) panel and the
+# synthetic formulas' work; `python bench.py --float32` checks it against float64
+FLOAT32 = os.environ.get("GODVIEW_FLOAT32") == "1"
+
+# Extra or replacement synthetic indices, compiled from TradingView-style
+# formula strings (see formulas.py); its [symbols] are added to SYMBOLS_MAP
+FORMULAS_FILE = os.environ.get("GODVIEW_FORMULAS")
+
+# Calendar alignment: bars a ticker may miss (market holiday, late print)
+# before its last close stands in for them, per calendar class of CALENDARS,
+# e.g. GODVIEW_FFILL="asia=2,europe=2,americas=1". Default: no filling.
+FFILL = os.environ.get("GODVIEW_FFILL", "")
+
 SYMBOLS_MAP = {
     'AUD': 'AUDUSD=X',
     'EUR': 'EURUSD=X',
@@ -54,6 +119,85 @@ SYMBOLS_MAP = {
     'JPN225': '^N225',
 }
 
+# Trading calendar of each SYMBOLS_MAP name (for the GODVIEW_FFILL rules)
+CALENDARS = {
+    'fx': ['AUD', 'EUR', 'GBP', 'NZD', 'CAD', 'CHF', 'JPY', 'MXN', 'SGD', 'SEK', 'NOK', 'CNH', 'MYR',
+           'ZAR', 'KRW', 'BRL', 'USD', 'HKD'],
+    'commodity': ['XAU', 'XAG', 'XCU'],
+    'asia': ['CN50', 'HK50', 'SG30', 'ASX200', 'JPN225'],
+    'europe': ['NL25', 'FRA40', 'GER40', 'EUSTX50', 'IT40', 'SWI20', 'UK100'],
+    'americas': ['CA60', 'SPX500', 'NDQ100', 'US2000', 'US30'],
+}
+
+# TAIXI formulas: each synthetic index is a sum of terms, and each term is a
+# product of raw quotes raised to +/-1 (keyed by SYMBOLS_MAP name) divided by
+# its normalization constant. Close, High and Low all use this one table.
+SYNTHETIC_FORMULAS = {
+    # Currency Indices
+    'AUD': [({'AUD': 1}, 0.66047), ({'CAD': 1, 'AUD': 1}, 0.90476), ({'AUD': 1, 'EUR': -1}, 0.61763), ({'AUD': 1, 'GBP': -1}, 0.53138), ({'AUD': 1, 'JPY': 1}, 94.23133)],
+    'CAD': [({'CAD': -1}, 0.72965), ({'CAD': -1, 'AUD': -1}, 1.1055), ({'EUR': -1, 'CAD': -1}, 0.68211), ({'GBP': -1, 'CAD': -1}, 0.58657), ({'JPY': 1, 'CAD': -1}, 104.165)],
+    'CHF': [({'CHF': -1}, 1.12406), ({'CAD': 1, 'CHF': -1}, 1.54202), ({'EUR': -1, 'CHF': -1}, 1.05058), ({'CHF': -1, 'GBP': -1}, 0.90315), ({'JPY': 1, 'CHF': -1}, 160.83167)],
+    'JPY': [({'JPY': -1}, 0.00703), ({'JPY': -1, 'AUD': -1}, 0.01063), ({'CAD': 1, 'JPY': -1}, 0.00963), ({'JPY': -1, 'GBP': -1}, 0.00566), ({'JPY': -1, 'EUR': -1}, 0.00656)],
+    'EUR': [({'EUR': 1}, 1.06973), ({'EUR': 1, 'AUD': -1}, 1.62021), ({'EUR': 1, 'CAD': 1}, 1.46625), ({'EUR': 1, 'GBP': -1}, 0.85959), ({'EUR': 1, 'JPY': 1}, 152.95167)],
+    'GBP': [({'GBP': 1}, 1.24401), ({'GBP': 1, 'AUD': -1}, 1.88737), ({'GBP': 1, 'CAD': 1}, 1.70749), ({'GBP': 1, 'EUR': -1}, 1.16423), ({'GBP': 1, 'JPY': 1}, 178.228)],
+    'USD': [({'USD': 1}, 1)],
+    'NZD': [({'NZD': 1}, 0.60851), ({'CAD': 1, 'NZD': 1}, 0.83363), ({'NZD': 1, 'EUR': -1}, 0.56898), ({'NZD': 1, 'GBP': -1}, 0.48991), ({'JPY': 1, 'NZD': 1}, 86.76033)],
+    'SGD': [({'SGD': -1}, 0.74527), ({'CAD': 1, 'SGD': -1}, 1.02258), ({'EUR': -1, 'SGD': -1}, 0.69684), ({'SGD': -1, 'GBP': -1}, 0.59898), ({'JPY': 1, 'SGD': -1}, 106.60933)],
+    'MXN': [({'MXN': -1}, 0.05273), ({'CAD': 1, 'MXN': -1}, 0.07218), ({'EUR': -1, 'MXN': -1}, 0.0492), ({'MXN': -1, 'GBP': -1}, 0.04234), ({'JPY': 1, 'MXN': -1}, 7.52667)],
+    'SEK': [({'SEK': -1}, 0.09512), ({'CAD': 1, 'SEK': -1}, 0.13038), ({'EUR': -1, 'SEK': -1}, 0.08885), ({'SEK': -1, 'GBP': -1}, 0.07644), ({'JPY': 1, 'SEK': -1}, 13.58497)],
+    'NOK': [({'NOK': -1}, 0.09603), ({'CAD': 1, 'NOK': -1}, 0.13154), ({'EUR': -1, 'NOK': -1}, 0.08968), ({'NOK': -1, 'GBP': -1}, 0.07723), ({'JPY': 1, 'NOK': -1}, 13.68007)],
+    'CNH': [({'CNH': -1}, 0.13793), ({'EUR': 1, 'CNH': -1}, 0.14759), ({'GBP': 1, 'CNH': -1}, 0.17159), ({'JPY': 1, 'CNH': -1}, 19.72414), ({'AUD': 1, 'CNH': -1}, 0.09103)],
+    'MYR': [({'MYR': -1}, 0.22371), ({'EUR': 1, 'MYR': -1}, 0.23937), ({'GBP': 1, 'MYR': -1}, 0.2774), ({'JPY': 1, 'MYR': -1}, 31.99552), ({'AUD': 1, 'MYR': -1}, 0.14765)],
+    'XAU': [({'XAU': 1}, 4629), ({'XAU': 1, 'EUR': -1}, 3973), ({'XAU': 1, 'GBP': -1}, 3444), ({'XAU': 1, 'JPY': 1}, 734159), ({'XAU': 1, 'AUD': -1}, 6929)],
+    'XAG': [({'XAG': 1}, 85.23), ({'XAG': 1, 'EUR': -1}, 73.16), ({'XAG': 1, 'GBP': -1}, 63.41), ({'XAG': 1, 'JPY': 1}, 13517), ({'XAG': 1, 'AUD': -1}, 127.59)],
+    'XCU': [({'XCU': 1}, 6.05), ({'XCU': 1, 'EUR': -1}, 5.19), ({'XCU': 1, 'GBP': -1}, 4.5), ({'XCU': 1, 'JPY': 1}, 959.5), ({'XCU': 1, 'AUD': -1}, 9.06)],
+    'ZAR': [({'ZAR': -1}, 0.06109), ({'EUR': 1, 'ZAR': -1}, 0.07116), ({'GBP': 1, 'ZAR': -1}, 0.0821), ({'JPY': 1, 'ZAR': -1}, 9.688), ({'AUD': 1, 'ZAR': -1}, 0.0408)],
+    'KRW': [({'KRW': -1}, 0.000682), ({'EUR': 1, 'KRW': -1}, 0.000794), ({'GBP': 1, 'KRW': -1}, 0.000916), ({'JPY': 1, 'KRW': -1}, 0.10818), ({'AUD': 1, 'KRW': -1}, 0.000455)],
+    'BRL': [({'BRL': -1}, 0.1858), ({'EUR': 1, 'BRL': -1}, 0.2165), ({'GBP': 1, 'BRL': -1}, 0.2498), ({'JPY': 1, 'BRL': -1}, 29.47), ({'AUD': 1, 'BRL': -1}, 0.1241)],
+    # Stock Indices - TAIXI multi-currency approach
+    # CN50 (USD priced from Yahoo XIN9.FGI)
+    'CN50': [({'CN50': 1}, 13830), ({'CN50': 1, 'EUR': -1}, 14798), ({'CN50': 1, 'GBP': -1}, 17560), ({'CN50': 1, 'JPY': 1}, 1977690), ({'CN50': 1, 'AUD': -1}, 20954)],
+    # HK50 (HKD priced)
+    'HK50': [({'HK50': 1, 'HKD': -1}, 2594), ({'HK50': 1, 'HKD': -1, 'EUR': -1}, 2776), ({'HK50': 1, 'HKD': -1, 'GBP': -1}, 3294), ({'HK50': 1, 'HKD': -1, 'JPY': 1}, 370922), ({'HK50': 1, 'HKD': -1, 'AUD': -1}, 3930)],
+    # SG30 (SGD priced)
+    'SG30': [({'SG30': 1, 'SGD': -1}, 296), ({'SG30': 1, 'SGD': -1, 'EUR': -1}, 317), ({'SG30': 1, 'SGD': -1, 'GBP': -1}, 376), ({'SG30': 1, 'SGD': -1, 'JPY': 1}, 42328), ({'SG30': 1, 'SGD': -1, 'AUD': -1}, 448)],
+    # ASX200 (AUD priced)
+    'ASX200': [({'ASX200': 1, 'AUD': 1}, 5511), ({'ASX200': 1, 'AUD': 1, 'EUR': -1}, 5897), ({'ASX200': 1, 'AUD': 1, 'GBP': -1}, 6999), ({'ASX200': 1, 'AUD': 1, 'JPY': 1}, 788073), ({'ASX200': 1}, 8350)],
+    # CA60 (CAD priced)
+    'CA60': [({'CA60': 1, 'CAD': -1}, 18613), ({'CA60': 1, 'CAD': -1, 'EUR': -1}, 19916), ({'CA60': 1, 'CAD': -1, 'GBP': -1}, 23638), ({'CA60': 1, 'CAD': -1, 'JPY': 1}, 2661659), ({'CA60': 1, 'CAD': -1, 'AUD': -1}, 28201)],
+    # NL25 (EUR priced)
+    'NL25': [({'NL25': 1, 'EUR': 1}, 984), ({'NL25': 1}, 920), ({'NL25': 1, 'EUR': 1, 'GBP': -1}, 1250), ({'NL25': 1, 'EUR': 1, 'JPY': 1}, 140712), ({'NL25': 1, 'EUR': 1, 'AUD': -1}, 1491)],
+    # FRA40 (EUR priced)
+    'FRA40': [({'FRA40': 1, 'EUR': 1}, 8507), ({'FRA40': 1}, 7950), ({'FRA40': 1, 'EUR': 1, 'GBP': -1}, 10804), ({'FRA40': 1, 'EUR': 1, 'JPY': 1}, 1216499), ({'FRA40': 1, 'EUR': 1, 'AUD': -1}, 12889)],
+    # GER40 (EUR priced)
+    'GER40': [({'GER40': 1, 'EUR': 1}, 22256), ({'GER40': 1}, 20800), ({'GER40': 1, 'EUR': 1, 'GBP': -1}, 28265), ({'GER40': 1, 'EUR': 1, 'JPY': 1}, 3182608), ({'GER40': 1, 'EUR': 1, 'AUD': -1}, 33721)],
+    # EUSTX50 (EUR priced)
+    'EUSTX50': [({'EUSTX50': 1, 'EUR': 1}, 5511), ({'EUSTX50': 1}, 5150), ({'EUSTX50': 1, 'EUR': 1, 'GBP': -1}, 6999), ({'EUSTX50': 1, 'EUR': 1, 'JPY': 1}, 788073), ({'EUSTX50': 1, 'EUR': 1, 'AUD': -1}, 8350)],
+    # IT40 (EUR priced)
+    'IT40': [({'IT40': 1, 'EUR': 1}, 38520), ({'IT40': 1}, 36000), ({'IT40': 1, 'EUR': 1, 'GBP': -1}, 48920), ({'IT40': 1, 'EUR': 1, 'JPY': 1}, 5508360), ({'IT40': 1, 'EUR': 1, 'AUD': -1}, 58364)],
+    # SWI20 (CHF priced)
+    'SWI20': [({'SWI20': 1, 'CHF': -1}, 13483), ({'SWI20': 1, 'CHF': -1, 'EUR': -1}, 14427), ({'SWI20': 1, 'CHF': -1, 'GBP': -1}, 17123), ({'SWI20': 1, 'CHF': -1, 'JPY': 1}, 1928049), ({'SWI20': 1, 'CHF': -1, 'AUD': -1}, 20428)],
+    # UK100 (GBP priced)
+    'UK100': [({'UK100': 1, 'GBP': 1}, 10605), ({'UK100': 1, 'GBP': 1, 'EUR': -1}, 11347), ({'UK100': 1}, 8350), ({'UK100': 1, 'GBP': 1, 'JPY': 1}, 1516515), ({'UK100': 1, 'GBP': 1, 'AUD': -1}, 16068)],
+    # SPX500 (USD priced)
+    'SPX500': [({'SPX500': 1}, 5950), ({'SPX500': 1, 'EUR': -1}, 6367), ({'SPX500': 1, 'GBP': -1}, 7557), ({'SPX500': 1, 'JPY': 1}, 850850), ({'SPX500': 1, 'AUD': -1}, 9015)],
+    # NDQ100 (USD priced)
+    'NDQ100': [({'NDQ100': 1}, 21000), ({'NDQ100': 1, 'EUR': -1}, 22470), ({'NDQ100': 1, 'GBP': -1}, 26670), ({'NDQ100': 1, 'JPY': 1}, 3003000), ({'NDQ100': 1, 'AUD': -1}, 31818)],
+    # US2000 (USD priced)
+    'US2000': [({'US2000': 1}, 2250), ({'US2000': 1, 'EUR': -1}, 2408), ({'US2000': 1, 'GBP': -1}, 2858), ({'US2000': 1, 'JPY': 1}, 321750), ({'US2000': 1, 'AUD': -1}, 3409)],
+    # US30 (USD priced)
+    'US30': [({'US30': 1}, 43000), ({'US30': 1, 'EUR': -1}, 46010), ({'US30': 1, 'GBP': -1}, 54610), ({'US30': 1, 'JPY': 1}, 6149000), ({'US30': 1, 'AUD': -1}, 65152)],
+    # JPN225 (JPY priced)
+    'JPN225': [({'JPN225': 1, 'JPY': -1}, 269), ({'JPN225': 1, 'JPY': -1, 'EUR': -1}, 288), ({'JPN225': 1, 'JPY': -1, 'GBP': -1}, 342), ({'JPN225': 1}, 38500), ({'JPN225': 1, 'JPY': -1, 'AUD': -1}, 408)],
+}
+
+if FORMULAS_FILE:
+    _symbols, _expressions = formulas.load_formulas(FORMULAS_FILE)
+    SYMBOLS_MAP.update(_symbols)
+    SYNTHETIC_FORMULAS.update(formulas.compile_formulas(_expressions, SYMBOLS_MAP))
+
+PRICE_FIELDS = ['Close', 'High', 'Low']
+
 # ==========================================
 # Pure Pandas Indicator Implementations
 # ==========================================
@@ -62,11 +206,17 @@ def calc_ema(series, length):
     """Calculate Exponential Moving Average using pandas."""
     return series.ewm(span=length, adjust=False).mean()
 
-def calc_rsi(series, length=14):
-    """Calculate RSI using pure pandas."""
+def calc_rsi(series, length=14, span=None):
+    """Calculate RSI using pure pandas.
+
+    `span` masks the bars inside each column's own history when `series` is a
+    right-aligned panel (see stack_series); padding bars then stay NaN.
+    """
     delta = series.diff()
     gain = delta.where(delta > 0, 0.0)
     loss = (-delta).where(delta < 0, 0.0)
+    if span is not None:
+        gain, loss = gain.where(span), loss.where(span)
     
     avg_gain = gain.ewm(alpha=1/length, min_periods=length, adjust=False).mean()
     avg_loss = loss.ewm(alpha=1/length, min_periods=length, adjust=False).mean()
@@ -84,120 +234,218 @@ def calc_macd(series, fast=12, slow=26, signal=9):
     histogram = macd_line - signal_line
     return macd_line, signal_line, histogram
 
+def calc_dm_tr(high, low, close):
+    """True range and directional movement. Returns (tr, plus_dm, minus_dm)."""
+    tr1 = high - low
+    tr2 = (high - close.shift(1)).abs()
+    tr3 = (low - close.shift(1)).abs()
+    tr = np.fmax(np.fmax(tr1, tr2), tr3)
+    
+    up_move = high - high.shift(1)
+    down_move = low.shift(1) - low
+    
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0)
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0)
+    return tr, plus_dm, minus_dm
+
+def calc_di(high, low, close, length=14, span=None):
+    """Calculate +DI/-DI on an SMA-smoothed ATR, NaN filled with 0. Returns (plus_di, minus_di)."""
+    tr, plus_dm_s, minus_dm_s = calc_dm_tr(high, low, close)
+    atr = tr.rolling(window=length).mean()
+    
+    plus_di = (plus_dm_s.rolling(window=length).mean() / atr) * 100
+    minus_di = (minus_dm_s.rolling(window=length).mean() / atr) * 100
+    plus_di, minus_di = plus_di.fillna(0), minus_di.fillna(0)
+    if span is not None:
+        plus_di, minus_di = plus_di.where(span), minus_di.where(span)
+    return plus_di, minus_di
+
+def tail_rolling_mean(series, window, count=2):
+    """Last `count` values of series.rolling(window).mean(), reading only the bars they need."""
+    return series.iloc[-(window + count - 1):].rolling(window=window).mean().iloc[-count:]
+
+def calc_di_tail(high, low, close, length=14, count=None, span=None):
+    """calc_di for the last `count` bars only (default: enough for the widest DI SMA slope)."""
+    count = count or max(SHORT_MA_LENGTHS) + 1
+    start = -(length + count)  # one extra bar so the first TR/DM in the window sees its previous bar
+    plus_di, minus_di = calc_di(high.iloc[start:], low.iloc[start:], close.iloc[start:], length,
+                                None if span is None else span[start:])
+    return plus_di.iloc[-count:], minus_di.iloc[-count:]
+
+class LazyMap(dict):
+    """dict that fills missing keys with compute(key) and keeps the result."""
+    def __init__(self, compute, values=None):
+        super().__init__(values or {})
+        self.compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        return value
+
+class IndicatorContext(dict):
+    """Memoized indicators for one symbol and timeframe.
+
+    Keys: 'rsi', 'macd' (line, signal, hist), 'di' (plus, minus),
+    'ema_slope_grid' (EMA_LENGTHS x SLOPE_LENGTHS last-bar slopes), and the
+    per-length maps 'ema', 'rsi_ma', 'hist_ma', 'plus_di_ma', 'minus_di_ma'.
+    Values passed in (from the batch kernels or an IndicatorState) are used
+    as is; everything else is computed from close/high/low on first access,
+    so the V24D and First Wave functions share one computation.
+
+    With tail_only=True the SMA stacks hold just their last two values and DI
+    its last 38, which is all the vote functions read; the default keeps full
+    series for history and backtests.
+    """
+    SMA_BASES = {
+        'rsi_ma': lambda ctx: ctx['rsi'],
+        'hist_ma': lambda ctx: ctx['macd'][2],
+        'plus_di_ma': lambda ctx: ctx['di'][0],
+        'minus_di_ma': lambda ctx: ctx['di'][1],
+    }
+
+    def __init__(self, close=None, high=None, low=None, di_length=14, tail_only=False, **values):
+        super().__init__()
+        self.close, self.high, self.low = close, high, low
+        self.di_length = di_length
+        self.tail_only = tail_only
+        for key, value in values.items():
+            self[key] = self._lazy(key, value) if isinstance(value, dict) else value
+
+    def _lazy(self, key, values=None):
+        if key == 'ema':
+            return LazyMap(lambda l: calc_ema(self.close, l), values)
+        base = self.SMA_BASES[key]
+        if self.tail_only:
+            return LazyMap(lambda l: tail_rolling_mean(base(self), l), values)
+        return LazyMap(lambda l: base(self).rolling(window=l).mean(), values)
+
+    def __missing__(self, key):
+        if key == 'rsi':
+            value = calc_rsi(self.close, length=14)
+        elif key == 'macd':
+            value = calc_macd(self.close, fast=12, slow=26, signal=9)
+        elif key == 'di' and self.tail_only:
+            value = calc_di_tail(self.high, self.low, self.close, self.di_length)
+        elif key == 'di':
+            value = calc_di(self.high, self.low, self.close, self.di_length)
+        elif key == 'ema_slope_grid':
+            value = calc_ema_slope_grid({l: self['ema'][l] for l in EMA_LENGTHS})
+        elif key == 'ema' or key in self.SMA_BASES:
+            value = self._lazy(key)
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
 # ==========================================
 # Logic: Synthetic Index Calculation
 # ==========================================
-def calc_synthetic_indices(data):
-    def get_c(ticker):
-        try:
-            if isinstance(data.columns, pd.MultiIndex):
-                return data['Close'][ticker]
-            else:
-                return data['Close']
-        except KeyError:
-            print(f"Warning: Data for {ticker} not found. Returning NaN.")
-            return pd.Series(np.nan, index=data.index)
-
-    aud = get_c(SYMBOLS_MAP['AUD'])
-    eur = get_c(SYMBOLS_MAP['EUR'])
-    gbp = get_c(SYMBOLS_MAP['GBP'])
-    nzd = get_c(SYMBOLS_MAP['NZD'])
-    cad = get_c(SYMBOLS_MAP['CAD'])
-    chf = get_c(SYMBOLS_MAP['CHF'])
-    jpy = get_c(SYMBOLS_MAP['JPY'])
-    mxn = get_c(SYMBOLS_MAP['MXN'])
-    sgd = get_c(SYMBOLS_MAP['SGD'])
-    sek = get_c(SYMBOLS_MAP['SEK'])
-    nok = get_c(SYMBOLS_MAP['NOK'])
-    cnh = get_c(SYMBOLS_MAP['CNH'])
-    myr = get_c(SYMBOLS_MAP['MYR'])
-    xau = get_c(SYMBOLS_MAP['XAU'])
-    xag = get_c(SYMBOLS_MAP['XAG'])
-    xcu = get_c(SYMBOLS_MAP['XCU'])
-    zar = get_c(SYMBOLS_MAP['ZAR'])
-    krw = get_c(SYMBOLS_MAP['KRW'])
-    brl = get_c(SYMBOLS_MAP['BRL'])
-    usd = get_c(SYMBOLS_MAP['USD'])
-    # Stock Indices
-    hkd = get_c(SYMBOLS_MAP['HKD'])
-    cn50_raw = get_c(SYMBOLS_MAP['CN50'])
-    hk50_raw = get_c(SYMBOLS_MAP['HK50'])
-    sg30_raw = get_c(SYMBOLS_MAP['SG30'])
-    asx200_raw = get_c(SYMBOLS_MAP['ASX200'])
-    ca60_raw = get_c(SYMBOLS_MAP['CA60'])
-    nl25_raw = get_c(SYMBOLS_MAP['NL25'])
-    fra40_raw = get_c(SYMBOLS_MAP['FRA40'])
-    ger40_raw = get_c(SYMBOLS_MAP['GER40'])
-    eustx50_raw = get_c(SYMBOLS_MAP['EUSTX50'])
-    it40_raw = get_c(SYMBOLS_MAP['IT40'])
-    swi20_raw = get_c(SYMBOLS_MAP['SWI20'])
-    uk100_raw = get_c(SYMBOLS_MAP['UK100'])
-    spx500_raw = get_c(SYMBOLS_MAP['SPX500'])
-    ndq100_raw = get_c(SYMBOLS_MAP['NDQ100'])
-    us2000_raw = get_c(SYMBOLS_MAP['US2000'])
-    us30_raw = get_c(SYMBOLS_MAP['US30'])
-    jpn225_raw = get_c(SYMBOLS_MAP['JPN225'])
-
-    indices = {}
-    # Currency Indices (existing)
-    indices['AUD'] = aud/0.66047 + (cad*aud)/0.90476 + (aud/eur)/0.61763 + (aud/gbp)/0.53138 + (aud*jpy)/94.23133
-    indices['CAD'] = (1/cad)/0.72965 + (1/(cad*aud))/1.1055 + (1/(eur*cad))/0.68211 + (1/(gbp*cad))/0.58657 + (jpy/cad)/104.165
-    indices['CHF'] = (1/chf)/1.12406 + (cad/chf)/1.54202 + (1/(eur*chf))/1.05058 + (1/(chf*gbp))/0.90315 + (jpy/chf)/160.83167
-    indices['JPY'] = (1/jpy)/0.00703 + (1/(jpy*aud))/0.01063 + (cad/jpy)/0.00963 + (1/(jpy*gbp))/0.00566 + (1/(jpy*eur))/0.00656
-    indices['EUR'] = eur/1.06973 + (eur/aud)/1.62021 + (eur*cad)/1.46625 + (eur/gbp)/0.85959 + (eur*jpy)/152.95167
-    indices['GBP'] = gbp/1.24401 + (gbp/aud)/1.88737 + (gbp*cad)/1.70749 + (gbp/eur)/1.16423 + (gbp*jpy)/178.228
-    indices['USD'] = usd
-    indices['NZD'] = nzd/0.60851 + (cad*nzd)/0.83363 + (nzd/eur)/0.56898 + (nzd/gbp)/0.48991 + (jpy*nzd)/86.76033
-    indices['SGD'] = (1/sgd)/0.74527 + (cad/sgd)/1.02258 + (1/(eur*sgd))/0.69684 + (1/(sgd*gbp))/0.59898 + (jpy/sgd)/106.60933
-    indices['MXN'] = (1/mxn)/0.05273 + (cad/mxn)/0.07218 + (1/(eur*mxn))/0.0492 + (1/(mxn*gbp))/0.04234 + (jpy/mxn)/7.52667
-    indices['SEK'] = (1/sek)/0.09512 + (cad/sek)/0.13038 + (1/(eur*sek))/0.08885 + (1/(sek*gbp))/0.07644 + (jpy/sek)/13.58497
-    indices['NOK'] = (1/nok)/0.09603 + (cad/nok)/0.13154 + (1/(eur*nok))/0.08968 + (1/(nok*gbp))/0.07723 + (jpy/nok)/13.68007
-    indices['CNH'] = (1/cnh)/0.13793 + (eur/cnh)/0.14759 + (gbp/cnh)/0.17159 + (jpy/cnh)/19.72414 + (aud/cnh)/0.09103
-    indices['MYR'] = (1/myr)/0.22371 + (eur/myr)/0.23937 + (gbp/myr)/0.27740 + (jpy/myr)/31.99552 + (aud/myr)/0.14765
-    indices['XAU'] = xau/4629 + (xau/eur)/3973 + (xau/gbp)/3444 + (xau*jpy)/734159 + (xau/aud)/6929
-    indices['XAG'] = xag/85.23 + (xag/eur)/73.16 + (xag/gbp)/63.41 + (xag*jpy)/13517 + (xag/aud)/127.59
-    indices['XCU'] = xcu/6.05 + (xcu/eur)/5.19 + (xcu/gbp)/4.50 + (xcu*jpy)/959.5 + (xcu/aud)/9.06
-    indices['ZAR'] = (1/zar)/0.06109 + (eur/zar)/0.07116 + (gbp/zar)/0.08210 + (jpy/zar)/9.688 + (aud/zar)/0.04080
-    indices['KRW'] = (1/krw)/0.000682 + (eur/krw)/0.000794 + (gbp/krw)/0.000916 + (jpy/krw)/0.10818 + (aud/krw)/0.000455
-    indices['BRL'] = (1/brl)/0.1858 + (eur/brl)/0.2165 + (gbp/brl)/0.2498 + (jpy/brl)/29.47 + (aud/brl)/0.1241
-    
-    # Stock Indices (new) - TAIXI multi-currency approach
-    # CN50 (USD priced from Yahoo XIN9.FGI)
-    indices['CN50'] = cn50_raw/13830 + (cn50_raw/eur)/14798 + (cn50_raw/gbp)/17560 + (cn50_raw*jpy)/1977690 + (cn50_raw/aud)/20954
-    # HK50 (HKD priced)
-    indices['HK50'] = (hk50_raw/hkd)/2594 + (hk50_raw/hkd/eur)/2776 + (hk50_raw/hkd/gbp)/3294 + (hk50_raw/hkd*jpy)/370922 + (hk50_raw/hkd/aud)/3930
-    # SG30 (SGD priced)
-    indices['SG30'] = (sg30_raw/sgd)/296 + (sg30_raw/sgd/eur)/317 + (sg30_raw/sgd/gbp)/376 + (sg30_raw/sgd*jpy)/42328 + (sg30_raw/sgd/aud)/448
-    # ASX200 (AUD priced)
-    indices['ASX200'] = (asx200_raw*aud)/5511 + (asx200_raw*aud/eur)/5897 + (asx200_raw*aud/gbp)/6999 + (asx200_raw*aud*jpy)/788073 + asx200_raw/8350
-    # CA60 (CAD priced)
-    indices['CA60'] = (ca60_raw/cad)/18613 + (ca60_raw/cad/eur)/19916 + (ca60_raw/cad/gbp)/23638 + (ca60_raw/cad*jpy)/2661659 + (ca60_raw/cad/aud)/28201
-    # NL25 (EUR priced)
-    indices['NL25'] = (nl25_raw*eur)/984 + nl25_raw/920 + (nl25_raw*eur/gbp)/1250 + (nl25_raw*eur*jpy)/140712 + (nl25_raw*eur/aud)/1491
-    # FRA40 (EUR priced)
-    indices['FRA40'] = (fra40_raw*eur)/8507 + fra40_raw/7950 + (fra40_raw*eur/gbp)/10804 + (fra40_raw*eur*jpy)/1216499 + (fra40_raw*eur/aud)/12889
-    # GER40 (EUR priced)
-    indices['GER40'] = (ger40_raw*eur)/22256 + ger40_raw/20800 + (ger40_raw*eur/gbp)/28265 + (ger40_raw*eur*jpy)/3182608 + (ger40_raw*eur/aud)/33721
-    # EUSTX50 (EUR priced)
-    indices['EUSTX50'] = (eustx50_raw*eur)/5511 + eustx50_raw/5150 + (eustx50_raw*eur/gbp)/6999 + (eustx50_raw*eur*jpy)/788073 + (eustx50_raw*eur/aud)/8350
-    # IT40 (EUR priced)
-    indices['IT40'] = (it40_raw*eur)/38520 + it40_raw/36000 + (it40_raw*eur/gbp)/48920 + (it40_raw*eur*jpy)/5508360 + (it40_raw*eur/aud)/58364
-    # SWI20 (CHF priced)
-    indices['SWI20'] = (swi20_raw/chf)/13483 + (swi20_raw/chf/eur)/14427 + (swi20_raw/chf/gbp)/17123 + (swi20_raw/chf*jpy)/1928049 + (swi20_raw/chf/aud)/20428
-    # UK100 (GBP priced)
-    indices['UK100'] = (uk100_raw*gbp)/10605 + (uk100_raw*gbp/eur)/11347 + uk100_raw/8350 + (uk100_raw*gbp*jpy)/1516515 + (uk100_raw*gbp/aud)/16068
-    # SPX500 (USD priced)
-    indices['SPX500'] = spx500_raw/5950 + (spx500_raw/eur)/6367 + (spx500_raw/gbp)/7557 + (spx500_raw*jpy)/850850 + (spx500_raw/aud)/9015
-    # NDQ100 (USD priced)
-    indices['NDQ100'] = ndq100_raw/21000 + (ndq100_raw/eur)/22470 + (ndq100_raw/gbp)/26670 + (ndq100_raw*jpy)/3003000 + (ndq100_raw/aud)/31818
-    # US2000 (USD priced)
-    indices['US2000'] = us2000_raw/2250 + (us2000_raw/eur)/2408 + (us2000_raw/gbp)/2858 + (us2000_raw*jpy)/321750 + (us2000_raw/aud)/3409
-    # US30 (USD priced)
-    indices['US30'] = us30_raw/43000 + (us30_raw/eur)/46010 + (us30_raw/gbp)/54610 + (us30_raw*jpy)/6149000 + (us30_raw/aud)/65152
-    # JPN225 (JPY priced)
-    indices['JPN225'] = (jpn225_raw/jpy)/269 + (jpn225_raw/jpy/eur)/288 + (jpn225_raw/jpy/gbp)/342 + jpn225_raw/38500 + (jpn225_raw/jpy/aud)/408
+def build_formula_plan(table=SYNTHETIC_FORMULAS):
+    """Compile a formula table into a FormulaPlan.
+
+    plan.tickers are the quotes' tickers in formula order; plan.evaluate()
+    computes each distinct partial product of quotes once for all indices.
+    """
+    return formulas.FormulaPlan(table, SYMBOLS_MAP)
+
+class PricePanel:
+    """The download as one contiguous (field, time, ticker) array.
+
+    Built once from a yf.download-style frame; `col` maps ticker -> column.
+    field(), frame() and take() (for tickers in panel order) are views, so
+    nothing downstream copies a Series per ticker.
+    """
+    def __init__(self, values, index, tickers, fields=PRICE_FIELDS):
+        self.values = values
+        self.index = index
+        self.tickers = list(tickers)
+        self.fields = list(fields)
+        self.col = {t: j for j, t in enumerate(self.tickers)}
+
+    @classmethod
+    def from_frame(cls, data, tickers=None, fields=PRICE_FIELDS, dtype=None, ffill=None):
+        """One copy per field out of the MultiIndex frame; missing fields/tickers stay NaN.
+
+        Tickers default to the formula legs first, in formula order (so the
+        formula plan reads them through a view), then any other downloaded ticker.
+        Gaps are then filled per `ffill` ({calendar: bars}, default GODVIEW_FFILL).
+        """
+        dtype = dtype or (np.float32 if FLOAT32 else np.float64)
+        multi = isinstance(data.columns, pd.MultiIndex)
+        if tickers is None:
+            tickers = list(build_formula_plan().tickers)
+            if multi:
+                tickers += sorted(set(data.columns.get_level_values(1)) - set(tickers))
+        values = np.full((len(fields), len(data.index), len(tickers)), np.nan, dtype=dtype)
+        for i, field in enumerate(fields):
+            if not multi:
+                if field in data:
+                    values[i] = data[field].to_numpy(dtype=dtype)[:, None]
+                continue
+            frame = data[field] if field in data.columns.get_level_values(0) else pd.DataFrame(index=data.index)
+            for ticker in tickers:
+                if ticker not in frame.columns:
+                    print(f"Warning: {field} Data for {ticker} not found. Returning NaN.")
+            values[i] = frame.reindex(columns=tickers).to_numpy(dtype=dtype)
+        panel = cls(values, pd.DatetimeIndex(data.index), tickers, fields)
+        panel.fill_gaps(parse_ffill(FFILL) if ffill is None else ffill)
+        return panel
 
-    return pd.DataFrame(indices)
+    def fill_gaps(self, limits):
+        """Forward-fill up to limits[calendar] missing bars per ticker, as flat bars at the last close.
+
+        Returns the (time, ticker) mask of the bars filled.
+        """
+        filled = np.zeros((len(self.index), len(self.tickers)), dtype=bool)
+        if 'Close' not in self.fields:
+            return filled
+        close = self.field('Close')
+        for calendar, limit in limits.items():
+            cols = [self.col[SYMBOLS_MAP[n]] for n in CALENDARS[calendar] if SYMBOLS_MAP[n] in self.col]
+            if limit <= 0 or not cols:
+                continue
+            last = pd.DataFrame(close[:, cols], copy=False).ffill(limit=limit).to_numpy()
+            new = np.isnan(close[:, cols]) & ~np.isnan(last)
+            for i in range(len(self.fields)):
+                block = self.values[i][:, cols]
+                block[new] = last[new]
+                self.values[i][:, cols] = block
+            filled[:, cols] = new
+        return filled
+
+    def field(self, name):
+        """(time, ticker) view of one field."""
+        return self.values[self.fields.index(name)]
+
+    def frame(self, name):
+        """One field as a DataFrame sharing the panel's memory."""
+        return pd.DataFrame(self.field(name), index=self.index, columns=self.tickers, copy=False)
+
+    def take(self, tickers, fields=PRICE_FIELDS):
+        """(field, time, ticker) array of `tickers`: a view when they lead the panel in order, else a gather."""
+        rows = [self.fields.index(f) for f in fields]
+        cols = [self.col.get(t, -1) for t in tickers]
+        if cols == list(range(len(cols))) and rows == list(range(rows[0], rows[0] + len(rows))):
+            return self.values[rows[0]:rows[0] + len(rows), :, :len(cols)]
+        out = self.values[rows][:, :, cols]
+        out[:, :, [j for j, c in enumerate(cols) if c < 0]] = np.nan
+        return out
+
+def calc_synthetic_ohlc(data, fields=PRICE_FIELDS, formulas=SYNTHETIC_FORMULAS):
+    """Calculate the synthetic indices for each field. Returns one DataFrame per field.
+
+    `data` is a yf.download frame or a PricePanel built from one; the frames
+    returned are views of a single (field, time, index) float64 array.
+    """
+    panel = data if isinstance(data, PricePanel) else PricePanel.from_frame(data, fields=fields)
+    plan = build_formula_plan(formulas)
+    values = plan.evaluate(panel.take(plan.tickers, fields))
+    values = values.astype(np.float64, copy=False)
+    return [pd.DataFrame(values[i], index=panel.index, columns=plan.names, copy=False) for i in range(len(fields))]
+
+def calc_synthetic_indices(data):
+    """Synthetic Close indices."""
+    return calc_synthetic_ohlc(data, fields=['Close'])[0]
 
 # ==========================================
 # Logic: Indicators & V24D
@@ -208,8 +456,30 @@ def calc_sma_slope_v2(series, length):
     pct_change = series.pct_change() * 100
     return pct_change.rolling(window=length).mean()
 
-def calc_rsi_votes(series, n_votes):
-    rsi = calc_rsi(series, length=14)
+def calc_ema_slope_grid(emas, slope_lengths=None):
+    """Last-bar EMA slopes for every (ema_len, slope_len) pair.
+
+    Same values as calc_sma_slope_v2(ema, slope_len).iloc[-1] for each pair,
+    but every window is read off one reversed cumulative sum of the last
+    max(slope_lengths) pct changes. `emas` maps EMA length -> Series or
+    right-aligned frame; returns shape (ema_len, slope_len), or
+    (symbol, ema_len, slope_len) for frames.
+    """
+    slope_lengths = slope_lengths or SLOPE_LENGTHS
+    width = max(slope_lengths)
+    rows = []
+    for ema in emas.values():
+        tail = ema.iloc[-(width + 1):].to_numpy(dtype=float)
+        pct = (tail[1:] / tail[:-1] - 1) * 100
+        sums = np.cumsum(pct[::-1], axis=0)
+        nan = np.full(pct.shape[1:], np.nan)
+        rows.append([sums[w - 1] / w if len(pct) >= w else nan for w in slope_lengths])
+    grid = np.array(rows)
+    return np.moveaxis(grid, -1, 0) if grid.ndim == 3 else grid
+
+def calc_rsi_votes(series, n_votes, ind=None):
+    if ind is None: ind = IndicatorContext(series)
+    rsi = ind['rsi']
     if rsi is None or len(rsi) == 0: return False, False
     
     mas = [16, 25, 37, 157, 248, 369]
@@ -217,7 +487,7 @@ def calc_rsi_votes(series, n_votes):
     down_count = 0
     
     for length in mas:
-        ma = rsi.rolling(window=length).mean()
+        ma = ind['rsi_ma'][length]
         slope = ma.diff()
         if len(slope) > 0:
             val = slope.iloc[-1]
@@ -241,8 +511,9 @@ def calc_rsi_votes(series, n_votes):
         
     return long_sig, short_sig
 
-def calc_macd_signal(series):
-    macd_line, signal_line, _ = calc_macd(series, fast=12, slow=26, signal=9)
+def calc_macd_signal(series, ind=None):
+    if ind is None: ind = IndicatorContext(series)
+    macd_line, signal_line, _ = ind['macd']
     if macd_line is None or len(macd_line) == 0: return False, False
     
     m_val = macd_line.iloc[-1]
@@ -263,35 +534,16 @@ def calc_macd_signal(series):
              
     return long_sig, short_sig
 
-def calc_adx_signal(high, low, close, length=14):
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    atr = tr.rolling(window=length).mean()
-    
-    up_move = high - high.shift(1)
-    down_move = low.shift(1) - low
-    
-    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-    
-    plus_dm_s = pd.Series(plus_dm, index=high.index)
-    minus_dm_s = pd.Series(minus_dm, index=high.index)
-    
-    plus_di = (plus_dm_s.rolling(window=length).mean() / atr) * 100
-    minus_di = (minus_dm_s.rolling(window=length).mean() / atr) * 100
-    
-    plus_di = plus_di.fillna(0)
-    minus_di = minus_di.fillna(0)
+def calc_adx_signal(high, low, close, length=14, ind=None):
+    if ind is None: ind = IndicatorContext(close, high, low, di_length=length)
+    plus_di, minus_di = ind['di']
     
     lengths = [16, 25, 37]
     
     if len(plus_di) < 38: return False, False
     
-    p_mas = [plus_di.rolling(window=l).mean().iloc[-1] for l in lengths]
-    m_mas = [minus_di.rolling(window=l).mean().iloc[-1] for l in lengths]
+    p_mas = [ind['plus_di_ma'][l].iloc[-1] for l in lengths]
+    m_mas = [ind['minus_di_ma'][l].iloc[-1] for l in lengths]
     
     if any(np.isnan(p_mas)) or any(np.isnan(m_mas)): return False, False
     
@@ -329,9 +581,10 @@ def calc_adx_signal(high, low, close, length=14):
 # Wave 1 (First Wave / 一浪) Indicator Functions
 # ==========================================
 
-def calc_rsi_fw_day(series):
+def calc_rsi_fw_day(series, ind=None):
     """RSI First Wave for Daily - uses 6 SMA periods, threshold >= 2."""
-    rsi = calc_rsi(series, length=14)
+    if ind is None: ind = IndicatorContext(series)
+    rsi = ind['rsi']
     if rsi is None or len(rsi) < 370: return False, False
     
     mas = [16, 25, 37, 157, 248, 369]
@@ -339,7 +592,7 @@ def calc_rsi_fw_day(series):
     down_count = 0
     
     for length in mas:
-        ma = rsi.rolling(window=length).mean()
+        ma = ind['rsi_ma'][length]
         slope = ma.diff()
         if len(slope) > 0:
             val = slope.iloc[-1]
@@ -349,9 +602,10 @@ def calc_rsi_fw_day(series):
     
     return up_count >= 2, down_count >= 2
 
-def calc_rsi_fw_week(series):
+def calc_rsi_fw_week(series, ind=None):
     """RSI First Wave for Weekly - uses 3 SMA periods, threshold >= 1."""
-    rsi = calc_rsi(series, length=14)
+    if ind is None: ind = IndicatorContext(series)
+    rsi = ind['rsi']
     if rsi is None or len(rsi) < 38: return False, False
     
     mas = [16, 25, 37]
@@ -359,7 +613,7 @@ def calc_rsi_fw_week(series):
     down_count = 0
     
     for length in mas:
-        ma = rsi.rolling(window=length).mean()
+        ma = ind['rsi_ma'][length]
         slope = ma.diff()
         if len(slope) > 0:
             val = slope.iloc[-1]
@@ -369,9 +623,10 @@ def calc_rsi_fw_week(series):
     
     return up_count >= 1, down_count >= 1
 
-def calc_macd_fw(series):
+def calc_macd_fw(series, ind=None):
     """MACD First Wave - returns (dif, dea, up_count, down_count)."""
-    macd_line, signal_line, histogram = calc_macd(series, fast=12, slow=26, signal=9)
+    if ind is None: ind = IndicatorContext(series)
+    macd_line, signal_line, histogram = ind['macd']
     if macd_line is None or len(macd_line) < 38: return 0, 0, 0, 0
     
     dif = macd_line.iloc[-1]
@@ -396,7 +651,7 @@ def calc_macd_fw(series):
     
     # Histogram SMA slopes
     for length in [16, 25, 37]:
-        ma = histogram.rolling(window=length).mean()
+        ma = ind['hist_ma'][length]
         slope = ma.diff().iloc[-1]
         if not pd.isna(slope):
             if slope > 0: up_count += 1
@@ -404,35 +659,16 @@ def calc_macd_fw(series):
     
     return dif, dea, up_count, down_count
 
-def calc_adx_fw(high, low, close, length=14):
+def calc_adx_fw(high, low, close, length=14, ind=None):
     """ADX First Wave - returns 8 values for position/slope analysis."""
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    atr = tr.rolling(window=length).mean()
-    
-    up_move = high - high.shift(1)
-    down_move = low.shift(1) - low
-    
-    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-    
-    plus_dm_s = pd.Series(plus_dm, index=high.index)
-    minus_dm_s = pd.Series(minus_dm, index=high.index)
-    
-    plus_di = (plus_dm_s.rolling(window=length).mean() / atr) * 100
-    minus_di = (minus_dm_s.rolling(window=length).mean() / atr) * 100
-    
-    plus_di = plus_di.fillna(0)
-    minus_di = minus_di.fillna(0)
+    if ind is None: ind = IndicatorContext(close, high, low, di_length=length)
+    plus_di, minus_di = ind['di']
     
     if len(plus_di) < 38: return 0, 0, 0, 0, 0, 0, 0, 0
     
     # Calculate SMAs
-    p_mas = [plus_di.rolling(window=l).mean() for l in [16, 25, 37]]
-    m_mas = [minus_di.rolling(window=l).mean() for l in [16, 25, 37]]
+    p_mas = [ind['plus_di_ma'][l] for l in [16, 25, 37]]
+    m_mas = [ind['minus_di_ma'][l] for l in [16, 25, 37]]
     
     p_ma_vals = [ma.iloc[-1] for ma in p_mas]
     m_ma_vals = [ma.iloc[-1] for ma in m_mas]
@@ -465,422 +701,1193 @@ def calc_adx_fw(high, low, close, length=14):
     
     return p_up_count, p_down_count, m_up_count, m_down_count, p_below_count, p_above_count, m_below_count, m_above_count
 
-def calc_fw_week_signals(w_close, w_high, w_low):
-    """Calculate Weekly First Wave signals."""
+def calc_fw_week_signals(w_close, w_high, w_low, ind=None):
+    """Calculate Weekly First Wave signals (MACD and ADX trees in rules.py)."""
+    if ind is None: ind = IndicatorContext(w_close, w_high, w_low)
     # RSI Week
-    rsi_l, rsi_s = calc_rsi_fw_week(w_close)
-    
-    # MACD Week
-    dif, dea, up, down = calc_macd_fw(w_close)
-    both_below = dif < 0 and dea < 0
-    both_above = dif > 0 and dea > 0
-    cross_zero = (dif > 0 and dea < 0) or (dif < 0 and dea > 0) or dif == 0 or dea == 0
-    
-    macd_l, macd_s, macd_w = False, False, False
-    if both_below and up >= 3:
-        macd_l = True
-    elif both_above and down >= 3:
-        macd_s = True
-    elif cross_zero and up >= 3:
-        macd_l = True
-    elif cross_zero and down >= 3:
-        macd_s = True
-    elif both_above and up >= 3:
-        macd_w = True
-    elif both_below and down >= 3:
-        macd_w = True
-    
-    # ADX Week
-    p_up, p_down, m_up, m_down, p_b, p_a, m_b, m_a = calc_adx_fw(w_high, w_low, w_close, 14)
-    adx_l, adx_s, adx_b, adx_w = False, False, False, False
-    
-    if p_up >= 1 and p_b >= 6:
-        adx_l = True
-    elif m_up >= 1 and m_b >= 6:
-        adx_s = True
-    elif p_up >= 1 and m_up >= 2:
-        adx_b = True
-    elif p_down >= 1 and m_down >= 2:
-        adx_b = True
-    elif p_up == 3 and p_a >= 6:
-        if p_down >= 1:
-            adx_s = True
-        else:
-            adx_w = True
-    elif m_up == 3 and m_a >= 6:
-        if m_down >= 1:
-            adx_l = True
-        else:
-            adx_w = True
-    
+    rsi_l, rsi_s = calc_rsi_fw_week(w_close, ind)
+
+    # MACD / ADX Week
+    macd, adx = rules.fw_week_rules(calc_macd_fw(w_close, ind), calc_adx_fw(w_high, w_low, w_close, 14, ind))
+    macd_l, macd_s, macd_w = (bool(macd == o) for o in (rules.LONG, rules.SHORT, rules.WAIT))
+    adx_l, adx_s, adx_b, adx_w = (bool(adx == o) for o in (rules.LONG, rules.SHORT, rules.BOTH, rules.WAIT))
+
     return rsi_l, rsi_s, macd_l, macd_s, macd_w, adx_l, adx_s, adx_b, adx_w
 
-def calc_fw_aggregation(d_close, d_high, d_low, w_rsi_l, w_rsi_s, w_macd_l, w_macd_s, w_macd_w, w_adx_l, w_adx_s, w_adx_b, w_adx_w):
-    """First Wave Commander aggregation logic."""
+def calc_fw_aggregation(d_close, d_high, d_low, w_rsi_l, w_rsi_s, w_macd_l, w_macd_s, w_macd_w, w_adx_l, w_adx_s, w_adx_b, w_adx_w, ind=None):
+    """First Wave Commander aggregation logic (RSI/MACD/ADX/commander trees in rules.py)."""
+    if ind is None: ind = IndicatorContext(d_close, d_high, d_low)
     # 1. RSI Day
-    rsi_d_l, rsi_d_s = calc_rsi_fw_day(d_close)
-    rsi_w_l, rsi_w_s = w_rsi_l, w_rsi_s
-    
-    rsi_d_both = rsi_d_l and rsi_d_s
-    rsi_w_both = rsi_w_l and rsi_w_s
-    
-    rsi_gen_l, rsi_gen_s, rsi_gen_wait = False, False, False
-    d_only_l = rsi_d_l and not rsi_d_s
-    d_only_s = rsi_d_s and not rsi_d_l
-    w_only_l = rsi_w_l and not rsi_w_s
-    w_only_s = rsi_w_s and not rsi_w_l
-    
-    if d_only_l and w_only_l: rsi_gen_l = True
-    elif d_only_s and w_only_s: rsi_gen_s = True
-    elif rsi_d_both and w_only_l: rsi_gen_l = True
-    elif rsi_d_both and w_only_s: rsi_gen_s = True
-    elif d_only_l and rsi_w_both: rsi_gen_l = True
-    elif d_only_s and rsi_w_both: rsi_gen_s = True
-    elif d_only_l and w_only_s: rsi_gen_wait = True
-    elif d_only_s and w_only_l: rsi_gen_wait = True
-    elif rsi_d_both and rsi_w_both: rsi_gen_l, rsi_gen_s = True, True
-    
+    rsi_d_l, rsi_d_s = calc_rsi_fw_day(d_close, ind)
+
     # 2. MACD Day
-    dif_d, dea_d, up_d, down_d = calc_macd_fw(d_close)
+    dif_d, dea_d, up_d, down_d = calc_macd_fw(d_close, ind)
     macd_d_l = up_d >= 3
     macd_d_s = down_d >= 3
-    macd_d_wait = not macd_d_l and not macd_d_s
-    
-    macd_w_l, macd_w_s, macd_w_wait = w_macd_l, w_macd_s, w_macd_w
-    
-    macd_gen_l, macd_gen_s, macd_gen_b, macd_gen_wait = False, False, False, False
-    if macd_w_wait:
-        macd_gen_wait = True
-    elif macd_d_l and macd_w_l: macd_gen_l = True
-    elif macd_d_s and macd_w_s: macd_gen_s = True
-    elif macd_d_l and macd_w_s: macd_gen_b = True
-    elif macd_d_s and macd_w_l: macd_gen_b = True
-    elif macd_d_wait and macd_w_l: macd_gen_l = True
-    elif macd_d_wait and macd_w_s: macd_gen_s = True
-    
+
     # 3. ADX Day
-    p_up_d, p_down_d, m_up_d, m_down_d, p_below_d, p_above_d, m_below_d, m_above_d = calc_adx_fw(d_high, d_low, d_close, 14)
-    adx_d_l, adx_d_s, adx_d_b, adx_d_wait = False, False, False, False
-    
-    if p_up_d >= 1 and p_below_d >= 6: adx_d_l = True
-    elif m_up_d >= 1 and m_below_d >= 6: adx_d_s = True
-    elif p_up_d >= 1 and m_up_d >= 2: adx_d_b = True
-    elif p_down_d >= 1 and m_down_d >= 2: adx_d_b = True
-    elif p_up_d >= 1 and p_above_d >= 6: adx_d_wait = True
-    elif m_up_d >= 2 and m_above_d >= 6: adx_d_wait = True
-    
-    adx_w_l, adx_w_s, adx_w_b, adx_w_wait = w_adx_l, w_adx_s, w_adx_b, w_adx_w
-    
-    adx_gen_l, adx_gen_s, adx_gen_b, adx_gen_wait = False, False, False, False
-    if adx_d_wait or adx_w_wait: adx_gen_wait = True
-    elif adx_d_l and adx_w_l: adx_gen_l = True
-    elif adx_d_s and adx_w_s: adx_gen_s = True
-    elif adx_d_l and adx_w_s: adx_gen_b = True
-    elif adx_d_s and adx_w_l: adx_gen_b = True
-    elif adx_d_b and adx_w_l: adx_gen_l = True
-    elif adx_d_b and adx_w_s: adx_gen_s = True
-    elif adx_d_l and adx_w_b: adx_gen_l = True
-    elif adx_d_s and adx_w_b: adx_gen_s = True
-    elif adx_d_b and adx_w_b: adx_gen_b = True
-    
-    # 4. Commander
-    fw_l, fw_s = False, False
-    if rsi_gen_wait or macd_gen_wait or adx_gen_wait:
-        fw_l, fw_s = False, False
+    adx_d = rules.fw_day_adx(calc_adx_fw(d_high, d_low, d_close, 14, ind))
+    adx_d_l, adx_d_s = bool(adx_d == rules.LONG), bool(adx_d == rules.SHORT)
+
+    # 4. Commander: 1=Long, -1=Short, 0=Wait
+    status = rules.fw_commander(rsi_d_l, rsi_d_s, up_d, down_d, adx_d, w_rsi_l, w_rsi_s,
+                                rules.flags_outcome(w_macd_l, w_macd_s, wait=w_macd_w),
+                                rules.flags_outcome(w_adx_l, w_adx_s, w_adx_b, w_adx_w))
+
+    return int(status), [rsi_d_l, rsi_d_s], [w_rsi_l, w_rsi_s], [macd_d_l, macd_d_s], [w_macd_l, w_macd_s], [adx_d_l, adx_d_s], [w_adx_l, w_adx_s]
+
+
+# ==========================================
+# Incremental Indicator State
+# ==========================================
+EMA_LENGTHS = [20, 50, 100, 200]
+SLOPE_LENGTHS = [20, 50, 90]
+RSI_MA_LENGTHS = [16, 25, 37, 157, 248, 369]
+SHORT_MA_LENGTHS = [16, 25, 37]  # DI, MACD histogram and weekly RSI SMAs
+REVISION_BARS = 10  # trailing bars re-applied on every run to absorb late revisions
+
+def _ewm_com(span=None, alpha=None):
+    """Center of mass the way pandas derives it from span/alpha."""
+    return (span - 1) / 2.0 if span is not None else 1.0 / alpha - 1.0
+
+def _ewm_step(prev, cur, com):
+    """One adjust=False EWM step, written exactly as pandas evaluates it."""
+    alpha = 1.0 / (1.0 + com)
+    old_wt = 1.0 - alpha
+    if prev == cur:
+        return prev
+    return (old_wt * prev + alpha * cur) / (old_wt + alpha)
+
+class IndicatorState:
+    """Running indicator accumulators for one symbol and timeframe.
+
+    Holds the EMA/Wilder/MACD accumulators plus tails of RSI, MACD, DI and
+    the slope EMAs just long enough for the widest rolling mean the vote
+    functions read, so appending a bar is O(1) and indicators() gives the
+    same last values as a full recompute. Bars must not contain NaN.
+    """
+    RSI_TAIL = max(RSI_MA_LENGTHS) + 1
+    SHORT_TAIL = max(SHORT_MA_LENGTHS) + 1
+    DM_TAIL = 14
+    EMA_TAIL = max(SLOPE_LENGTHS) + 1
+
+    def __init__(self):
+        self.count = 0
+        self.last_date = None
+        self.last_bar = None  # (close, high, low)
+        self.checksum = None  # bar_checksum() of the bars applied, set when saved
+        self.ema = {}         # length -> value; 12/26 feed MACD
+        self.signal = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.tails = {
+            'rsi': deque(maxlen=self.RSI_TAIL),
+            'macd': deque(maxlen=self.SHORT_TAIL),
+            'signal': deque(maxlen=self.SHORT_TAIL),
+            'hist': deque(maxlen=self.SHORT_TAIL),
+            'tr': deque(maxlen=self.DM_TAIL),
+            'plus_dm': deque(maxlen=self.DM_TAIL),
+            'minus_dm': deque(maxlen=self.DM_TAIL),
+            'plus_di': deque(maxlen=self.SHORT_TAIL),
+            'minus_di': deque(maxlen=self.SHORT_TAIL),
+        }
+        for length in EMA_LENGTHS:
+            self.tails[f'ema{length}'] = deque(maxlen=self.EMA_TAIL)
+
+    @classmethod
+    def from_history(cls, close, high, low):
+        """Build the state for a full series with the vectorized pandas indicators."""
+        state = cls()
+        if len(close) == 0:
+            return state
+        state.count = len(close)
+        state.last_date = pd.Timestamp(close.index[-1])
+        state.last_bar = (float(close.iloc[-1]), float(high.iloc[-1]), float(low.iloc[-1]))
+
+        for length in EMA_LENGTHS + [12, 26]:
+            ema = calc_ema(close, length)
+            state.ema[length] = float(ema.iloc[-1])
+            if length in EMA_LENGTHS:
+                state.tails[f'ema{length}'].extend(ema.to_numpy())
+
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0.0)
+        loss = (-delta).where(delta < 0, 0.0)
+        state.avg_gain = float(gain.ewm(alpha=1/14, adjust=False).mean().iloc[-1])
+        state.avg_loss = float(loss.ewm(alpha=1/14, adjust=False).mean().iloc[-1])
+        state.tails['rsi'].extend(calc_rsi(close, 14).to_numpy())
+
+        macd_line, signal_line, histogram = calc_macd(close)
+        state.signal = float(signal_line.iloc[-1])
+        state.tails['macd'].extend(macd_line.to_numpy())
+        state.tails['signal'].extend(signal_line.to_numpy())
+        state.tails['hist'].extend(histogram.to_numpy())
+
+        tr, plus_dm, minus_dm = calc_dm_tr(high, low, close)
+        plus_di, minus_di = calc_di(high, low, close, 14)
+        state.tails['tr'].extend(tr.to_numpy())
+        state.tails['plus_dm'].extend(plus_dm.to_numpy())
+        state.tails['minus_dm'].extend(minus_dm.to_numpy())
+        state.tails['plus_di'].extend(plus_di.to_numpy())
+        state.tails['minus_di'].extend(minus_di.to_numpy())
+        return state
+
+    def update(self, date, close, high, low):
+        """Append one bar."""
+        close, high, low = np.float64(close), np.float64(high), np.float64(low)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._update(close, high, low)
+        self.last_date = pd.Timestamp(date)
+        self.last_bar = (float(close), float(high), float(low))
+
+    def _update(self, close, high, low):
+        first = self.count == 0
+        self.count += 1
+        t = self.tails
+
+        for length in EMA_LENGTHS + [12, 26]:
+            self.ema[length] = close if first else _ewm_step(self.ema[length], close, _ewm_com(span=length))
+        for length in EMA_LENGTHS:
+            t[f'ema{length}'].append(self.ema[length])
+
+        # RSI (Wilder smoothing, first bar contributes a zero gain/loss)
+        if first:
+            gain = loss = np.float64(0.0)
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            delta = close - self.last_bar[0]
+            gain = delta if delta > 0 else np.float64(0.0)
+            loss = -delta if delta < 0 else np.float64(0.0)
+            com = _ewm_com(alpha=1/14)
+            self.avg_gain = _ewm_step(self.avg_gain, gain, com)
+            self.avg_loss = _ewm_step(self.avg_loss, loss, com)
+        t['rsi'].append(100 - (100 / (1 + self.avg_gain / self.avg_loss)) if self.count >= 14 else np.nan)
+
+        # MACD
+        macd = self.ema[12] - self.ema[26]
+        self.signal = macd if first else _ewm_step(self.signal, macd, _ewm_com(span=9))
+        t['macd'].append(macd)
+        t['signal'].append(self.signal)
+        t['hist'].append(macd - self.signal)
+
+        # True range / directional movement / DI
+        if first:
+            tr, plus_dm, minus_dm = high - low, 0.0, 0.0
+        else:
+            prev_close, prev_high, prev_low = self.last_bar
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            up_move = high - prev_high
+            down_move = prev_low - low
+            plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+            minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        t['tr'].append(tr)
+        t['plus_dm'].append(plus_dm)
+        t['minus_dm'].append(minus_dm)
+
+        if self.count >= self.DM_TAIL:
+            atr = np.float64(np.mean(t['tr']))
+            plus_di = (np.mean(t['plus_dm']) / atr) * 100
+            minus_di = (np.mean(t['minus_dm']) / atr) * 100
+        else:
+            plus_di = minus_di = np.nan
+        t['plus_di'].append(0.0 if np.isnan(plus_di) else plus_di)
+        t['minus_di'].append(0.0 if np.isnan(minus_di) else minus_di)
+
+    def copy(self):
+        """Independent copy, e.g. to apply a provisional bar without touching this state."""
+        state = IndicatorState()
+        state.__dict__.update(self.__dict__)
+        state.ema = dict(self.ema)
+        state.tails = {k: v.copy() for k, v in self.tails.items()}
+        return state
+
+    def indicators(self):
+        """IndicatorContext over the retained tails."""
+        t = {k: pd.Series(list(v), dtype=float) for k, v in self.tails.items()}
+        return IndicatorContext(
+            tail_only=True,
+            rsi=t['rsi'],
+            macd=(t['macd'], t['signal'], t['hist']),
+            di=(t['plus_di'], t['minus_di']),
+            ema={length: t[f'ema{length}'] for length in EMA_LENGTHS},
+        )
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'last_date': self.last_date.isoformat() if self.last_date is not None else None,
+            'last_bar': self.last_bar,
+            'ema': {str(k): float(v) for k, v in self.ema.items()},
+            'signal': None if self.signal is None else float(self.signal),
+            'avg_gain': None if self.avg_gain is None else float(self.avg_gain),
+            'avg_loss': None if self.avg_loss is None else float(self.avg_loss),
+            'checksum': self.checksum,
+            'tails': {k: [float(x) for x in v] for k, v in self.tails.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        state = cls()
+        state.count = d['count']
+        state.last_date = pd.Timestamp(d['last_date']) if d['last_date'] else None
+        state.last_bar = tuple(d['last_bar']) if d['last_bar'] else None
+        state.ema = {int(k): np.float64(v) for k, v in d['ema'].items()}
+        for key in ('signal', 'avg_gain', 'avg_loss'):
+            setattr(state, key, None if d[key] is None else np.float64(d[key]))
+        state.checksum = d.get('checksum')
+        for k, v in d['tails'].items():
+            state.tails[k].extend(v)
+        return state
+
+def load_indicator_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return IndicatorState.from_dict(json.load(f))
+
+def save_indicator_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp, path)
+
+def bar_checksum(c, h, l):
+    """Column sums of the bars a checkpoint was built from."""
+    return [float(np.sum(c)), float(np.sum(h)), float(np.sum(l))]
+
+def resume_indicator_state(path, close, high, low, revision_bars=REVISION_BARS):
+    """Advance the saved checkpoint to the last bar and return the live state.
+
+    The checkpoint on disk is kept `revision_bars` behind the last bar, so
+    every run rolls back to it and re-applies the recent (possibly revised)
+    bars. If the series no longer agrees with the checkpoint (its last bar,
+    the bar count or the column sums up to it, i.e. a revision older than
+    the checkpoint), the state is rebuilt from the full history.
+    """
+    n = len(close)
+    cut = max(n - revision_bars, 0)
+    c, h, l = close.to_numpy(dtype=float), high.to_numpy(dtype=float), low.to_numpy(dtype=float)
+
+    state = load_indicator_state(path)
+    start = cut
+    if state is not None and state.last_date is not None:
+        pos = close.index.searchsorted(state.last_date)
+        if (pos < cut and close.index[pos] == state.last_date and state.count == pos + 1
+                and np.allclose(state.last_bar, (c[pos], h[pos], l[pos]), rtol=1e-9, atol=0)
+                and state.checksum is not None
+                and np.allclose(state.checksum, bar_checksum(c[:pos + 1], h[:pos + 1], l[:pos + 1]), rtol=1e-12, atol=0)):
+            start = pos + 1
+        else:
+            state = None
+    if state is None:
+        state = IndicatorState.from_history(close.iloc[:cut], high.iloc[:cut], low.iloc[:cut])
+
+    for i in range(start, cut):
+        state.update(close.index[i], c[i], h[i], l[i])
+    state.checksum = bar_checksum(c[:cut], h[:cut], l[:cut])
+    save_indicator_state(path, state)
+    for i in range(cut, n):
+        state.update(close.index[i], c[i], h[i], l[i])
+    return state
+
+def calc_indicator_tails(key, close, high, low, store_dir=None):
+    """Indicators from the state saved under `store_dir`, else None (full recompute)."""
+    if not store_dir or close.isna().any() or high.isna().any() or low.isna().any():
+        return None
+    path = os.path.join(store_dir, 'state', key + '.json')
+    return resume_indicator_state(path, close, high, low).indicators()
+
+
+# ==========================================
+# Batched Indicator Kernels
+# ==========================================
+def stack_series(series_map):
+    """Right-align per-symbol series into one (bar, symbol) frame.
+
+    Each column ends on its symbol's last bar and is NaN-padded before its
+    own first bar, so column-wise rolling/EWM over the frame gives the same
+    values as running each symbol on its own. Returns (frame, lengths, span)
+    where span marks the bars inside each column's history.
+    """
+    symbols = list(series_map)
+    lengths = np.array([len(series_map[s]) for s in symbols], dtype=int)
+    n = int(lengths.max()) if len(symbols) else 0
+    values = np.full((n, len(symbols)), np.nan)
+    for j, s in enumerate(symbols):
+        if lengths[j]:
+            values[n - lengths[j]:, j] = series_map[s].to_numpy(dtype=float)
+    span = np.arange(n)[:, None] >= (n - lengths)[None, :]
+    return pd.DataFrame(values, columns=symbols), lengths, span
+
+def calc_batch_indicators(close, high, low, span, tail_only=False):
+    """Indicator panels for right-aligned (bar, symbol) frames, one column per symbol.
+
+    tail_only keeps only the last bars of DI and the SMA stacks (see IndicatorContext).
+    """
+    rsi = calc_rsi(close, 14, span)
+    macd_line, signal_line, histogram = calc_macd(close, fast=12, slow=26, signal=9)
+    emas = {l: calc_ema(close, l) for l in EMA_LENGTHS}
+    if tail_only:
+        plus_di, minus_di = calc_di_tail(high, low, close, 14, span=span)
+        sma = tail_rolling_mean
     else:
-        # Long condition
-        rsi_supp_l = rsi_gen_l or (rsi_gen_l and rsi_gen_s)
-        if rsi_supp_l and macd_gen_l and (adx_gen_l or adx_gen_b):
-            fw_l = True
-        
-        # Short condition
-        rsi_supp_s = rsi_gen_s or (rsi_gen_l and rsi_gen_s)
-        if rsi_supp_s and macd_gen_s and (adx_gen_s or adx_gen_b):
-            fw_s = True
-    
-    # Return status: 1=Long, -1=Short, 2=Both, 0=Wait
-    if fw_l and fw_s: return 2, [rsi_d_l, rsi_d_s], [rsi_w_l, rsi_w_s], [macd_d_l, macd_d_s], [macd_w_l, macd_w_s], [adx_d_l, adx_d_s], [adx_w_l, adx_w_s]
-    if fw_l: return 1, [rsi_d_l, rsi_d_s], [rsi_w_l, rsi_w_s], [macd_d_l, macd_d_s], [macd_w_l, macd_w_s], [adx_d_l, adx_d_s], [adx_w_l, adx_w_s]
-    if fw_s: return -1, [rsi_d_l, rsi_d_s], [rsi_w_l, rsi_w_s], [macd_d_l, macd_d_s], [macd_w_l, macd_w_s], [adx_d_l, adx_d_s], [adx_w_l, adx_w_s]
-    return 0, [rsi_d_l, rsi_d_s], [rsi_w_l, rsi_w_s], [macd_d_l, macd_d_s], [macd_w_l, macd_w_s], [adx_d_l, adx_d_s], [adx_w_l, adx_w_s]
+        plus_di, minus_di = calc_di(high, low, close, 14, span)
+        sma = lambda x, l: x.rolling(window=l).mean()
+    return {
+        'rsi': rsi,
+        'macd': (macd_line, signal_line, histogram),
+        'di': (plus_di, minus_di),
+        'ema': emas,
+        'rsi_ma': {l: sma(rsi, l) for l in RSI_MA_LENGTHS},
+        'hist_ma': {l: sma(histogram, l) for l in SHORT_MA_LENGTHS},
+        'plus_di_ma': {l: sma(plus_di, l) for l in SHORT_MA_LENGTHS},
+        'minus_di_ma': {l: sma(minus_di, l) for l in SHORT_MA_LENGTHS},
+        'ema_slope_grid': dict(zip(close.columns, calc_ema_slope_grid(emas))),
+    }
+
+def column_indicators(batch, symbol, n, tail_only=False):
+    """IndicatorContext over one symbol's last n bars of every batch panel."""
+    def cut(x):
+        if isinstance(x, dict) and symbol in x:
+            return x[symbol]
+        if isinstance(x, dict):
+            return {k: cut(v) for k, v in x.items()}
+        if isinstance(x, tuple):
+            return tuple(cut(v) for v in x)
+        return x[symbol].iloc[max(len(x) - n, 0):]
+    return IndicatorContext(tail_only=tail_only, **{k: cut(v) for k, v in batch.items()})
+
+def calc_panel_indicators(bars, tail_only=False):
+    """Batch indicators for {symbol: (close, high, low)}. Returns {symbol: IndicatorContext}."""
+    if not bars:
+        return {}
+    close, lengths, span = stack_series({s: b[0] for s, b in bars.items()})
+    high, _, _ = stack_series({s: b[1] for s, b in bars.items()})
+    low, _, _ = stack_series({s: b[2] for s, b in bars.items()})
+    batch = calc_batch_indicators(close, high, low, span, tail_only)
+    return {s: column_indicators(batch, s, n, tail_only) for s, n in zip(close.columns, lengths)}
+
+# ==========================================
+# Snapshot Push
+# ==========================================
+def clean_nan(obj):
+    """Replace NaN/Inf anywhere in a JSON-able structure with None (JSON null).
+
+    One pass through the C json codec instead of walking the payload in Python;
+    works on a single row or on the whole list of rows at once.
+    """
+    return json.loads(json.dumps(obj), parse_constant=lambda _: None)
+
+def make_snapshot_row(symbol, data):
+    return {
+        'symbol': symbol,
+        'data': data,
+        'updated_at': datetime.utcnow().isoformat() + "Z" # Explicit UTC for SQL column
+    }
+
+def with_retries(call, what, retries=PUSH_RETRIES, backoff=1.0):
+    """call(), retried `retries` times with backoff * 2**attempt seconds in between; the last error is raised."""
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = backoff * 2 ** attempt
+            print(f"{what} failed ({e}), retrying in {wait:.1f}s...")
+            time.sleep(wait)
+
+def upsert_rows(client, rows, table=SNAPSHOT_TABLE, chunk_size=PUSH_CHUNK_SIZE, retries=PUSH_RETRIES, backoff=1.0):
+    """Upsert rows in chunks of `chunk_size`, one request per chunk (see with_retries)."""
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        with_retries(lambda: client.table(table).upsert(chunk).execute(),
+                     f"Upsert of {len(chunk)} rows", retries, backoff)
+    return len(rows)
+
+def push_snapshots(client, results, **kwargs):
+    """Clean and upsert all snapshot payloads in as few requests as the chunk size allows."""
+    rows = clean_nan([make_snapshot_row(sym, data) for sym, data in results.items()])
+    return upsert_rows(client, rows, **kwargs)
+
+def flatten_payload(payload, prefix=''):
+    """{'a': {'b': x}} -> {'a.b': x}; lists and scalars are leaves."""
+    flat = {}
+    for key, value in payload.items():
+        if isinstance(value, dict):
+            flat.update(flatten_payload(value, f"{prefix}{key}."))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+def make_aggregate(results):
+    """All payloads as one columnar document.
+
+    {'symbols': [...], 'columns': {path: [value per symbol]}, 'hash', 'last_update'}:
+    paths are the nested payload keys joined with '.', null where a symbol has
+    no such key (e.g. no intraday frames). The hash covers symbols and columns
+    only, so rerunning on unchanged bars gives the same hash.
+    """
+    symbols = [s for s in SYMBOLS_MAP if s in results] + [s for s in results if s not in SYMBOLS_MAP]
+    flat = [flatten_payload({k: v for k, v in results[s].items() if k not in ('symbol', 'last_update')})
+            for s in symbols]
+    paths = sorted(set().union(*flat))
+    doc = clean_nan({'symbols': symbols, 'columns': {p: [f.get(p) for f in flat] for p in paths}})
+    text = json.dumps(doc, sort_keys=True, separators=(',', ':'))
+    doc['hash'] = hashlib.sha256(text.encode()).hexdigest()
+    doc['last_update'] = max((p.get('last_update') or '' for p in results.values()), default='') or None
+    return doc
+
+def publish_aggregate(client, results, retries=PUSH_RETRIES, backoff=1.0):
+    """Publish the aggregate row and stamp its checked_at; returns its version (unchanged when the hash is).
+
+    A failure (e.g. the schema's RPC not deployed yet) is only reported and
+    gives None: the snapshot rows are already upserted by then.
+    """
+    doc = make_aggregate(results)
+    params = {'p_hash': doc['hash'], 'p_data': doc}
+    try:
+        return with_retries(lambda: client.rpc(AGGREGATE_RPC, params).execute().data,
+                            "Aggregate publish", retries, backoff)
+    except Exception as e:
+        print(f"Warning: could not publish {AGGREGATE_TABLE} ({e}).")
+        return None
+
+def push_document(client, table, doc):
+    """Upsert a run-level document (correlation matrix, pair matrix) as the table's 'latest' row; a failure is only reported."""
+    row = {'id': 'latest', 'updated_at': doc['last_update'], 'data': clean_nan(doc)}
+    try:
+        upsert_rows(client, [row], table=table)
+    except Exception as e:
+        print(f"Warning: could not publish {table} ({e}).")
+
+class SnapshotPusher:
+    """Upsert snapshot rows from a background thread while compute continues.
+
+    put() blocks once `max_pending` rows are queued, so the compute loop never
+    runs far ahead of the network. close() flushes the last partial chunk and
+    re-raises a push error, if any.
+    """
+    def __init__(self, client, chunk_size=PUSH_CHUNK_SIZE, max_pending=None, **kwargs):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.kwargs = dict(kwargs, chunk_size=chunk_size)
+        self.queue = queue.Queue(maxsize=max_pending or 2 * chunk_size)
+        self.error = None
+        self.pushed = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, symbol, data):
+        self.queue.put(clean_nan(make_snapshot_row(symbol, data)))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.pushed
+
+    def _flush(self, rows):
+        # After a failure keep draining the queue so put() cannot block forever
+        if rows and self.error is None:
+            try:
+                self.pushed += upsert_rows(self.client, rows, **self.kwargs)
+            except Exception as e:
+                self.error = e
+
+    def _run(self):
+        pending = []
+        while True:
+            row = self.queue.get()
+            if row is None:
+                break
+            pending.append(row)
+            if len(pending) >= self.chunk_size:
+                self._flush(pending)
+                pending = []
+        self._flush(pending)
+
+# ==========================================
+# Calendar Alignment
+# ==========================================
+# A synthetic bar is only valid where close, high and low all are (a formula
+# leg missing from the feed blanks it). One pass over the panels builds that
+# (time, symbol) mask and the weekly/monthly OHLC of every symbol from one
+# resample of the masked panels; per-symbol bars are then row selections.
+def parse_ffill(text):
+    """'asia=2,europe=1' -> {'asia': 2, 'europe': 1}"""
+    limits = {}
+    for part in [p.strip() for p in text.split(',') if p.strip()]:
+        calendar, _, n = part.partition('=')
+        if calendar.strip() not in CALENDARS:
+            raise ValueError(f"Unknown calendar {calendar.strip()!r} in GODVIEW_FFILL (one of {', '.join(CALENDARS)})")
+        limits[calendar.strip()] = int(n)
+    return limits
+
+def resample_ohlc(close, high, low, rule):
+    return close.resample(rule).last(), high.resample(rule).max(), low.resample(rule).min()
+
+class AlignedBars:
+    """Daily, weekly and monthly bars of every symbol of the (close, high, low) synthetic panels.
+
+    `valid` is the (time, symbol) mask of complete daily bars; bars(symbol)
+    returns what prepare_bars() does for that symbol.
+    """
+    def __init__(self, df_syn, df_high, df_low):
+        self.symbols = list(df_syn.columns)
+        self.col = {s: j for j, s in enumerate(self.symbols)}
+        self.valid = df_syn.notna().to_numpy() & df_high.notna().to_numpy() & df_low.notna().to_numpy()
+        self.daily = (df_syn, df_high, df_low)
+        masked = [f.where(self.valid) for f in self.daily]
+        # Weekly / Monthly Data (monthly needs the long history kept in the local store)
+        self.weekly = resample_ohlc(*masked, 'W-FRI')
+        self.monthly = resample_ohlc(*masked, 'ME')
+
+    def bars(self, symbol):
+        """((close, high, low) daily, weekly, monthly) of one symbol; None when history is too short."""
+        j = self.col[symbol]
+        rows = np.flatnonzero(self.valid[:, j])
+        min_len = min_history_length(symbol)
+        if len(rows) < min_len:
+            print(f"Not enough data for {symbol} (Has {len(rows)}, Need {min_len})")
+            return None
+
+        daily = tuple(f.iloc[rows, j] for f in self.daily)
+        first, last = daily[0].index[0], daily[0].index[-1]
+        resampled = []
+        for panels in (self.weekly, self.monthly):
+            # Bins are labelled by their right edge: from the bin holding the
+            # first bar to the one holding the last, empty bins in between kept
+            a, b = panels[0].index.searchsorted([first, last])
+            resampled.append(tuple(p.iloc[a:b + 1, j] for p in panels))
+        return (daily, *resampled)
+
+    def stack(self, frame='d', symbols=None):
+        """stack_series() of every symbol's `frame` bars ('d', 'w' or 'm'), in one gather.
+
+        Returns ((close, high, low) right-aligned frames, lengths, span).
+        """
+        symbols = self.symbols if symbols is None else list(symbols)
+        cols = np.array([self.col[s] for s in symbols], dtype=int)
+        panels = {'d': self.daily, 'w': self.weekly, 'm': self.monthly}[frame]
+        n_rows = len(panels[0])
+        if frame == 'd':
+            # Each column's valid rows, moved to the bottom in time order
+            valid = self.valid[:, cols]
+            lengths = valid.sum(axis=0)
+            src = np.argsort(valid, axis=0, kind='stable')
+        else:
+            # First to last non-empty bin, empty bins in between kept (as bars() does)
+            has = ~np.isnan(panels[0].to_numpy()[:, cols])
+            any_ = has.any(axis=0)
+            first = np.where(any_, has.argmax(axis=0), 0)
+            last = np.where(any_, n_rows - 1 - has[::-1].argmax(axis=0), -1)
+            lengths = last - first + 1
+            src = np.clip(last[None, :] - np.arange(n_rows)[::-1, None], 0, None)
+        n = int(lengths.max()) if len(cols) else 0
+        src = src[n_rows - n:]
+        span = np.arange(n)[:, None] >= (n - lengths)[None, :]
+        stacked = []
+        for p in panels:
+            values = np.take_along_axis(p.to_numpy(dtype=float)[:, cols], src, axis=0)
+            values[~span] = np.nan
+            stacked.append(pd.DataFrame(values, columns=symbols, copy=False))
+        return tuple(stacked), lengths, span
+
+# ==========================================
+# Per-Symbol Pipeline
+# ==========================================
+# Dynamic minimum length check
+# Commodities and Emerging currencies might have shorter history in Yahoo
+SHORT_HISTORY_SYMBOLS = ['XAU', 'XAG', 'XCU', 'ZAR', 'KRW', 'BRL',
+                         'CN50', 'HK50', 'SG30', 'ASX200', 'CA60', 'NL25', 'FRA40', 'GER40',
+                         'EUSTX50', 'IT40', 'SWI20', 'UK100', 'SPX500', 'NDQ100', 'US2000', 'US30', 'JPN225']
+
+def min_history_length(symbol):
+    """Daily bars a symbol needs before it gets a snapshot."""
+    return 50 if symbol in SHORT_HISTORY_SYMBOLS else 200
+
+def prepare_bars(symbol, s_close, s_high, s_low):
+    """Align a symbol's daily bars and resample them to weekly/monthly; None when history is too short."""
+    frames = [s.to_frame(symbol) for s in (s_close, s_high, s_low)]
+    return AlignedBars(*frames).bars(symbol)
+
+def get_indicator_context(key, batch_ind, close, high, low, store_dir=None):
+    """Resumed from the state saved under `store_dir`, else the batch kernels' context, else computed lazily."""
+    ind = calc_indicator_tails(key, close, high, low, store_dir)
+    if ind is None: ind = batch_ind
+    if ind is None: ind = IndicatorContext(close, high, low, tail_only=True)
+    return ind
+
+def calc_symbol_payload(symbol, bars, batch_d, batch_w, batch_m, last_update, store_dir=None):
+    """V24D trend and First Wave signals of one symbol, as the snapshot payload.
+
+    store_dir: local store whose saved indicator state is resumed and advanced (None: stateless).
+    """
+    (s_close, s_high, s_low), (w_close, w_high, w_low), (m_close, m_high, m_low) = bars
+    print(f"Processing {symbol}...")
+
+    # One indicator context per timeframe, shared by V24D and First Wave
+    def get_context(key, batch, close, high, low):
+        return get_indicator_context(key, batch.get(symbol), close, high, low, store_dir)
+
+    ind_d = get_context(f"{symbol}_d", batch_d, s_close, s_high, s_low)
+
+    # EMA Slopes (Daily) for all three periods: short(20), mid(50), long(90)
+    ema_d_short, ema_d_mid, ema_d_long = ind_d['ema_slope_grid'].T.tolist()
+
+    # V24D Filters (Daily)
+    rsi_l, rsi_s = calc_rsi_votes(s_close, 3, ind_d)
+    macd_l, macd_s = calc_macd_signal(s_close, ind_d)
+    adx_l, adx_s = calc_adx_signal(s_high, s_low, s_close, 14, ind_d)
+
+    # Weekly Data
+    if len(w_close) < 90:
+         ema_w_short = [0, 0, 0, 0]
+         ema_w_mid = [0, 0, 0, 0]
+         ema_w_long = [0, 0, 0, 0]
+         wrsi_l=False; wrsi_s=False; wmacd_l=False; wmacd_s=False; wadx_l=False; wadx_s=False
+         # Wave 1 Weekly - defaults when insufficient data
+         fw_wrsi_l=False; fw_wrsi_s=False
+         fw_wmacd_l=False; fw_wmacd_s=False; fw_wmacd_w=False
+         fw_wadx_l=False; fw_wadx_s=False; fw_wadx_b=False; fw_wadx_w=False
+    else:
+         ind_w = get_context(f"{symbol}_w", batch_w, w_close, w_high, w_low)
+         ema_w_short, ema_w_mid, ema_w_long = ind_w['ema_slope_grid'].T.tolist()
+
+         wrsi_l, wrsi_s = calc_rsi_votes(w_close, 3, ind_w)
+         wmacd_l, wmacd_s = calc_macd_signal(w_close, ind_w)
+         wadx_l, wadx_s = calc_adx_signal(w_high, w_low, w_close, 14, ind_w)
+
+         # Wave 1 Weekly signals
+         fw_wrsi_l, fw_wrsi_s, fw_wmacd_l, fw_wmacd_s, fw_wmacd_w, fw_wadx_l, fw_wadx_s, fw_wadx_b, fw_wadx_w = calc_fw_week_signals(w_close, w_high, w_low, ind_w)
+
+    # Monthly Data
+    if len(m_close) < 90:
+         ema_m_short = [0, 0, 0, 0]
+         ema_m_mid = [0, 0, 0, 0]
+         ema_m_long = [0, 0, 0, 0]
+         mrsi_l=False; mrsi_s=False; mmacd_l=False; mmacd_s=False; madx_l=False; madx_s=False
+    else:
+         ind_m = get_context(f"{symbol}_m", batch_m, m_close, m_high, m_low)
+         ema_m_short, ema_m_mid, ema_m_long = ind_m['ema_slope_grid'].T.tolist()
+
+         mrsi_l, mrsi_s = calc_rsi_votes(m_close, 3, ind_m)
+         mmacd_l, mmacd_s = calc_macd_signal(m_close, ind_m)
+         madx_l, madx_s = calc_adx_signal(m_high, m_low, m_close, 14, ind_m)
+
+    # Aggregation Logic (Trend Following), see rules.TREND
+    trend_status = int(rules.combine_votes((rsi_l, rsi_s, macd_l, macd_s, adx_l, adx_s),
+                                           (wrsi_l, wrsi_s, wmacd_l, wmacd_s, wadx_l, wadx_s)))
+
+    # Wave 1 (First Wave) Aggregation
+    fw_status, fw_rsi_d, fw_rsi_w, fw_macd_d, fw_macd_w, fw_adx_d, fw_adx_w = calc_fw_aggregation(
+        s_close, s_high, s_low,
+        fw_wrsi_l, fw_wrsi_s,
+        fw_wmacd_l, fw_wmacd_s, fw_wmacd_w,
+        fw_wadx_l, fw_wadx_s, fw_wadx_b, fw_wadx_w,
+        ind_d
+    )
+
+    payload = {
+        "symbol": symbol,
+        "last_update": last_update, # Explicit UTC timestamp in payload
+        "trend_status": trend_status,
+        "fw_status": fw_status,
+        "ema_slopes": {
+            "short": {"d": ema_d_short, "w": ema_w_short, "m": ema_m_short},
+            "mid": {"d": ema_d_mid, "w": ema_w_mid, "m": ema_m_mid},
+            "long": {"d": ema_d_long, "w": ema_w_long, "m": ema_m_long}
+        },
+        "signals": {
+            "rsi": {"d": [rsi_l, rsi_s], "w": [wrsi_l, wrsi_s], "m": [mrsi_l, mrsi_s]},
+            "macd": {"d": [macd_l, macd_s], "w": [wmacd_l, wmacd_s], "m": [mmacd_l, mmacd_s]},
+            "adx": {"d": [adx_l, adx_s], "w": [wadx_l, wadx_s], "m": [madx_l, madx_s]}
+        },
+        "fw_signals": {
+            "rsi": {"d": fw_rsi_d, "w": fw_rsi_w},
+            "macd": {"d": fw_macd_d, "w": fw_macd_w},
+            "adx": {"d": fw_adx_d, "w": fw_adx_w}
+        }
+    }
+
+    return payload
+
+def process_symbols(df_syn, df_high, df_low, symbols, last_update, intraday=None, store_dir=None):
+    """Yield (symbol, payload) for `symbols` in order, skipping those with too little history.
+
+    intraday: optional {frame: (close, high, low) panels} from calc_intraday_frames().
+    store_dir: local store holding the incremental indicator state (see calc_indicator_tails).
+    """
+    symbols = list(symbols)
+    aligned = AlignedBars(df_syn[symbols], df_high[symbols], df_low[symbols])
+    bars = {}
+    for symbol in symbols:
+        b = aligned.bars(symbol)
+        if b is not None:
+            bars[symbol] = b
+    frame_bars = {frame: {sym: prepare_frame_bars(panels, sym) for sym in bars}
+                  for frame, panels in (intraday or {}).items()}
+
+    # Batched indicators are only needed when there is no saved incremental state
+    batch_d, batch_w, batch_m = {}, {}, {}
+    batch_i = {frame: {} for frame in frame_bars}
+    if not store_dir:
+        batch_d = calc_panel_indicators({sym: b[0] for sym, b in bars.items()}, tail_only=True)
+        batch_w = calc_panel_indicators({sym: b[1] for sym, b in bars.items() if len(b[1][0]) >= 90}, tail_only=True)
+        batch_m = calc_panel_indicators({sym: b[2] for sym, b in bars.items() if len(b[2][0]) >= 90}, tail_only=True)
+        batch_i = {frame: calc_panel_indicators({sym: b for sym, b in fb.items() if len(b[0]) >= 90}, tail_only=True)
+                   for frame, fb in frame_bars.items()}
+
+    for symbol, b in bars.items():
+        payload = calc_symbol_payload(symbol, b, batch_d, batch_w, batch_m, last_update, store_dir)
+        for frame, fb in frame_bars.items():
+            add_frame_signals(payload, symbol, frame, fb[symbol], batch_i[frame], store_dir)
+        yield symbol, payload
+
+# ==========================================
+# Intraday Frames
+# ==========================================
+def fetch_hourly_data():
+    """Hourly OHLC of every ticker, in one request."""
+    print(f"Fetching hourly data ({providers.PROVIDERS})...")
+    tickers = list(SYMBOLS_MAP.values())
+    return providers.download(tickers, period=INTRADAY_PERIOD, interval="1h")
+
+def resample_panel(df_syn, df_high, df_low, rule):
+    """Close/High/Low panels aggregated to `rule` bars for all symbols at once; empty bars dropped."""
+    close = df_syn.resample(rule).last()
+    high = df_high.resample(rule).max()
+    low = df_low.resample(rule).min()
+    keep = close.notna().any(axis=1).to_numpy()
+    return close[keep], high[keep], low[keep]
+
+def calc_intraday_frames(h_syn, h_high, h_low):
+    """{frame: (close, high, low)} for every INTRADAY_FRAMES rule of the hourly synthetic panels."""
+    return {frame: resample_panel(h_syn, h_high, h_low, rule) for frame, rule in INTRADAY_FRAMES.items()}
+
+def trading_days(index):
+    """Tz-naive UTC date of each timestamp, like yf.download's daily index.
+
+    Weekend hours (the Sunday-evening FX open, late Friday prints) fold into
+    the adjacent weekday instead of making days of their own.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    day = index.normalize()
+    dow = day.dayofweek
+    return day + pd.to_timedelta(np.where(dow == 6, 1, np.where(dow == 5, -1, 0)), unit='D')
+
+def hourly_to_daily(h_syn, h_high, h_low):
+    """Daily synthetic panels from the hourly ones (see trading_days)."""
+    day = trading_days(h_syn.index)
+    close = h_syn.groupby(day).last()
+    high = h_high.groupby(day).max()
+    low = h_low.groupby(day).min()
+    keep = close.notna().any(axis=1).to_numpy()
+    return close[keep], high[keep], low[keep]
+
+def prepare_frame_bars(panels, symbol):
+    """One symbol's aligned (close, high, low) bars of an intraday frame, the last INTRADAY_BARS of them."""
+    close, high, low = (p[symbol] for p in panels)
+    rows = np.flatnonzero((close.notna() & high.notna() & low.notna()).to_numpy())[-INTRADAY_BARS:]
+    return close.iloc[rows], high.iloc[rows], low.iloc[rows]
+
+def add_frame_signals(payload, symbol, frame, bars, batch, store_dir=None):
+    """Add one intraday frame's EMA slopes and V24D votes to a snapshot payload, under the frame key."""
+    close, high, low = bars
+    if len(close) < 90:
+        slopes = [[0, 0, 0, 0]] * 3
+        votes = [(False, False)] * 3
+    else:
+        ind = get_indicator_context(f"{symbol}_{frame}", batch.get(symbol), close, high, low, store_dir)
+        slopes = ind['ema_slope_grid'].T.tolist()
+        votes = [calc_rsi_votes(close, 3, ind), calc_macd_signal(close, ind), calc_adx_signal(high, low, close, 14, ind)]
+    for period, s in zip(('short', 'mid', 'long'), slopes):
+        payload['ema_slopes'][period][frame] = s
+    for name, (l, sh) in zip(('rsi', 'macd', 'adx'), votes):
+        payload['signals'][name][frame] = [l, sh]
+
+# ==========================================
+# Process Pool
+# ==========================================
+# Workers memory-map the synthetic (field, time, symbol) panel from a .npy
+# file written once by the parent, instead of receiving pickled DataFrames.
+# Everything else they need comes through initargs, never from module
+# globals the parent may have changed (spawn/forkserver workers re-import).
+_worker_panel = None
+_worker_intraday = None
+_worker_store_dir = None
+
+def _load_panel(path, index, symbols):
+    panel = np.load(path, mmap_mode='r')
+    return [pd.DataFrame(panel[i], index=index, columns=symbols, copy=False) for i in range(len(panel))]
+
+def _save_panel(path, frames, symbols):
+    np.save(path, np.stack([f[symbols].to_numpy(dtype=float) for f in frames]))
+
+def _init_worker(path, index, symbols, intraday=None, store_dir=None):
+    global _worker_panel, _worker_intraday, _worker_store_dir
+    _worker_panel = _load_panel(path, index, symbols)
+    _worker_intraday = {frame: _load_panel(p, idx, symbols) for frame, (p, idx) in (intraday or {}).items()}
+    _worker_store_dir = store_dir
+
+def _run_worker(symbols, last_update):
+    df_syn, df_high, df_low = _worker_panel
+    return list(process_symbols(df_syn, df_high, df_low, symbols, last_update, _worker_intraday, _worker_store_dir))
+
+def process_symbols_parallel(df_syn, df_high, df_low, workers, last_update, intraday=None, store_dir=None):
+    """process_symbols() over a process pool; yields in the same order as the serial run."""
+    symbols = list(df_syn.columns)
+    # A few contiguous chunks per worker: enough to balance, and concatenating
+    # the chunk results in submission order restores the serial order
+    n_chunks = min(len(symbols), workers * 4)
+    chunks = [list(c) for c in np.array_split(np.array(symbols, dtype=object), n_chunks) if len(c)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'panel.npy')
+        _save_panel(path, (df_syn, df_high, df_low), symbols)
+        frame_paths = {}
+        for frame, panels in (intraday or {}).items():
+            frame_paths[frame] = (os.path.join(tmp, f'panel_{frame}.npy'), panels[0].index)
+            _save_panel(frame_paths[frame][0], panels, symbols)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(path, df_syn.index, symbols, frame_paths, store_dir)) as pool:
+            for part in pool.map(_run_worker, chunks, [last_update] * len(chunks)):
+                yield from part
+
+# ==========================================
+# Run Instrumentation
+# ==========================================
+def peak_rss_bytes():
+    """Peak resident set size of this process and of its finished children (workers)."""
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) * scale
 
+class RunMetrics:
+    """Wall/CPU time per stage and data freshness of one engine run."""
+    def __init__(self):
+        self.started = datetime.utcnow()
+        self.stages = {}
+        self.tickers = {}
+        self.symbols = 0
+        self.skipped = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # os.times() includes reaped children, so --workers CPU time is counted too
+        wall, cpu = time.perf_counter(), sum(os.times()[:4])
+        try:
+            yield
+        finally:
+            self.stages[name] = {'wall': time.perf_counter() - wall, 'cpu': sum(os.times()[:4]) - cpu}
+
+    def record_tickers(self, data):
+        """Last-bar date and NaN ratio of every ticker's Close (frame or PricePanel; missing tickers are all NaN)."""
+        close = data.frame('Close') if isinstance(data, PricePanel) else data['Close']
+        valid = close.notna()
+        last = valid.iloc[::-1].idxmax().where(valid.any())
+        nan_ratio = 1.0 - valid.mean()
+        for ticker in close.columns:
+            self.tickers[ticker] = {
+                'last_bar': None if pd.isna(last[ticker]) else pd.Timestamp(last[ticker]).isoformat(),
+                'nan_ratio': float(nan_ratio[ticker]),
+            }
+
+    def summary(self):
+        return {
+            'started_at': self.started.isoformat() + "Z",
+            'stages': self.stages,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'symbols': self.symbols,
+            'skipped': len(self.skipped),
+            'skipped_symbols': self.skipped,
+            'tickers': self.tickers,
+        }
+
+def prometheus_lines(summary):
+    """Prometheus text exposition of a run summary (for node_exporter's textfile collector)."""
+    lines = [
+        '# TYPE godview_run_timestamp_seconds gauge',
+        f"godview_run_timestamp_seconds {pd.Timestamp(summary['started_at']).timestamp():.0f}",
+        '# TYPE godview_stage_wall_seconds gauge',
+    ]
+    lines += [f'godview_stage_wall_seconds{{stage="{k}"}} {v["wall"]:.6f}' for k, v in summary['stages'].items()]
+    lines.append('# TYPE godview_stage_cpu_seconds gauge')
+    lines += [f'godview_stage_cpu_seconds{{stage="{k}"}} {v["cpu"]:.6f}' for k, v in summary['stages'].items()]
+    if summary['peak_rss_bytes'] is not None:
+        lines += ['# TYPE godview_peak_rss_bytes gauge', f"godview_peak_rss_bytes {summary['peak_rss_bytes']}"]
+    lines += [
+        '# TYPE godview_symbols_computed gauge', f"godview_symbols_computed {summary['symbols']}",
+        '# TYPE godview_symbols_skipped gauge', f"godview_symbols_skipped {summary['skipped']}",
+        '# TYPE godview_ticker_last_bar_timestamp_seconds gauge',
+    ]
+    lines += [f'godview_ticker_last_bar_timestamp_seconds{{ticker="{t}"}} {pd.Timestamp(v["last_bar"]).timestamp():.0f}'
+              for t, v in summary['tickers'].items() if v['last_bar'] is not None]
+    lines.append('# TYPE godview_ticker_nan_ratio gauge')
+    lines += [f'godview_ticker_nan_ratio{{ticker="{t}"}} {v["nan_ratio"]:.6f}' for t, v in summary['tickers'].items()]
+    return lines
+
+def write_run_metrics(metrics_dir, summary):
+    """Append the summary to godview_runs.jsonl and atomically replace godview.prom."""
+    os.makedirs(metrics_dir, exist_ok=True)
+    with open(os.path.join(metrics_dir, 'godview_runs.jsonl'), 'a') as f:
+        f.write(json.dumps(summary, default=str) + "\n")
+    tmp = os.path.join(metrics_dir, 'godview.prom.tmp')
+    with open(tmp, 'w') as f:
+        f.write("\n".join(prometheus_lines(summary)) + "\n")
+    os.replace(tmp, os.path.join(metrics_dir, 'godview.prom'))
+
+def push_run_summary(client, summary):
+    """Upsert the run summary row; a failure is reported but never fails the run."""
+    row = {'run_id': summary['started_at'], 'started_at': summary['started_at'], 'data': clean_nan(summary)}
+    try:
+        upsert_rows(client, [row], table=RUNS_TABLE)
+    except Exception as e:
+        print(f"Warning: could not record run summary in {RUNS_TABLE} ({e}).")
 
 # ==========================================
 # Main Execution
 # ==========================================
-def main():
-    print("Fetching data from Yahoo Finance...")
+# Subcommands (no subcommand = the full run the cron job does):
+#
+#   python godview.py                                   # fetch -> compute -> push
+#   python godview.py fetch                             # update the local store only
+#   python godview.py compute --out results.json        # from the store, no network
+#   python godview.py push results.json                 # upsert a saved result file
+#   python godview.py snapshot --as-of 2024-06-28       # payloads as of a past close
+#
+# supabase and yfinance are only imported by the steps that talk to them.
+
+def get_client():
+    """Supabase client when credentials are set, else None."""
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        return None
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def fetch_raw_data(store_dir=STORE_DIR):
+    """Daily OHLC of every ticker: from the local store when given, else 2y from the data providers."""
+    print(f"Fetching data ({providers.PROVIDERS})...")
     tickers = list(SYMBOLS_MAP.values())
-    raw_data = yf.download(tickers, period="2y", interval="1d", progress=False)
+    if store_dir:
+        written = store.update_store(store_dir, tickers, download=providers.download)
+        print(f"Store: {sum(written.values())} bars written for {len(written)} tickers.")
+        return store.load_frame(store_dir, tickers)
+    return providers.download(tickers, period="2y", interval="1d")
+
+def compute_results(raw_data, workers=1, last_update=None, store_dir=None):
+    """{symbol: payload} for a daily (field, ticker) frame or PricePanel, without pushing anything.
+
+    store_dir: resume and advance the indicator state saved there (None: recompute from the bars).
+    """
+    df_syn, df_high, df_low = calc_synthetic_ohlc(raw_data)
+    last_update = last_update or datetime.utcnow().isoformat() + "Z"
+    if workers > 1:
+        pipeline = process_symbols_parallel(df_syn, df_high, df_low, workers, last_update, store_dir=store_dir)
+    else:
+        pipeline = process_symbols(df_syn, df_high, df_low, df_syn.columns, last_update, store_dir=store_dir)
+    return dict(pipeline)
+
+def write_results(path, results):
+    """Save payloads as the JSON the dry run prints; '-' or None writes to stdout."""
+    text = json.dumps(results, default=str, indent=2)
+    if path in (None, '-'):
+        print(text)
+        return
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+    print(f"{len(results)} payloads written to {path}")
+
+def run(args):
+    """Fetch, compute and push in one go (the scheduled job)."""
+    metrics = RunMetrics()
+
+    with metrics.stage('download'):
+        hourly = fetch_hourly_data() if args.intraday else None
+        # Without a store the daily bars are derived from the hourly download too
+        raw_data = hourly if hourly is not None and not args.store else fetch_raw_data(args.store)
     
     if 'Close' not in raw_data:
         print("Error: No Close data found.")
         return
+    # Normalized once; everything below reads views of these arrays
+    panel = PricePanel.from_frame(raw_data)
+    h_panel = panel if raw_data is hourly else PricePanel.from_frame(hourly) if hourly is not None else None
+    del raw_data, hourly
+    metrics.record_tickers(panel)
 
     print("Calculating synthetic indices...")
-    df_syn = calc_synthetic_indices(raw_data)
-    
-    def get_col(col_name, ticker):
-        try:
-            if isinstance(raw_data.columns, pd.MultiIndex):
-                return raw_data[col_name][ticker]
-            else:
-                return raw_data[col_name]
-        except KeyError:
-            print(f"Warning: {col_name} Data for {ticker} not found. Returning NaN.")
-            return pd.Series(np.nan, index=raw_data.index)
-
-    def apply_formula(series_getter):
-        aud = series_getter(SYMBOLS_MAP['AUD'])
-        eur = series_getter(SYMBOLS_MAP['EUR'])
-        gbp = series_getter(SYMBOLS_MAP['GBP'])
-        nzd = series_getter(SYMBOLS_MAP['NZD'])
-        cad = series_getter(SYMBOLS_MAP['CAD'])
-        chf = series_getter(SYMBOLS_MAP['CHF'])
-        jpy = series_getter(SYMBOLS_MAP['JPY'])
-        mxn = series_getter(SYMBOLS_MAP['MXN'])
-        sgd = series_getter(SYMBOLS_MAP['SGD'])
-        sek = series_getter(SYMBOLS_MAP['SEK'])
-        nok = series_getter(SYMBOLS_MAP['NOK'])
-        cnh = series_getter(SYMBOLS_MAP['CNH'])
-        myr = series_getter(SYMBOLS_MAP['MYR'])
-        xau = series_getter(SYMBOLS_MAP['XAU'])
-        xag = series_getter(SYMBOLS_MAP['XAG'])
-        xcu = series_getter(SYMBOLS_MAP['XCU'])
-        zar = series_getter(SYMBOLS_MAP['ZAR'])
-        krw = series_getter(SYMBOLS_MAP['KRW'])
-        brl = series_getter(SYMBOLS_MAP['BRL'])
-        usd = series_getter(SYMBOLS_MAP['USD'])
-        # Stock Indices
-        hkd = series_getter(SYMBOLS_MAP['HKD'])
-        cn50_raw = series_getter(SYMBOLS_MAP['CN50'])
-        hk50_raw = series_getter(SYMBOLS_MAP['HK50'])
-        sg30_raw = series_getter(SYMBOLS_MAP['SG30'])
-        asx200_raw = series_getter(SYMBOLS_MAP['ASX200'])
-        ca60_raw = series_getter(SYMBOLS_MAP['CA60'])
-        nl25_raw = series_getter(SYMBOLS_MAP['NL25'])
-        fra40_raw = series_getter(SYMBOLS_MAP['FRA40'])
-        ger40_raw = series_getter(SYMBOLS_MAP['GER40'])
-        eustx50_raw = series_getter(SYMBOLS_MAP['EUSTX50'])
-        it40_raw = series_getter(SYMBOLS_MAP['IT40'])
-        swi20_raw = series_getter(SYMBOLS_MAP['SWI20'])
-        uk100_raw = series_getter(SYMBOLS_MAP['UK100'])
-        spx500_raw = series_getter(SYMBOLS_MAP['SPX500'])
-        ndq100_raw = series_getter(SYMBOLS_MAP['NDQ100'])
-        us2000_raw = series_getter(SYMBOLS_MAP['US2000'])
-        us30_raw = series_getter(SYMBOLS_MAP['US30'])
-        jpn225_raw = series_getter(SYMBOLS_MAP['JPN225'])
-        
-        res = {}
-        # Currency Indices
-        res['AUD'] = aud/0.66047 + (cad*aud)/0.90476 + (aud/eur)/0.61763 + (aud/gbp)/0.53138 + (aud*jpy)/94.23133
-        res['CAD'] = (1/cad)/0.72965 + (1/(cad*aud))/1.1055 + (1/(eur*cad))/0.68211 + (1/(gbp*cad))/0.58657 + (jpy/cad)/104.165
-        res['CHF'] = (1/chf)/1.12406 + (cad/chf)/1.54202 + (1/(eur*chf))/1.05058 + (1/(chf*gbp))/0.90315 + (jpy/chf)/160.83167
-        res['JPY'] = (1/jpy)/0.00703 + (1/(jpy*aud))/0.01063 + (cad/jpy)/0.00963 + (1/(jpy*gbp))/0.00566 + (1/(jpy*eur))/0.00656
-        res['EUR'] = eur/1.06973 + (eur/aud)/1.62021 + (eur*cad)/1.46625 + (eur/gbp)/0.85959 + (eur*jpy)/152.95167
-        res['GBP'] = gbp/1.24401 + (gbp/aud)/1.88737 + (gbp*cad)/1.70749 + (gbp/eur)/1.16423 + (gbp*jpy)/178.228
-        res['USD'] = usd
-        res['NZD'] = nzd/0.60851 + (cad*nzd)/0.83363 + (nzd/eur)/0.56898 + (nzd/gbp)/0.48991 + (jpy*nzd)/86.76033
-        res['SGD'] = (1/sgd)/0.74527 + (cad/sgd)/1.02258 + (1/(eur*sgd))/0.69684 + (1/(sgd*gbp))/0.59898 + (jpy/sgd)/106.60933
-        res['MXN'] = (1/mxn)/0.05273 + (cad/mxn)/0.07218 + (1/(eur*mxn))/0.0492 + (1/(mxn*gbp))/0.04234 + (jpy/mxn)/7.52667
-        res['SEK'] = (1/sek)/0.09512 + (cad/sek)/0.13038 + (1/(eur*sek))/0.08885 + (1/(sek*gbp))/0.07644 + (jpy/sek)/13.58497
-        res['NOK'] = (1/nok)/0.09603 + (cad/nok)/0.13154 + (1/(eur*nok))/0.08968 + (1/(nok*gbp))/0.07723 + (jpy/nok)/13.68007
-        res['CNH'] = (1/cnh)/0.13793 + (eur/cnh)/0.14759 + (gbp/cnh)/0.17159 + (jpy/cnh)/19.72414 + (aud/cnh)/0.09103
-        res['MYR'] = (1/myr)/0.22371 + (eur/myr)/0.23937 + (gbp/myr)/0.27740 + (jpy/myr)/31.99552 + (aud/myr)/0.14765
-        res['XAU'] = xau/4629 + (xau/eur)/3973 + (xau/gbp)/3444 + (xau*jpy)/734159 + (xau/aud)/6929
-        res['XAG'] = xag/85.23 + (xag/eur)/73.16 + (xag/gbp)/63.41 + (xag*jpy)/13517 + (xag/aud)/127.59
-        res['XCU'] = xcu/6.05 + (xcu/eur)/5.19 + (xcu/gbp)/4.50 + (xcu*jpy)/959.5 + (xcu/aud)/9.06
-        res['ZAR'] = (1/zar)/0.06109 + (eur/zar)/0.07116 + (gbp/zar)/0.08210 + (jpy/zar)/9.688 + (aud/zar)/0.04080
-        res['KRW'] = (1/krw)/0.000682 + (eur/krw)/0.000794 + (gbp/krw)/0.000916 + (jpy/krw)/0.10818 + (aud/krw)/0.000455
-        res['BRL'] = (1/brl)/0.1858 + (eur/brl)/0.2165 + (gbp/brl)/0.2498 + (jpy/brl)/29.47 + (aud/brl)/0.1241
-        # Stock Indices
-        res['CN50'] = cn50_raw/13830 + (cn50_raw/eur)/14798 + (cn50_raw/gbp)/17560 + (cn50_raw*jpy)/1977690 + (cn50_raw/aud)/20954
-        res['HK50'] = (hk50_raw/hkd)/2594 + (hk50_raw/hkd/eur)/2776 + (hk50_raw/hkd/gbp)/3294 + (hk50_raw/hkd*jpy)/370922 + (hk50_raw/hkd/aud)/3930
-        res['SG30'] = (sg30_raw/sgd)/296 + (sg30_raw/sgd/eur)/317 + (sg30_raw/sgd/gbp)/376 + (sg30_raw/sgd*jpy)/42328 + (sg30_raw/sgd/aud)/448
-        res['ASX200'] = (asx200_raw*aud)/5511 + (asx200_raw*aud/eur)/5897 + (asx200_raw*aud/gbp)/6999 + (asx200_raw*aud*jpy)/788073 + asx200_raw/8350
-        res['CA60'] = (ca60_raw/cad)/18613 + (ca60_raw/cad/eur)/19916 + (ca60_raw/cad/gbp)/23638 + (ca60_raw/cad*jpy)/2661659 + (ca60_raw/cad/aud)/28201
-        res['NL25'] = (nl25_raw*eur)/984 + nl25_raw/920 + (nl25_raw*eur/gbp)/1250 + (nl25_raw*eur*jpy)/140712 + (nl25_raw*eur/aud)/1491
-        res['FRA40'] = (fra40_raw*eur)/8507 + fra40_raw/7950 + (fra40_raw*eur/gbp)/10804 + (fra40_raw*eur*jpy)/1216499 + (fra40_raw*eur/aud)/12889
-        res['GER40'] = (ger40_raw*eur)/22256 + ger40_raw/20800 + (ger40_raw*eur/gbp)/28265 + (ger40_raw*eur*jpy)/3182608 + (ger40_raw*eur/aud)/33721
-        res['EUSTX50'] = (eustx50_raw*eur)/5511 + eustx50_raw/5150 + (eustx50_raw*eur/gbp)/6999 + (eustx50_raw*eur*jpy)/788073 + (eustx50_raw*eur/aud)/8350
-        res['IT40'] = (it40_raw*eur)/38520 + it40_raw/36000 + (it40_raw*eur/gbp)/48920 + (it40_raw*eur*jpy)/5508360 + (it40_raw*eur/aud)/58364
-        res['SWI20'] = (swi20_raw/chf)/13483 + (swi20_raw/chf/eur)/14427 + (swi20_raw/chf/gbp)/17123 + (swi20_raw/chf*jpy)/1928049 + (swi20_raw/chf/aud)/20428
-        res['UK100'] = (uk100_raw*gbp)/10605 + (uk100_raw*gbp/eur)/11347 + uk100_raw/8350 + (uk100_raw*gbp*jpy)/1516515 + (uk100_raw*gbp/aud)/16068
-        res['SPX500'] = spx500_raw/5950 + (spx500_raw/eur)/6367 + (spx500_raw/gbp)/7557 + (spx500_raw*jpy)/850850 + (spx500_raw/aud)/9015
-        res['NDQ100'] = ndq100_raw/21000 + (ndq100_raw/eur)/22470 + (ndq100_raw/gbp)/26670 + (ndq100_raw*jpy)/3003000 + (ndq100_raw/aud)/31818
-        res['US2000'] = us2000_raw/2250 + (us2000_raw/eur)/2408 + (us2000_raw/gbp)/2858 + (us2000_raw*jpy)/321750 + (us2000_raw/aud)/3409
-        res['US30'] = us30_raw/43000 + (us30_raw/eur)/46010 + (us30_raw/gbp)/54610 + (us30_raw*jpy)/6149000 + (us30_raw/aud)/65152
-        res['JPN225'] = (jpn225_raw/jpy)/269 + (jpn225_raw/jpy/eur)/288 + (jpn225_raw/jpy/gbp)/342 + jpn225_raw/38500 + (jpn225_raw/jpy/aud)/408
-        return pd.DataFrame(res)
-
-    df_high = apply_formula(lambda t: get_col('High', t))
-    df_low = apply_formula(lambda t: get_col('Low', t))
+    with metrics.stage('synthetic'):
+        intraday = None
+        if h_panel is not None:
+            h_panels = calc_synthetic_ohlc(h_panel)
+            intraday = calc_intraday_frames(*h_panels)
+        if panel is h_panel:
+            df_syn, df_high, df_low = hourly_to_daily(*h_panels)
+        else:
+            df_syn, df_high, df_low = calc_synthetic_ohlc(panel)
     
+    # One timestamp for the whole run, so serial and parallel output match byte for byte
+    last_update = datetime.utcnow().isoformat() + "Z"
+
+    # Rows go out while later symbols are still computing when pipelining is on
+    client = get_client()
+    pusher = SnapshotPusher(client) if client is not None and PUSH_PIPELINE else None
+
     results = {}
-    
-    for symbol in df_syn.columns:
-        print(f"Processing {symbol}...")
-        
-        s_close = df_syn[symbol].dropna()
-        s_high = df_high[symbol].dropna()
-        s_low = df_low[symbol].dropna()
-        
-        idx = s_close.index.intersection(s_high.index).intersection(s_low.index)
-        s_close = s_close.loc[idx]
-        s_high = s_high.loc[idx]
-        s_low = s_low.loc[idx]
-        
-        # Dynamic minimum length check
-        # Commodities and Emerging currencies might have shorter history in Yahoo
-        min_len = 200
-        if symbol in ['XAU', 'XAG', 'XCU', 'ZAR', 'KRW', 'BRL',
-                       'CN50', 'HK50', 'SG30', 'ASX200', 'CA60', 'NL25', 'FRA40', 'GER40',
-                       'EUSTX50', 'IT40', 'SWI20', 'UK100', 'SPX500', 'NDQ100', 'US2000', 'US30', 'JPN225']:
-            min_len = 50
-
-        if len(s_close) < min_len:
-            print(f"Not enough data for {symbol} (Has {len(s_close)}, Need {min_len})")
-            continue
-
-        # EMA Slopes (Daily) - Calculate for all three periods: short(20), mid(50), long(90)
-        def calc_slopes_for_period(close_series, slope_len):
-            return [
-                calc_sma_slope_v2(calc_ema(close_series, 20), slope_len).iloc[-1],
-                calc_sma_slope_v2(calc_ema(close_series, 50), slope_len).iloc[-1],
-                calc_sma_slope_v2(calc_ema(close_series, 100), slope_len).iloc[-1],
-                calc_sma_slope_v2(calc_ema(close_series, 200), slope_len).iloc[-1],
-            ]
-        
-        # Daily slopes for each period
-        ema_d_short = calc_slopes_for_period(s_close, 20)
-        ema_d_mid = calc_slopes_for_period(s_close, 50)
-        ema_d_long = calc_slopes_for_period(s_close, 90)
-        
-        # V24D Filters (Daily)
-        rsi_l, rsi_s = calc_rsi_votes(s_close, 3)
-        macd_l, macd_s = calc_macd_signal(s_close)
-        adx_l, adx_s = calc_adx_signal(s_high, s_low, s_close, 14)
-        
-        # Weekly Data
-        w_close = s_close.resample('W-FRI').last()
-        w_high = s_high.resample('W-FRI').max()
-        w_low = s_low.resample('W-FRI').min()
-        
-        if len(w_close) < 90:
-             ema_w_short = [0, 0, 0, 0]
-             ema_w_mid = [0, 0, 0, 0]
-             ema_w_long = [0, 0, 0, 0]
-             wrsi_l=False; wrsi_s=False; wmacd_l=False; wmacd_s=False; wadx_l=False; wadx_s=False
-             # Wave 1 Weekly - defaults when insufficient data
-             fw_wrsi_l=False; fw_wrsi_s=False
-             fw_wmacd_l=False; fw_wmacd_s=False; fw_wmacd_w=False
-             fw_wadx_l=False; fw_wadx_s=False; fw_wadx_b=False; fw_wadx_w=False
+    with metrics.stage('indicators'):
+        if args.workers > 1:
+            print(f"Processing {len(df_syn.columns)} symbols on {args.workers} workers...")
+            pipeline = process_symbols_parallel(df_syn, df_high, df_low, args.workers, last_update, intraday, args.store)
         else:
-             ema_w_short = calc_slopes_for_period(w_close, 20)
-             ema_w_mid = calc_slopes_for_period(w_close, 50)
-             ema_w_long = calc_slopes_for_period(w_close, 90)
-             
-             wrsi_l, wrsi_s = calc_rsi_votes(w_close, 3)
-             wmacd_l, wmacd_s = calc_macd_signal(w_close)
-             wadx_l, wadx_s = calc_adx_signal(w_high, w_low, w_close, 14)
-             
-             # Wave 1 Weekly signals
-             fw_wrsi_l, fw_wrsi_s, fw_wmacd_l, fw_wmacd_s, fw_wmacd_w, fw_wadx_l, fw_wadx_s, fw_wadx_b, fw_wadx_w = calc_fw_week_signals(w_close, w_high, w_low)
+            pipeline = process_symbols(df_syn, df_high, df_low, df_syn.columns, last_update, intraday, args.store)
 
-        # Monthly Data - removed from UI due to insufficient Yahoo Finance data
+        for symbol, payload in pipeline:
+            results[symbol] = payload
+            if pusher is not None:
+                pusher.put(symbol, payload)
+    metrics.symbols = len(results)
+    metrics.skipped = [s for s in df_syn.columns if s not in results]
 
-        # Aggregation Logic (Trend Following)
-        rsi_gen_long = rsi_l and wrsi_l and not rsi_s and not wrsi_s
-        rsi_gen_short = rsi_s and wrsi_s and not rsi_l and not wrsi_l
-        rsi_gen_wait = not rsi_l and not rsi_s and not wrsi_l and not wrsi_s
-        rsi_gen_both = not rsi_gen_long and not rsi_gen_short and not rsi_gen_wait
-        
-        macd_gen_long = macd_l and wmacd_l and not macd_s and not wmacd_s
-        macd_gen_short = macd_s and wmacd_s and not macd_l and not wmacd_l
-        macd_gen_both = not macd_gen_long and not macd_gen_short
-        
-        adx_gen_long = adx_l and wadx_l and not adx_s and not wadx_s
-        adx_gen_short = adx_s and wadx_s and not adx_l and not wadx_l
-        adx_gen_both = not adx_gen_long and not adx_gen_short
-        
-        trend_long = False
-        trend_short = False
-        
-        if not rsi_gen_wait:
-            long_votes = (1 if rsi_gen_long else 0) + (1 if macd_gen_long else 0) + (1 if adx_gen_long else 0)
-            short_votes = (1 if rsi_gen_short else 0) + (1 if macd_gen_short else 0) + (1 if adx_gen_short else 0)
-            both_votes = (1 if rsi_gen_both else 0) + (1 if macd_gen_both else 0) + (1 if adx_gen_both else 0)
-            
-            if long_votes > 0 and short_votes > 0:
-                pass 
-            else:
-                 if long_votes == 3 or (long_votes==2 and both_votes==1) or (long_votes==1 and both_votes==2) or both_votes==3:
-                     trend_long = True
-                 if short_votes == 3 or (short_votes==2 and both_votes==1) or (short_votes==1 and both_votes==2) or both_votes==3:
-                     trend_short = True
-        
-        trend_status = 0
-        if trend_long and trend_short: trend_status = 2
-        elif trend_long: trend_status = 1
-        elif trend_short: trend_status = -1
-        
-        # Wave 1 (First Wave) Aggregation
-        fw_status, fw_rsi_d, fw_rsi_w, fw_macd_d, fw_macd_w, fw_adx_d, fw_adx_w = calc_fw_aggregation(
-            s_close, s_high, s_low,
-            fw_wrsi_l, fw_wrsi_s,
-            fw_wmacd_l, fw_wmacd_s, fw_wmacd_w,
-            fw_wadx_l, fw_wadx_s, fw_wadx_b, fw_wadx_w
-        )
-        
-        payload = {
-            "symbol": symbol,
-            "last_update": datetime.utcnow().isoformat() + "Z", # Explicit UTC timestamp in payload
-            "trend_status": trend_status,
-            "fw_status": fw_status,
-            "ema_slopes": {
-                "short": {"d": ema_d_short, "w": ema_w_short},
-                "mid": {"d": ema_d_mid, "w": ema_w_mid},
-                "long": {"d": ema_d_long, "w": ema_w_long}
-            },
-            "signals": {
-                "rsi": {"d": [rsi_l, rsi_s], "w": [wrsi_l, wrsi_s]},
-                "macd": {"d": [macd_l, macd_s], "w": [wmacd_l, wmacd_s]},
-                "adx": {"d": [adx_l, adx_s], "w": [wadx_l, wadx_s]}
-            },
-            "fw_signals": {
-                "rsi": {"d": fw_rsi_d, "w": fw_rsi_w},
-                "macd": {"d": fw_macd_d, "w": fw_macd_w},
-                "adx": {"d": fw_adx_d, "w": fw_adx_w}
-            }
-        }
-        
-        results[symbol] = payload
+    matrix = None
+    if args.matrix:
+        with metrics.stage('matrix'):
+            matrix = correlation.calc_matrix_snapshot(df_syn, last_update=last_update, store_dir=args.store)
+
+    pair_matrix = None
+    if args.pairs:
+        import pairs
+        with metrics.stage('pairs'):
+            pair_matrix = pairs.calc_pair_matrix(df_syn, df_high, df_low, last_update=last_update)
+        print(f"Pair matrix: {pair_matrix['pairs']} pairs of {len(pair_matrix['symbols'])} indices.")
 
     # JSON Push
-    if SUPABASE_URL and SUPABASE_KEY:
-        print("Pushing to Supabase...")
-        sb = create_client(SUPABASE_URL, SUPABASE_KEY)
-        for sym, data in results.items():
-            def clean_nan(obj):
-                if isinstance(obj, float):
-                    if np.isnan(obj) or np.isinf(obj): return 0.0
-                    return obj
-                if isinstance(obj, dict):
-                    return {k: clean_nan(v) for k,v in obj.items()}
-                if isinstance(obj, list):
-                    return [clean_nan(i) for i in obj]
-                return obj
-
-            clean_data = clean_nan(data)
-            sb.table('godview_snapshot').upsert({
-                'symbol': sym, 
-                'data': clean_data,
-                'updated_at': datetime.utcnow().isoformat() + "Z" # Explicit UTC for SQL column
-            }).execute()
-        print("Done.")
+    with metrics.stage('push'):
+        if pusher is not None:
+            print("Finishing Supabase push...")
+            n = pusher.close()
+            print(f"Done. {n} rows upserted.")
+        elif client is not None:
+            print("Pushing to Supabase...")
+            n = push_snapshots(client, results)
+            print(f"Done. {n} rows upserted.")
+        if client is not None:
+            version = publish_aggregate(client, results)
+            if version is not None:
+                print(f"Aggregate snapshot at version {version}.")
+            if matrix is not None:
+                push_document(client, correlation.MATRIX_TABLE, matrix)
+            if pair_matrix is not None:
+                push_document(client, pairs.PAIRS_TABLE, pair_matrix)
+        else:
+            print("No Supabase Credentials found. Dumping JSON.")
+            print(json.dumps(results, default=str, indent=2))
+
+    summary = metrics.summary()
+    if METRICS_DIR:
+        write_run_metrics(METRICS_DIR, summary)
+    if client is not None:
+        push_run_summary(client, summary)
+    stages = ', '.join(f"{k} {v['wall']:.1f}s" for k, v in summary['stages'].items())
+    print(f"Run: {stages} | {summary['symbols']} symbols, {summary['skipped']} skipped")
+
+def fetch(args):
+    """Bring the local store up to date; nothing is computed."""
+    if not args.store:
+        print("Error: fetch needs a store (--store or GODVIEW_STORE_DIR).")
+        return 1
+    fetch_raw_data(args.store)
+
+def compute(args):
+    """Payloads from the stored bars only; no network, no push."""
+    if not args.store:
+        print("Error: compute needs a store (--store or GODVIEW_STORE_DIR).")
+        return 1
+    raw_data = store.load_frame(args.store, list(SYMBOLS_MAP.values()))
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return 1
+    t0 = time.perf_counter()
+    results = compute_results(raw_data, args.workers, store_dir=args.store)
+    print(f"Computed {len(results)} symbols in {time.perf_counter() - t0:.1f}s.", file=sys.stderr)
+    write_results(args.out, results)
+
+def push(args):
+    """Upsert a result file written by compute/snapshot."""
+    client = get_client()
+    if client is None:
+        print("Error: push needs SUPABASE_URL and SUPABASE_KEY.")
+        return 1
+    with open(args.results) as f:
+        results = json.load(f)
+    print(f"Pushing {len(results)} payloads from {args.results}...")
+    n = push_snapshots(client, results)
+    print(f"Done. {n} rows upserted.")
+    version = publish_aggregate(client, results)
+    if version is not None:
+        print(f"Aggregate snapshot at version {version}.")
+
+def snapshot(args):
+    """Payloads as the engine would have computed them after the close of --as-of."""
+    as_of = pd.Timestamp(args.as_of)
+    tickers = list(SYMBOLS_MAP.values())
+    if args.store:
+        raw_data = store.load_frame(args.store, tickers)
     else:
-        print("No Supabase Credentials found. Dumping JSON.")
-        print(json.dumps(results, default=str, indent=2))
+        # Same two-year window the live run downloads
+        start = as_of - pd.DateOffset(years=2)
+        raw_data = providers.download(tickers, start=start.strftime("%Y-%m-%d"), interval="1d")
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return 1
+    raw_data = raw_data[raw_data.index <= as_of]
+    # The saved incremental state belongs to the latest bar, so no store_dir: recompute from the cut bars
+    results = compute_results(raw_data, args.workers, as_of.strftime("%Y-%m-%dT%H:%M:%S") + "Z")
+    write_results(args.out, results)
+
+def main(argv=None):
+    # Options shared by the subcommands; SUPPRESS keeps the top-level values
+    # when an option is not repeated after the subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=argparse.SUPPRESS,
+                        help="process pool size for the per-symbol pipeline (1 = serial)")
+    common.add_argument('--store', default=argparse.SUPPRESS, help="local OHLC store (default: GODVIEW_STORE_DIR)")
+
+    parser = argparse.ArgumentParser(description="GodView signal engine")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="process pool size for the per-symbol pipeline (1 = serial)")
+    parser.add_argument('--store', default=STORE_DIR, help="local OHLC store (default: GODVIEW_STORE_DIR)")
+    parser.add_argument('--intraday', action='store_true', default=INTRADAY,
+                        help="add 1H/2H/4H signals, from one hourly download")
+    parser.add_argument('--matrix', action='store_true', default=MATRIX,
+                        help="also publish the correlation matrix and strength ranks (correlation.py)")
+    parser.add_argument('--pairs', action='store_true', default=PAIRS,
+                        help="also publish the V24D/First Wave matrix of every index pair (pairs.py)")
+    parser.set_defaults(func=run)
+    sub = parser.add_subparsers(dest='command')
+
+    sub.add_parser('fetch', parents=[common], help="update the local store").set_defaults(func=fetch)
+    p = sub.add_parser('compute', parents=[common], help="compute payloads from the store")
+    p.add_argument('--out', help="result file (default: stdout)")
+    p.set_defaults(func=compute)
+    p = sub.add_parser('push', parents=[common], help="upsert a saved result file")
+    p.add_argument('results')
+    p.set_defaults(func=push)
+    p = sub.add_parser('snapshot', parents=[common], help="payloads as of a past date")
+    p.add_argument('--as-of', required=True, help="last daily bar to include (YYYY-MM-DD)")
+    p.add_argument('--out', help="result file (default: stdout)")
+    p.set_defaults(func=snapshot)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
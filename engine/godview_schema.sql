@@ -22,3 +22,158 @@ for all
 to service_role
 using (true)
 with check (true);
+
+-- Every snapshot payload in one columnar row (engine make_aggregate).
+-- Dashboards poll `version` and fetch `data` only when it changed;
+-- `checked_at` moves on every publish, so an unchanged version still shows
+-- the engine is alive.
+create table if not exists public.godview_aggregate (
+    id text primary key,
+    version bigint not null,
+    hash text not null,
+    updated_at timestamptz default now(),
+    checked_at timestamptz default now(),
+    data jsonb not null
+);
+
+alter table public.godview_aggregate add column if not exists checked_at timestamptz default now();
+
+alter table public.godview_aggregate enable row level security;
+
+create policy "Allow public read access"
+on public.godview_aggregate
+for select
+to anon
+using (true);
+
+create policy "Allow service role full access"
+on public.godview_aggregate
+for all
+to service_role
+using (true)
+with check (true);
+
+-- Stamp checked_at; replace the aggregate and bump its version only when
+-- the hash changed. Returns the current version; one statement, so
+-- concurrent publishers (cron run and stream daemon) cannot hand out the
+-- same version twice.
+create or replace function public.publish_godview_aggregate(p_hash text, p_data jsonb)
+returns bigint
+language plpgsql
+as $$
+declare
+    v bigint;
+begin
+    insert into public.godview_aggregate as a (id, version, hash, data)
+    values ('latest', 1, p_hash, p_data)
+    on conflict (id) do update
+        set checked_at = now(),
+            version = case when a.hash is distinct from excluded.hash then a.version + 1 else a.version end,
+            hash = excluded.hash,
+            data = case when a.hash is distinct from excluded.hash then excluded.data else a.data end,
+            updated_at = case when a.hash is distinct from excluded.hash then now() else a.updated_at end
+    returning version into v;
+    return v;
+end $$;
+
+revoke execute on function public.publish_godview_aggregate(text, jsonb) from public, anon;
+grant execute on function public.publish_godview_aggregate(text, jsonb) to service_role;
+
+-- Rolling cross-index correlation/covariance and strength ranks
+-- (engine/correlation.py), replaced by every run
+create table if not exists public.godview_matrix (
+    id text primary key,
+    updated_at timestamptz default now(),
+    data jsonb not null
+);
+
+alter table public.godview_matrix enable row level security;
+
+create policy "Allow public read access"
+on public.godview_matrix
+for select
+to anon
+using (true);
+
+create policy "Allow service role full access"
+on public.godview_matrix
+for all
+to service_role
+using (true)
+with check (true);
+
+-- V24D / First Wave status of every synthetic index pair
+-- (engine/pairs.py, godview.py --pairs), replaced by every run
+create table if not exists public.godview_pairs (
+    id text primary key,
+    updated_at timestamptz default now(),
+    data jsonb not null
+);
+
+alter table public.godview_pairs enable row level security;
+
+create policy "Allow public read access"
+on public.godview_pairs
+for select
+to anon
+using (true);
+
+create policy "Allow service role full access"
+on public.godview_pairs
+for all
+to service_role
+using (true)
+with check (true);
+
+-- One row per engine run: stage timings, peak memory, skipped symbols and
+-- per-ticker last bar / NaN ratio, for alerting on slow or stale runs
+create table if not exists public.godview_runs (
+    run_id text primary key,
+    started_at timestamptz not null,
+    data jsonb not null
+);
+
+alter table public.godview_runs enable row level security;
+
+create policy "Allow service role full access"
+on public.godview_runs
+for all
+to service_role
+using (true)
+with check (true);
+
+-- Per-bar signal history (engine/history.py), range-partitioned by year
+create table if not exists public.godview_history (
+    date date not null,
+    symbol text not null,
+    trend_status smallint not null,
+    fw_status smallint not null,
+    primary key (date, symbol)
+) partition by range (date);
+
+do $$
+begin
+    for y in 2000..2035 loop
+        execute format(
+            'create table if not exists public.godview_history_%s partition of public.godview_history for values from (%L) to (%L)',
+            y, make_date(y, 1, 1), make_date(y + 1, 1, 1));
+    end loop;
+end $$;
+
+create table if not exists public.godview_history_default
+partition of public.godview_history default;
+
+alter table public.godview_history enable row level security;
+
+create policy "Allow public read access"
+on public.godview_history
+for select
+to anon
+using (true);
+
+create policy "Allow service role full access"
+on public.godview_history
+for all
+to service_role
+using (true)
+with check (true);
@@ -0,0 +1,377 @@
+import os
+import io
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+import godview
+import rules
+
+# ==========================================
+# Signal History
+# ==========================================
+# trend_status / fw_status for every daily bar of every symbol, equal to what
+# main() would have published had the data ended on that bar. Daily
+# indicators are causal, so their full series already hold those as-of
+# values. The weekly timeframe ends on a partial week (close, high and low so
+# far), which is one indicator step on top of the previous completed week, so
+# it is evaluated for all bars at once as well.
+#
+#   GODVIEW_STORE_DIR=.store python history.py --out .history
+#   python history.py --since 2025-01-01    # push only recent rows
+#   python history.py --verify 20           # replay main() on 20 random bars per symbol
+
+HISTORY_DIR = os.environ.get("GODVIEW_HISTORY_DIR")
+HISTORY_TABLE = 'godview_history'
+HISTORY_CHUNK_SIZE = 1000
+MIN_WEEKS = 90  # weekly votes stay False below this many weeks, as in main()
+
+# The vote parameters main() uses; sweep.py evaluates other combinations
+DEFAULT_PARAMS = {
+    'rsi_ma_lengths': tuple(godview.RSI_MA_LENGTHS),  # RSI SMA slope votes (V24D and First Wave daily)
+    'n_votes': 3,                                     # calc_rsi_votes threshold
+    'adx_lengths': tuple(godview.SHORT_MA_LENGTHS),   # DI SMAs (exactly three)
+    'macd': (12, 26, 9),                              # fast, slow, signal
+    'min_weeks': MIN_WEEKS,
+}
+
+# ==========================================
+# As-of Indicator Inputs
+# ==========================================
+# Inputs are LazyMaps keyed by SMA length (or MACD periods), so only the
+# lengths a parameter set asks for are computed, each of them once.
+
+def _ewm_step(prev, cur, com):
+    """godview._ewm_step over arrays."""
+    alpha = 1.0 / (1.0 + com)
+    old_wt = 1.0 - alpha
+    return np.where(prev == cur, prev, (old_wt * prev + alpha * cur) / (old_wt + alpha))
+
+def _values(series):
+    return series.to_numpy(dtype=float)
+
+def daily_inputs(close, high, low):
+    """Per-bar values the vote functions read, from full daily series."""
+    ind = godview.IndicatorContext(close, high, low)
+
+    def macd_inputs(periods):
+        macd, signal, hist = godview.calc_macd(close, *periods)
+        return {
+            'macd': _values(macd),
+            'signal': _values(signal),
+            'macd_slope': _values(macd.diff()),
+            'signal_slope': _values(signal.diff()),
+            'hist_slope': godview.LazyMap(lambda l: _values(hist.rolling(window=l).mean().diff())),
+        }
+
+    return {
+        'bars': np.arange(1, len(close) + 1),
+        'rsi_slope': godview.LazyMap(lambda l: _values(ind['rsi_ma'][l].diff())),
+        'macd': godview.LazyMap(macd_inputs),
+        'plus_ma': godview.LazyMap(lambda l: _values(ind['plus_di_ma'][l])),
+        'minus_ma': godview.LazyMap(lambda l: _values(ind['minus_di_ma'][l])),
+        'plus_slope': godview.LazyMap(lambda l: _values(ind['plus_di_ma'][l].diff())),
+        'minus_slope': godview.LazyMap(lambda l: _values(ind['minus_di_ma'][l].diff())),
+    }
+
+def weekly_inputs(close, high, low, w_bars=None):
+    """Same values for the weekly timeframe as of every daily bar.
+
+    On each day the last weekly bar is the week so far; its indicators are
+    the completed weeks' accumulators advanced by that partial bar, and an
+    SMA over it is the previous (length - 1) completed values plus the partial one.
+    """
+    if w_bars is None:
+        w_bars = (close.resample('W-FRI').last(), high.resample('W-FRI').max(), low.resample('W-FRI').min())
+    w_close, w_high, w_low = w_bars
+
+    # Week of each daily bar (labels are the Friday closing the week)
+    k = np.searchsorted(w_close.index.values, close.index.values)
+    has_prev = k > 0
+
+    def prev(values):
+        """Completed-week value before each bar's week."""
+        values = np.asarray(values, dtype=float)
+        out = np.full(len(k), np.nan)
+        out[has_prev] = values[k[has_prev] - 1]
+        return out
+
+    def sma(series, partial, length):
+        return (prev(series.rolling(length - 1).sum()) + partial) / length if length > 1 else partial
+
+    def sma_slope(series, partial, length):
+        return sma(series, partial, length) - prev(series.rolling(length).mean())
+
+    c = close.to_numpy(dtype=float)
+    h = high.groupby(k).cummax().to_numpy(dtype=float)
+    l = low.groupby(k).cummin().to_numpy(dtype=float)
+    c_prev, h_prev, l_prev = prev(w_close), prev(w_high), prev(w_low)
+
+    # MACD
+    def macd_inputs(periods):
+        fast, slow, signal_len = periods
+        ema_fast = _ewm_step(prev(godview.calc_ema(w_close, fast)), c, godview._ewm_com(span=fast))
+        ema_slow = _ewm_step(prev(godview.calc_ema(w_close, slow)), c, godview._ewm_com(span=slow))
+        w_macd, w_signal, w_hist = godview.calc_macd(w_close, fast, slow, signal_len)
+        macd = ema_fast - ema_slow
+        signal = _ewm_step(prev(w_signal), macd, godview._ewm_com(span=signal_len))
+        hist = macd - signal
+        return {
+            'macd': macd,
+            'signal': signal,
+            'macd_slope': macd - prev(w_macd),
+            'signal_slope': signal - prev(w_signal),
+            'hist_slope': godview.LazyMap(lambda n: sma_slope(w_hist, hist, n)),
+        }
+
+    # RSI (Wilder averages of the completed weeks, one more step for the partial week)
+    delta = w_close.diff()
+    com = godview._ewm_com(alpha=1/14)
+    avg_gain = prev(delta.where(delta > 0, 0.0).ewm(alpha=1/14, adjust=False).mean())
+    avg_loss = prev((-delta).where(delta < 0, 0.0).ewm(alpha=1/14, adjust=False).mean())
+    d = c - c_prev
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_gain = _ewm_step(avg_gain, np.where(d > 0, d, 0.0), com)
+        avg_loss = _ewm_step(avg_loss, np.where(d < 0, -d, 0.0), com)
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    rsi[k < 13] = np.nan
+    w_rsi = godview.calc_rsi(w_close, 14)
+
+    # DI on a 14-week SMA of TR/DM
+    tr = np.fmax(np.fmax(h - l, np.abs(h - c_prev)), np.abs(l - c_prev))
+    up_move, down_move = h - h_prev, l_prev - l
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    w_tr, w_plus_dm, w_minus_dm = godview.calc_dm_tr(w_high, w_low, w_close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        atr = (prev(w_tr.rolling(13).sum()) + tr) / 14
+        plus_di = (prev(w_plus_dm.rolling(13).sum()) + plus_dm) / 14 / atr * 100
+        minus_di = (prev(w_minus_dm.rolling(13).sum()) + minus_dm) / 14 / atr * 100
+    plus_di = np.where(np.isnan(plus_di), 0.0, plus_di)
+    minus_di = np.where(np.isnan(minus_di), 0.0, minus_di)
+    w_plus_di, w_minus_di = godview.calc_di(w_high, w_low, w_close, 14)
+
+    return {
+        'bars': k + 1,
+        'rsi_slope': godview.LazyMap(lambda n: sma_slope(w_rsi, rsi, n)),
+        'macd': godview.LazyMap(macd_inputs),
+        'plus_ma': godview.LazyMap(lambda n: sma(w_plus_di, plus_di, n)),
+        'minus_ma': godview.LazyMap(lambda n: sma(w_minus_di, minus_di, n)),
+        'plus_slope': godview.LazyMap(lambda n: sma_slope(w_plus_di, plus_di, n)),
+        'minus_slope': godview.LazyMap(lambda n: sma_slope(w_minus_di, minus_di, n)),
+    }
+
+# ==========================================
+# Vectorized Votes
+# ==========================================
+# Each function mirrors its scalar counterpart in godview.py bar by bar;
+# NaN slopes abstain because every comparison with NaN is False.
+
+def slope_counts(slopes, lengths, strict=False):
+    s = np.array([slopes[l] for l in lengths])
+    if strict:
+        return (s > 0).sum(0), (s < 0).sum(0)
+    return (s >= 0).sum(0), (s <= 0).sum(0)
+
+def di_mas(x, params):
+    """(plus, minus) DI SMA stacks and whether all of them are defined."""
+    lengths = params['adx_lengths']
+    p = np.array([x['plus_ma'][l] for l in lengths])
+    m = np.array([x['minus_ma'][l] for l in lengths])
+    valid = (x['bars'] >= max(lengths) + 1) & ~np.isnan(p).any(0) & ~np.isnan(m).any(0)
+    return p, m, valid
+
+def v24d_votes(x, params=DEFAULT_PARAMS):
+    """calc_rsi_votes, calc_macd_signal and calc_adx_signal for every bar."""
+    n_votes = params['n_votes']
+    up, down = slope_counts(x['rsi_slope'], params['rsi_ma_lengths'])
+    rsi_l = up >= n_votes
+    rsi_s = down >= n_votes if n_votes <= 3 else (down >= n_votes) & ~rsi_l
+
+    macd = x['macd'][params['macd']]
+    m, s = macd['macd'], macd['signal']
+    macd_l = ~((m < 0) & (s < 0))
+    macd_s = ~((m > 0) & (s > 0))
+
+    p, n, valid = di_mas(x, params)
+    long_sig = ((p[:, None, :] > n[None, :, :]).sum(1) >= 2).sum(0) >= 2
+    short_sig = ((n[:, None, :] > p[None, :, :]).sum(1) >= 2).sum(0) >= 2
+    adx_l = valid & ~(short_sig & ~long_sig)
+    adx_s = valid & ~(long_sig & ~short_sig)
+    return rsi_l, rsi_s, macd_l, macd_s, adx_l, adx_s
+
+def macd_fw_counts(x, params=DEFAULT_PARAMS):
+    """calc_macd_fw: (dif, dea, up, down), zeros where it bails out."""
+    macd = x['macd'][params['macd']]
+    dif, dea = macd['macd'], macd['signal']
+    valid = (x['bars'] >= 38) & ~np.isnan(dif) & ~np.isnan(dea)
+    slopes = [macd['macd_slope'], macd['signal_slope']] + [macd['hist_slope'][l] for l in godview.SHORT_MA_LENGTHS]
+    up, down = slope_counts(slopes, range(len(slopes)), strict=True)
+    zero = lambda a: np.where(valid, a, 0)
+    return zero(dif), zero(dea), zero(up), zero(down)
+
+def adx_fw_counts(x, params=DEFAULT_PARAMS):
+    """calc_adx_fw: slope and position counts, zeros where it bails out."""
+    p, m, valid = di_mas(x, params)
+    p_up, p_down = slope_counts(x['plus_slope'], params['adx_lengths'])
+    m_up, m_down = slope_counts(x['minus_slope'], params['adx_lengths'])
+    p_below = (p[:, None, :] < m[None, :, :]).sum((0, 1))
+    p_above = (p[:, None, :] > m[None, :, :]).sum((0, 1))
+    counts = (p_up, p_down, m_up, m_down, p_below, p_above, p_above, p_below)
+    return tuple(np.where(valid, c, 0) for c in counts)
+
+def fw_week_outcomes(w, params=DEFAULT_PARAMS):
+    """calc_fw_week_signals as (rsi_l, rsi_s, macd outcome, adx outcome) arrays."""
+    ok = w['bars'] >= params['min_weeks']
+    up, down = slope_counts(w['rsi_slope'], godview.SHORT_MA_LENGTHS)
+    macd, adx = rules.fw_week_rules(macd_fw_counts(w, params), adx_fw_counts(w, params))
+    return ok & (up >= 1), ok & (down >= 1), np.where(ok, macd, rules.NONE), np.where(ok, adx, rules.NONE)
+
+def fw_status(d, w, params=DEFAULT_PARAMS):
+    """calc_fw_aggregation status for every bar."""
+    lengths = params['rsi_ma_lengths']
+    up, down = slope_counts(d['rsi_slope'], lengths)
+    enough = d['bars'] >= max(lengths) + 1
+    _, _, macd_up, macd_down = macd_fw_counts(d, params)
+    return rules.fw_commander(enough & (up >= 2), enough & (down >= 2), macd_up, macd_down,
+                              rules.fw_day_adx(adx_fw_counts(d, params)), *fw_week_outcomes(w, params))
+
+def trend_status(d, w, params=DEFAULT_PARAMS):
+    """V24D trend aggregation of main() for every bar."""
+    ok = w['bars'] >= params['min_weeks']
+    return rules.combine_votes(v24d_votes(d, params), [ok & v for v in v24d_votes(w, params)])
+
+# ==========================================
+# Panel History
+# ==========================================
+def symbol_inputs(bars):
+    """(daily, weekly) as-of inputs of one symbol's prepare_bars() output."""
+    (close, high, low), w_bars, _ = bars
+    return daily_inputs(close, high, low), weekly_inputs(close, high, low, w_bars)
+
+def calc_symbol_history(symbol, bars, params=DEFAULT_PARAMS, inputs=None):
+    """trend_status/fw_status per daily bar, from the bar main() would first publish the symbol on."""
+    d, w = inputs or symbol_inputs(bars)
+    frame = pd.DataFrame({'trend_status': trend_status(d, w, params), 'fw_status': fw_status(d, w, params)},
+                         index=bars[0][0].index).astype('int8')
+    return frame.iloc[godview.min_history_length(symbol) - 1:]
+
+def calc_history(df_syn, df_high, df_low):
+    """Long (date, symbol, trend_status, fw_status) frame for every symbol of the panel."""
+    frames = {}
+    aligned = godview.AlignedBars(df_syn, df_high, df_low)
+    for symbol in df_syn.columns:
+        bars = aligned.bars(symbol)
+        if bars is not None:
+            frames[symbol] = calc_symbol_history(symbol, bars)
+    if not frames:
+        return pd.DataFrame(columns=['date', 'symbol', 'trend_status', 'fw_status'])
+    history = pd.concat(frames, names=['symbol', 'date']).reset_index()
+    return history[['date', 'symbol', 'trend_status', 'fw_status']].sort_values(['date', 'symbol'], ignore_index=True)
+
+def verify_history(df_syn, df_high, df_low, history, samples=20, seed=0):
+    """Replay the snapshot pipeline on data cut at random bars and count disagreements."""
+    rng = np.random.default_rng(seed)
+    bad = checked = 0
+    for symbol, rows in history.groupby('symbol'):
+        rows = rows.set_index('date')
+        for date in rng.choice(rows.index.values, min(samples, len(rows)), replace=False):
+            with contextlib.redirect_stdout(io.StringIO()):
+                bars = godview.prepare_bars(symbol, df_syn[symbol][:date], df_high[symbol][:date], df_low[symbol][:date])
+                payload = godview.calc_symbol_payload(symbol, bars, {}, {}, {}, None)
+            got = rows.loc[date]
+            checked += 1
+            if (payload['trend_status'], payload['fw_status']) != (got['trend_status'], got['fw_status']):
+                bad += 1
+                print(f"MISMATCH {symbol} {pd.Timestamp(date).date()}: snapshot "
+                      f"{payload['trend_status']}/{payload['fw_status']}, history {got['trend_status']}/{got['fw_status']}")
+    print(f"Verified {checked} bars, {bad} mismatches.")
+    return bad
+
+# ==========================================
+# Storage
+# ==========================================
+# Locally one compressed .npz per calendar year; remotely the godview_history
+# table, range-partitioned by date (see godview_schema.sql).
+
+def save_history(root, history):
+    """Write one <year>.npz per calendar year of `history`."""
+    os.makedirs(root, exist_ok=True)
+    years = history['date'].dt.year
+    for year, part in history.groupby(years):
+        tmp = os.path.join(root, f'{year}.tmp.npz')
+        np.savez_compressed(tmp,
+                            date=part['date'].to_numpy(dtype='datetime64[D]'),
+                            symbol=part['symbol'].to_numpy(dtype=str),
+                            trend_status=part['trend_status'].to_numpy(dtype=np.int8),
+                            fw_status=part['fw_status'].to_numpy(dtype=np.int8))
+        os.replace(tmp, os.path.join(root, f'{year}.npz'))
+    return years.nunique()
+
+def load_history(root, start=None):
+    """Read the yearly files back into one frame, optionally from `start` on."""
+    frames = []
+    for name in sorted(os.listdir(root)):
+        if not name.endswith('.npz') or '.tmp' in name:
+            continue
+        if start is not None and int(name[:-4]) < pd.Timestamp(start).year:
+            continue
+        with np.load(os.path.join(root, name)) as f:
+            frames.append(pd.DataFrame({k: f[k] for k in ('date', 'symbol', 'trend_status', 'fw_status')}))
+    if not frames:
+        return pd.DataFrame(columns=['date', 'symbol', 'trend_status', 'fw_status'])
+    history = pd.concat(frames, ignore_index=True)
+    history['date'] = pd.to_datetime(history['date'])
+    if start is not None:
+        history = history[history['date'] >= pd.Timestamp(start)].reset_index(drop=True)
+    return history
+
+def history_rows(history):
+    rows = history.assign(date=history['date'].dt.strftime('%Y-%m-%d'))
+    return rows.astype({'trend_status': int, 'fw_status': int}).to_dict('records')
+
+def push_history(client, history):
+    return godview.upsert_rows(client, history_rows(history), table=HISTORY_TABLE, chunk_size=HISTORY_CHUNK_SIZE)
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GodView signal history")
+    parser.add_argument('--out', default=HISTORY_DIR, help="directory for the yearly .npz files")
+    parser.add_argument('--since', help="only push rows on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--verify', type=int, default=0, metavar='N',
+                        help="replay the snapshot pipeline on N random bars per symbol")
+    args = parser.parse_args(argv)
+
+    raw_data = godview.fetch_raw_data()
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return
+
+    print("Calculating synthetic indices...")
+    df_syn, df_high, df_low = godview.calc_synthetic_ohlc(raw_data)
+
+    print("Calculating signal history...")
+    history = calc_history(df_syn, df_high, df_low)
+    print(f"History: {len(history)} rows, {history['symbol'].nunique()} symbols.")
+
+    if args.verify:
+        verify_history(df_syn, df_high, df_low, history, args.verify)
+
+    if args.out:
+        n = save_history(args.out, history)
+        print(f"Saved {n} yearly files to {args.out}.")
+
+    if godview.SUPABASE_URL and godview.SUPABASE_KEY:
+        rows = history if args.since is None else history[history['date'] >= pd.Timestamp(args.since)]
+        print(f"Pushing {len(rows)} history rows to Supabase...")
+        client = godview.get_client()
+        push_history(client, rows)
+        print("Done.")
+    elif not args.out:
+        print("No Supabase Credentials or --out given. Latest bars:")
+        print(history.groupby('symbol').tail(1).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import godview
+import history
+import rules
+
+# ==========================================
+# Pair Matrix
+# ==========================================
+# V24D and First Wave on the ratio of every ordered pair of synthetic indices
+# (AUD/JPY = indices['AUD'] / indices['JPY']), all pairs at once: the ratios
+# are one (time, base, quote) array, calendars and weekly/monthly bars come
+# from one AlignedBars pass, the indicators from one batch-kernel call per
+# timeframe, and the votes from the rules.py tables on the last bar.
+#
+# A ratio's high/low are the ratio of the legs' highs and of their lows,
+# widened to contain the close (the true intraday extremes are unknown).
+#
+#   python pairs.py                              # currency indices, print the trend matrix
+#   python pairs.py --universe all --json pairs.json
+#   python godview.py --pairs                    # publish to godview_pairs with the snapshot
+
+PAIR_UNIVERSE = os.environ.get("GODVIEW_PAIR_UNIVERSE", "fx")
+PAIRS_TABLE = 'godview_pairs'
+PAIR_MIN_BARS = 200  # daily bars a pair needs, as min_history_length() for the currency indices
+FRAMES = ['d', 'w', 'm', 'trend', 'fw']
+STATUS_CODES = {1: 'L', -1: 'S', 2: 'B', 0: '.'}
+
+def universe_names(universe=PAIR_UNIVERSE):
+    """Synthetic index names of a universe: a CALENDARS class, 'all', or a comma-separated list."""
+    if universe == 'all':
+        return list(godview.SYNTHETIC_FORMULAS)
+    if universe in godview.CALENDARS:
+        return [n for n in godview.SYNTHETIC_FORMULAS if n in godview.CALENDARS[universe]]
+    names = [n.strip() for n in universe.split(',') if n.strip()]
+    unknown = [n for n in names if n not in godview.SYNTHETIC_FORMULAS]
+    if unknown:
+        raise ValueError(f"Unknown synthetic indices: {', '.join(unknown)}")
+    return names
+
+def ratio_panels(df_syn, df_high, df_low, names):
+    """(close, high, low) frames of every ordered pair 'A/B' of `names`, from (time, base, quote) ratio arrays."""
+    c, h, l = (f[names].to_numpy(dtype=float) for f in (df_syn, df_high, df_low))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        close = c[:, :, None] / c[:, None, :]
+        high_ratio = h[:, :, None] / h[:, None, :]
+        low_ratio = l[:, :, None] / l[:, None, :]
+    high = np.maximum(np.maximum(high_ratio, low_ratio), close)
+    low = np.minimum(np.minimum(high_ratio, low_ratio), close)
+
+    base, quote = np.nonzero(~np.eye(len(names), dtype=bool))
+    pairs = [f"{names[i]}/{names[j]}" for i, j in zip(base, quote)]
+    return [pd.DataFrame(x[:, base, quote], index=df_syn.index, columns=pairs, copy=False)
+            for x in (close, high, low)]
+
+# ==========================================
+# Batched Votes
+# ==========================================
+def frame_inputs(batch, lengths, macd=(12, 26, 9)):
+    """Last-bar inputs of history.py's vote rules, one value per batch column (tail_only batch)."""
+    last = lambda x: x.to_numpy(dtype=float)[-1]
+    slope = lambda x: x.to_numpy(dtype=float)[-1] - x.to_numpy(dtype=float)[-2]
+    macd_line, signal_line, _ = batch['macd']
+    return {
+        'bars': np.asarray(lengths),
+        'rsi_slope': {l: slope(v) for l, v in batch['rsi_ma'].items()},
+        'macd': {macd: {
+            'macd': last(macd_line),
+            'signal': last(signal_line),
+            'macd_slope': slope(macd_line),
+            'signal_slope': slope(signal_line),
+            'hist_slope': {l: slope(v) for l, v in batch['hist_ma'].items()},
+        }},
+        'plus_ma': {l: last(v) for l, v in batch['plus_di_ma'].items()},
+        'minus_ma': {l: last(v) for l, v in batch['minus_di_ma'].items()},
+        'plus_slope': {l: slope(v) for l, v in batch['plus_di_ma'].items()},
+        'minus_slope': {l: slope(v) for l, v in batch['minus_di_ma'].items()},
+    }
+
+def calc_status_matrix(aligned, columns, params=history.DEFAULT_PARAMS):
+    """{frame: status per column} for columns of an AlignedBars, all columns per kernel call.
+
+    'd', 'w', 'm' are the V24D status of that timeframe alone (its three
+    votes aggregated like the daily/weekly pair of the trend), 'trend' and
+    'fw' the trend_status and fw_status the snapshot payload would carry.
+    Also returns the per-frame (rsi_l, rsi_s, macd_l, macd_s, adx_l, adx_s) votes.
+    """
+    inputs = {}
+    for frame in ('d', 'w', 'm'):
+        (close, high, low), lengths, span = aligned.stack(frame, columns)
+        batch = godview.calc_batch_indicators(close, high, low, span, tail_only=True)
+        inputs[frame] = frame_inputs(batch, lengths, params['macd'])
+
+    votes = {}
+    for frame, x in inputs.items():
+        v = history.v24d_votes(x, params)
+        # Weekly/monthly votes stay False below min_weeks bars, as in the payload
+        ok = x['bars'] >= params['min_weeks'] if frame != 'd' else np.ones(len(columns), dtype=bool)
+        votes[frame] = [ok & a for a in v]
+
+    status = {frame: rules.combine_votes(v, v) for frame, v in votes.items()}
+    status['trend'] = rules.combine_votes(votes['d'], votes['w'])
+    status['fw'] = history.fw_status(inputs['d'], inputs['w'], params)
+    return status, votes
+
+def calc_pair_matrix(df_syn, df_high, df_low, names=None, last_update=None):
+    """The published document: an (base, quote) status matrix per frame, null where a pair has too little history."""
+    names = universe_names() if names is None else names
+    close, high, low = ratio_panels(df_syn, df_high, df_low, names)
+    aligned = godview.AlignedBars(close, high, low)
+    counts = aligned.valid.sum(axis=0)
+    columns = [p for p, n in zip(close.columns, counts) if n >= PAIR_MIN_BARS]
+    status, _ = calc_status_matrix(aligned, columns)
+
+    index = {p: k for k, p in enumerate(columns)}
+    matrices = {}
+    for frame in FRAMES:
+        matrices[frame] = [[int(status[frame][index[f"{a}/{b}"]]) if f"{a}/{b}" in index else None
+                            for b in names] for a in names]
+    return {
+        'symbols': names,
+        'as_of': df_syn.index[-1].strftime('%Y-%m-%d') if len(df_syn) else None,
+        'last_update': last_update,
+        'codes': {'1': 'long', '-1': 'short', '2': 'both', '0': 'wait'},
+        'pairs': len(columns),
+        'status': matrices,
+    }
+
+def format_matrix(doc, frame='trend'):
+    """Text grid of one frame's matrix (rows = base, columns = quote)."""
+    names = doc['symbols']
+    width = max(len(n) for n in names) + 1
+    lines = [' ' * width + ''.join(n[:3].rjust(4) for n in names)]
+    for a, row in zip(names, doc['status'][frame]):
+        cells = ['-' if v is None else STATUS_CODES[v] for v in row]
+        lines.append(a.ljust(width) + ''.join(c.rjust(4) for c in cells))
+    return '\n'.join(lines)
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="V24D / First Wave status of every synthetic index pair")
+    parser.add_argument('--universe', default=PAIR_UNIVERSE,
+                        help="CALENDARS class (fx, commodity, ...), 'all', or comma-separated index names")
+    parser.add_argument('--frame', default='trend', choices=FRAMES, help="matrix to print")
+    parser.add_argument('--json', help="write the matrix document to this file")
+    args = parser.parse_args(argv)
+
+    names = universe_names(args.universe)
+    raw_data = godview.fetch_raw_data()
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return
+    df_syn, df_high, df_low = godview.calc_synthetic_ohlc(raw_data)
+    doc = calc_pair_matrix(df_syn, df_high, df_low, names)
+
+    print(f"{doc['pairs']} pairs of {len(names)} indices as of {doc['as_of']} ({args.frame}; L long, S short, B both, . wait):")
+    print(format_matrix(doc, args.frame))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(doc, f)
+        print(f"Matrix written to {args.json}")
+
+if __name__ == "__main__":
+    main()
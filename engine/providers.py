@@ -0,0 +1,239 @@
+import os
+import re
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import pandas as pd
+
+# ==========================================
+# Market Data Providers
+# ==========================================
+# A provider returns one ticker's OHLCV bars:
+#
+#   provider.fetch(ticker, start=None, period=None, interval='1d') -> DataFrame
+#
+# with Open/High/Low/Close/Volume columns, empty when it has nothing for the
+# ticker. download() fetches every ticker concurrently, with its own timeout
+# and retries, trying the providers in order until one returns bars, and
+# reassembles the (field, ticker) frame yf.download returns. A slow or failing
+# ticker then only costs its own bars, and the replay provider lets the
+# engine run with no network (CI, offline checks).
+#
+#   GODVIEW_PROVIDERS=yahoo,replay GODVIEW_REPLAY_DIR=fixtures python godview.py
+#   GODVIEW_PROVIDERS=replay GODVIEW_REPLAY_DIR=fixtures python godview.py   # offline
+#   python providers.py --record fixtures --period 2y                         # write a replay dir
+
+PROVIDERS = os.environ.get("GODVIEW_PROVIDERS", "yahoo")
+REPLAY_DIR = os.environ.get("GODVIEW_REPLAY_DIR")
+FETCH_WORKERS = int(os.environ.get("GODVIEW_FETCH_WORKERS", "8"))
+FETCH_TIMEOUT = float(os.environ.get("GODVIEW_FETCH_TIMEOUT", "30"))
+FETCH_RETRIES = int(os.environ.get("GODVIEW_FETCH_RETRIES", "2"))
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+def normalize_bars(frame, interval):
+    """OHLCV columns only; daily bars on tz-naive exchange dates (like yf.download), intraday in UTC."""
+    frame = frame.reindex(columns=FIELDS)
+    idx = pd.DatetimeIndex(frame.index)
+    if interval in DAILY_INTERVALS:
+        if idx.tz is not None:
+            idx = idx.tz_localize(None)
+        idx = idx.normalize()
+    elif idx.tz is None:
+        idx = idx.tz_localize('UTC')
+    else:
+        idx = idx.tz_convert('UTC')
+    frame.index = idx
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    return frame.dropna(how='all')
+
+class YahooProvider:
+    """Yahoo Finance, one ticker per request.
+
+    yfinance keeps one HTTP session per process, so concurrent fetches share
+    its connection pool; pass `session` to use your own.
+    """
+    name = 'yahoo'
+
+    def __init__(self, session=None, timeout=FETCH_TIMEOUT):
+        self.session = session
+        self.timeout = timeout
+
+    def fetch(self, ticker, start=None, period=None, interval='1d'):
+        import yfinance as yf
+        kwargs = {'start': start} if start is not None else {'period': period or '1mo'}
+        frame = yf.Ticker(ticker, session=self.session).history(
+            interval=interval, timeout=self.timeout, raise_errors=True, **kwargs)
+        return normalize_bars(frame, interval)
+
+class ReplayProvider:
+    """Bars recorded to <root>/<ticker>.csv|.parquet (daily) or <ticker>_<interval>.* (intraday).
+
+    `period` counts back from the last recorded bar, so a replay directory
+    gives the same frame on every run.
+    """
+    name = 'replay'
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, ticker, interval='1d'):
+        stem = ticker if interval == '1d' else f"{ticker}_{interval}"
+        for ext in ('.parquet', '.csv'):
+            path = os.path.join(self.root, stem + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def fetch(self, ticker, start=None, period=None, interval='1d'):
+        path = self.path(ticker, interval)
+        if path is None:
+            return pd.DataFrame(columns=FIELDS)
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path, index_col=0, parse_dates=True)
+        frame = normalize_bars(frame, interval)
+        if start is not None:
+            first = pd.Timestamp(start)
+            if frame.index.tz is not None and first.tz is None:
+                first = first.tz_localize('UTC')
+            frame = frame[frame.index >= first]
+        elif period not in (None, 'max') and len(frame):
+            frame = frame[frame.index > frame.index[-1] - period_offset(period)]
+        return frame
+
+def period_offset(period):
+    """yfinance period string ('730d', '2y', '6mo', '1wk') as a DateOffset."""
+    m = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if m is None:
+        raise ValueError(f"Unknown period {period!r}")
+    n, unit = int(m.group(1)), m.group(2)
+    return {'d': pd.DateOffset(days=n), 'wk': pd.DateOffset(weeks=n),
+            'mo': pd.DateOffset(months=n), 'y': pd.DateOffset(years=n)}[unit]
+
+def get_providers(names=None, replay_dir=None):
+    """Provider instances in fallback order, from a comma-separated list of names."""
+    names = names or PROVIDERS
+    replay_dir = replay_dir or REPLAY_DIR
+    providers = []
+    for name in [n.strip() for n in names.split(',') if n.strip()]:
+        if name == 'yahoo':
+            providers.append(YahooProvider())
+        elif name == 'replay':
+            if not replay_dir:
+                raise ValueError("replay provider needs GODVIEW_REPLAY_DIR")
+            providers.append(ReplayProvider(replay_dir))
+        else:
+            raise ValueError(f"Unknown data provider {name!r}")
+    return providers
+
+# ==========================================
+# Concurrent Download
+# ==========================================
+def fetch_ticker(ticker, providers, calls, timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES, backoff=1.0, **kwargs):
+    """Bars of one ticker from the first provider that has them. Returns (frame, provider name, error).
+
+    Every attempt runs on the `calls` pool and is abandoned after `timeout`
+    seconds; failed attempts are retried with exponential backoff, an empty
+    answer moves on to the next provider straight away.
+    """
+    error = None
+    for provider in providers:
+        for attempt in range(retries + 1):
+            try:
+                frame = calls.submit(provider.fetch, ticker, **kwargs).result(timeout=timeout)
+            except FutureTimeout:
+                error = f"{provider.name}: timed out after {timeout:.0f}s"
+            except Exception as e:
+                error = f"{provider.name}: {e}"
+            else:
+                if frame is not None and not frame.empty:
+                    return frame, provider.name, None
+                error = f"{provider.name}: no data"
+                break
+            if attempt < retries:
+                time.sleep(backoff * 2 ** attempt)
+    return None, None, error
+
+def download(tickers, start=None, period=None, interval='1d', providers=None, workers=FETCH_WORKERS,
+             timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES, backoff=1.0, progress=False):
+    """yf.download-style (field, ticker) frame, fetched per ticker on a thread pool.
+
+    Tickers no provider could serve are left out (and reported), instead of
+    failing or NaN-filling the batch. frame.attrs['sources'] maps each ticker
+    to the provider that served it.
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    providers = providers if providers is not None else get_providers()
+    kwargs = dict(start=start, period=period, interval=interval)
+
+    pieces, sources, failed = {}, {}, {}
+    # Abandoned (timed-out) calls keep running, so the call pool is larger
+    # than the ticker pool and is not waited for on the way out
+    calls = ThreadPoolExecutor(max_workers=2 * workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {t: pool.submit(fetch_ticker, t, providers, calls, timeout, retries, backoff, **kwargs)
+                       for t in tickers}
+            for ticker, future in futures.items():
+                frame, source, error = future.result()
+                if frame is None:
+                    failed[ticker] = error
+                else:
+                    pieces[ticker], sources[ticker] = frame, source
+    finally:
+        calls.shutdown(wait=False, cancel_futures=True)
+
+    for ticker, error in failed.items():
+        print(f"Warning: no data for {ticker} ({error}).")
+    counts = pd.Series(sources, dtype=object).value_counts().to_dict()
+    print(f"Fetched {len(pieces)}/{len(tickers)} tickers " + ', '.join(f"{k} {v}" for k, v in counts.items()))
+
+    if not pieces:
+        return pd.DataFrame()
+    data = pd.concat(pieces, axis=1, sort=True).swaplevel(axis=1).sort_index(axis=1)
+    data.columns.names = ['Price', 'Ticker']
+    data.attrs['sources'] = sources
+    return data
+
+# ==========================================
+# Replay Recording
+# ==========================================
+def record_replay(root, data, interval='1d', fmt='csv'):
+    """Write a (field, ticker) frame as one replay file per ticker. Returns the tickers written."""
+    os.makedirs(root, exist_ok=True)
+    written = []
+    for ticker in data.columns.get_level_values(1).unique():
+        frame = data.xs(ticker, axis=1, level=1).reindex(columns=FIELDS).dropna(how='all')
+        if frame.empty:
+            continue
+        stem = ticker if interval == '1d' else f"{ticker}_{interval}"
+        path = os.path.join(root, f"{stem}.{fmt}")
+        if fmt == 'parquet':
+            frame.to_parquet(path)
+        else:
+            frame.to_csv(path)
+        written.append(ticker)
+    return written
+
+def main(argv=None):
+    import godview
+    parser = argparse.ArgumentParser(description="Record engine tickers into a replay directory")
+    parser.add_argument('--record', required=True, help="replay directory to write")
+    parser.add_argument('--period', default='2y')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet'])
+    parser.add_argument('--providers', default=PROVIDERS, help="providers to record from")
+    args = parser.parse_args(argv)
+
+    tickers = list(godview.SYMBOLS_MAP.values())
+    data = download(tickers, period=args.period, interval=args.interval,
+                    providers=get_providers(args.providers))
+    written = record_replay(args.record, data, args.interval, args.format)
+    print(f"Recorded {len(written)} tickers to {args.record}")
+
+if __name__ == "__main__":
+    main()
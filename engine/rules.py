@@ -0,0 +1,181 @@
+import numpy as np
+
+# ==========================================
+# Rule Tables
+# ==========================================
+# The V24D trend aggregation and the First Wave decision trees as ordered
+# tables of (conditions, outcome): the first row whose conditions all hold
+# gives the outcome, else the default. Conditions name boolean masks
+# ("facts"), '~' negates one. apply_rules() evaluates a table over scalars or
+# arrays of any shape (bars, symbols, pairs) without branching, so the
+# snapshot (godview.py), the history (history.py) and the pair matrix
+# (pairs.py) all decide with the same tables. tests/test_rules.py checks them
+# case by case against the original if/elif trees.
+
+# Rule outcomes
+NONE, LONG, SHORT, BOTH, WAIT = 0, 1, 2, 3, 4
+
+FW_WEEK_MACD = [
+    (['both_below', 'up3'], LONG),
+    (['both_above', 'down3'], SHORT),
+    (['cross_zero', 'up3'], LONG),
+    (['cross_zero', 'down3'], SHORT),
+    (['both_above', 'up3'], WAIT),
+    (['both_below', 'down3'], WAIT),
+]
+
+FW_WEEK_ADX = [
+    (['p_up1', 'p_below6'], LONG),
+    (['m_up1', 'm_below6'], SHORT),
+    (['p_up1', 'm_up2'], BOTH),
+    (['p_down1', 'm_down2'], BOTH),
+    (['p_up3', 'p_above6', 'p_down1'], SHORT),
+    (['p_up3', 'p_above6'], WAIT),
+    (['m_up3', 'm_above6', 'm_down1'], LONG),
+    (['m_up3', 'm_above6'], WAIT),
+]
+
+FW_DAY_ADX = [
+    (['p_up1', 'p_below6'], LONG),
+    (['m_up1', 'm_below6'], SHORT),
+    (['p_up1', 'm_up2'], BOTH),
+    (['p_down1', 'm_down2'], BOTH),
+    (['p_up1', 'p_above6'], WAIT),
+    (['m_up2', 'm_above6'], WAIT),
+]
+
+# Daily (d_l, d_s) and weekly (w_l, w_s) First Wave RSI flags
+FW_RSI = [
+    (['d_l', '~d_s', 'w_l', '~w_s'], LONG),
+    (['d_s', '~d_l', 'w_s', '~w_l'], SHORT),
+    (['d_l', 'd_s', 'w_l', '~w_s'], LONG),
+    (['d_l', 'd_s', 'w_s', '~w_l'], SHORT),
+    (['d_l', '~d_s', 'w_l', 'w_s'], LONG),
+    (['d_s', '~d_l', 'w_l', 'w_s'], SHORT),
+    (['d_l', '~d_s', 'w_s', '~w_l'], WAIT),
+    (['d_s', '~d_l', 'w_l', '~w_s'], WAIT),
+    (['d_l', 'd_s', 'w_l', 'w_s'], BOTH),
+]
+
+# Daily MACD slope votes (d_l, d_s) and the weekly outcome (w_*)
+FW_MACD = [
+    (['w_wait'], WAIT),
+    (['d_l', 'w_long'], LONG),
+    (['d_s', 'w_short'], SHORT),
+    (['d_l', 'w_short'], BOTH),
+    (['d_s', 'w_long'], BOTH),
+    (['~d_l', '~d_s', 'w_long'], LONG),
+    (['~d_l', '~d_s', 'w_short'], SHORT),
+]
+
+# Daily (d_*) and weekly (w_*) ADX outcomes
+FW_ADX = [
+    (['d_wait'], WAIT),
+    (['w_wait'], WAIT),
+    (['d_long', 'w_long'], LONG),
+    (['d_short', 'w_short'], SHORT),
+    (['d_long', 'w_short'], BOTH),
+    (['d_short', 'w_long'], BOTH),
+    (['d_both', 'w_long'], LONG),
+    (['d_both', 'w_short'], SHORT),
+    (['d_long', 'w_both'], LONG),
+    (['d_short', 'w_both'], SHORT),
+    (['d_both', 'w_both'], BOTH),
+]
+
+# Commander over the RSI, MACD and ADX outcomes; 1 long, -1 short, 0 wait
+FW_COMMANDER = [
+    (['any_wait'], 0),
+    (['rsi_long_side', 'macd_long', 'adx_long_side'], 1),
+    (['rsi_short_side', 'macd_short', 'adx_short_side'], -1),
+]
+
+# V24D: one indicator's daily (d_l, d_s) and weekly (w_l, w_s) votes;
+# RSI waits when no vote is cast, MACD and ADX default to both
+TREND_RSI = [
+    (['d_l', 'w_l', '~d_s', '~w_s'], LONG),
+    (['d_s', 'w_s', '~d_l', '~w_l'], SHORT),
+    (['~d_l', '~d_s', '~w_l', '~w_s'], WAIT),
+]
+TREND_VOTE = TREND_RSI[:2]
+
+# Trend status from the three indicators' outcomes; 2 both
+TREND = [
+    (['rsi_wait'], 0),
+    (['any_long', 'any_short'], 0),
+    (['all_both'], 2),
+    (['any_long'], 1),
+    (['any_short'], -1),
+]
+
+def apply_rules(table, facts, default=NONE):
+    """Outcome of the first matching row of `table`, element-wise over the fact arrays."""
+    facts = {k: np.asarray(v, dtype=bool) for k, v in facts.items()}
+    shape = np.broadcast(*facts.values()).shape
+    matched = []
+    for conditions, _ in table:
+        hit = np.ones(shape, dtype=bool)
+        for c in conditions:
+            hit &= ~facts[c[1:]] if c.startswith('~') else facts[c]
+        matched.append(hit)
+    matched.append(np.ones(shape, dtype=bool))
+    outcomes = np.array([o for _, o in table] + [default])
+    return outcomes[np.argmax(matched, axis=0)]
+
+def outcome_facts(prefix, codes):
+    """{prefix_long, prefix_short, prefix_both, prefix_wait} masks of an outcome array."""
+    codes = np.asarray(codes)
+    return {f"{prefix}_long": codes == LONG, f"{prefix}_short": codes == SHORT,
+            f"{prefix}_both": codes == BOTH, f"{prefix}_wait": codes == WAIT}
+
+def flags_outcome(long, short, both=False, wait=False):
+    """Outcome of calc_fw_week_signals' flags for one indicator (at most one is set)."""
+    return WAIT if wait else BOTH if both else LONG if long else SHORT if short else NONE
+
+def adx_facts(counts):
+    """Threshold masks of calc_adx_fw's (p_up, p_down, m_up, m_down, p_below, p_above, m_below, m_above)."""
+    p_up, p_down, m_up, m_down, p_below, p_above, m_below, m_above = (np.asarray(c) for c in counts)
+    return {'p_up1': p_up >= 1, 'p_up3': p_up == 3, 'p_down1': p_down >= 1,
+            'm_up1': m_up >= 1, 'm_up2': m_up >= 2, 'm_up3': m_up == 3, 'm_down1': m_down >= 1, 'm_down2': m_down >= 2,
+            'p_below6': p_below >= 6, 'p_above6': p_above >= 6, 'm_below6': m_below >= 6, 'm_above6': m_above >= 6}
+
+def fw_week_rules(macd_counts, adx_counts):
+    """Weekly First Wave (macd, adx) outcomes from calc_macd_fw / calc_adx_fw values."""
+    dif, dea, up, down = (np.asarray(c) for c in macd_counts)
+    macd = apply_rules(FW_WEEK_MACD, {
+        'both_below': (dif < 0) & (dea < 0),
+        'both_above': (dif > 0) & (dea > 0),
+        'cross_zero': ((dif > 0) & (dea < 0)) | ((dif < 0) & (dea > 0)) | (dif == 0) | (dea == 0),
+        'up3': up >= 3, 'down3': down >= 3,
+    })
+    return macd, apply_rules(FW_WEEK_ADX, adx_facts(adx_counts))
+
+def fw_day_adx(adx_counts):
+    """Daily First Wave ADX outcome from calc_adx_fw values."""
+    return apply_rules(FW_DAY_ADX, adx_facts(adx_counts))
+
+def fw_commander(d_rsi_l, d_rsi_s, d_up, d_down, d_adx, w_rsi_l, w_rsi_s, w_macd, w_adx):
+    """calc_fw_aggregation status (1 long, -1 short, 0 wait) from the daily votes/outcome and the weekly outcomes."""
+    rsi = apply_rules(FW_RSI, {'d_l': d_rsi_l, 'd_s': d_rsi_s, 'w_l': w_rsi_l, 'w_s': w_rsi_s})
+    macd = apply_rules(FW_MACD, {'d_l': np.asarray(d_up) >= 3, 'd_s': np.asarray(d_down) >= 3, **outcome_facts('w', w_macd)})
+    adx = apply_rules(FW_ADX, {**outcome_facts('d', d_adx), **outcome_facts('w', w_adx)})
+    return apply_rules(FW_COMMANDER, {
+        'any_wait': (rsi == WAIT) | (macd == WAIT) | (adx == WAIT),
+        'rsi_long_side': (rsi == LONG) | (rsi == BOTH), 'rsi_short_side': (rsi == SHORT) | (rsi == BOTH),
+        'macd_long': macd == LONG, 'macd_short': macd == SHORT,
+        'adx_long_side': (adx == LONG) | (adx == BOTH), 'adx_short_side': (adx == SHORT) | (adx == BOTH),
+    }, default=0)
+
+def combine_votes(d_votes, w_votes):
+    """Trend status (1 long, -1 short, 2 both, 0 wait) from daily and weekly (rsi_l, rsi_s, macd_l, macd_s, adx_l, adx_s) votes."""
+    outcomes = []
+    for k, table in ((0, TREND_RSI), (2, TREND_VOTE), (4, TREND_VOTE)):
+        facts = {'d_l': d_votes[k], 'd_s': d_votes[k + 1], 'w_l': w_votes[k], 'w_s': w_votes[k + 1]}
+        outcomes.append(apply_rules(table, facts, default=BOTH))
+    rsi, macd, adx = outcomes
+    return apply_rules(TREND, {
+        'rsi_wait': rsi == WAIT,
+        'any_long': (rsi == LONG) | (macd == LONG) | (adx == LONG),
+        'any_short': (rsi == SHORT) | (macd == SHORT) | (adx == SHORT),
+        'all_both': (rsi == BOTH) & (macd == BOTH) & (adx == BOTH),
+    }, default=0)
@@ -0,0 +1,135 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+# ==========================================
+# Local OHLC Store
+# ==========================================
+# One directory per ticker holding one .npy array per field plus the bar
+# dates, so a single ticker/field can be memory-mapped without touching the
+# rest. Each ticker keeps its own calendar; load_frame() outer-joins them
+# back into the (field, ticker) layout returned by yf.download.
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DATE_FIELD = 'Date'
+
+def _ticker_dir(root, ticker):
+    return os.path.join(root, ticker)
+
+def _to_naive_dates(index):
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    return idx.values.astype('datetime64[ns]')
+
+def read_ticker(root, ticker, mmap=True):
+    """Return {field: array} for a stored ticker (memory-mapped by default), or None."""
+    path = _ticker_dir(root, ticker)
+    if not os.path.exists(os.path.join(path, DATE_FIELD + '.npy')):
+        return None
+    mode = 'r' if mmap else None
+    return {f: np.load(os.path.join(path, f + '.npy'), mmap_mode=mode) for f in [DATE_FIELD] + FIELDS}
+
+def write_ticker(root, ticker, columns):
+    """Atomically replace the stored arrays of a ticker."""
+    path = _ticker_dir(root, ticker)
+    os.makedirs(path, exist_ok=True)
+    for f in [DATE_FIELD] + FIELDS:
+        tmp = os.path.join(path, f + '.tmp.npy')
+        np.save(tmp, np.ascontiguousarray(columns[f]))
+        os.replace(tmp, os.path.join(path, f + '.npy'))
+
+def last_date(root, ticker):
+    """Date of the newest stored bar, or None when the ticker is not stored yet."""
+    rec = read_ticker(root, ticker)
+    if rec is None or len(rec[DATE_FIELD]) == 0:
+        return None
+    return pd.Timestamp(rec[DATE_FIELD][-1])
+
+def merge_ticker(root, ticker, frame):
+    """Merge freshly fetched bars into the store.
+
+    Stored bars on or after the first fetched date are replaced, so a
+    re-fetched tail picks up revised values. Returns the number of bars written.
+    """
+    frame = frame.dropna(how='all')
+    if frame.empty:
+        return 0
+    new_dates = _to_naive_dates(frame.index)
+    new_cols = {f: frame[f].to_numpy(dtype=float) if f in frame else np.full(len(frame), np.nan) for f in FIELDS}
+
+    old = read_ticker(root, ticker, mmap=False)
+    if old is None:
+        columns = new_cols
+        columns[DATE_FIELD] = new_dates
+    else:
+        keep = old[DATE_FIELD] < new_dates[0]
+        columns = {f: np.concatenate([old[f][keep], new_cols[f]]) for f in FIELDS}
+        columns[DATE_FIELD] = np.concatenate([old[DATE_FIELD][keep], new_dates])
+
+    write_ticker(root, ticker, columns)
+    return len(frame)
+
+def split_download(raw, tickers):
+    """Yield (ticker, OHLCV frame) pairs from a yf.download result."""
+    if raw is None or raw.empty:
+        return
+    if not isinstance(raw.columns, pd.MultiIndex):
+        yield tickers[0], raw
+        return
+    available = set(raw.columns.get_level_values(1))
+    for ticker in tickers:
+        if ticker in available:
+            yield ticker, raw.xs(ticker, axis=1, level=1)
+
+def update_store(root, tickers, download, tail_days=7, initial_period="max"):
+    """Fetch only what is missing from the store.
+
+    Tickers not stored yet get `initial_period` of history; the rest are
+    fetched from `tail_days` before their own last bar, which re-reads the
+    recent tail to pick up Yahoo revisions. Tickers sharing a last bar date
+    are fetched together, so one lagging ticker does not widen everyone's
+    request. Returns {ticker: bars written}.
+    """
+    written = {}
+    last = {t: last_date(root, t) for t in tickers}
+
+    fresh = [t for t in tickers if last[t] is None]
+    if fresh:
+        print(f"Store: fetching {initial_period} history for {len(fresh)} new tickers...")
+        raw = download(fresh, period=initial_period, interval="1d", progress=False)
+        for ticker, frame in split_download(raw, fresh):
+            written[ticker] = merge_ticker(root, ticker, frame)
+
+    stale = {}
+    for t in tickers:
+        if last[t] is not None:
+            stale.setdefault(last[t], []).append(t)
+    for day, group in sorted(stale.items()):
+        start = day - timedelta(days=tail_days)
+        print(f"Store: fetching {len(group)} tickers since {start.date()}...")
+        raw = download(group, start=start.strftime("%Y-%m-%d"), interval="1d", progress=False)
+        for ticker, frame in split_download(raw, group):
+            written[ticker] = merge_ticker(root, ticker, frame)
+
+    return written
+
+def load_frame(root, tickers, start=None):
+    """Assemble stored bars into the MultiIndex (field, ticker) frame yf.download returns."""
+    pieces = {}
+    for ticker in tickers:
+        rec = read_ticker(root, ticker)
+        if rec is None:
+            continue
+        idx = pd.DatetimeIndex(rec[DATE_FIELD])
+        frame = pd.DataFrame({f: np.asarray(rec[f]) for f in FIELDS}, index=idx)
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        pieces[ticker] = frame
+    if not pieces:
+        return pd.DataFrame()
+
+    data = pd.concat(pieces, axis=1).sort_index().swaplevel(axis=1).sort_index(axis=1)
+    data.columns.names = ['Price', 'Ticker']
+    return data
@@ -0,0 +1,324 @@
+import os
+import io
+import csv
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import godview
+import providers
+
+# ==========================================
+# Streaming Daemon
+# ==========================================
+# Keeps the engine resident instead of rerunning it from cron: quotes for the
+# SYMBOLS_MAP tickers update today's daily bar of each ticker, only the
+# synthetic indices built on those tickers are recomputed, and indicators are
+# the committed IndicatorState (closed bars) plus the live bar. Changed
+# payloads are coalesced per symbol and upserted at most once per push
+# interval, followed by the aggregate snapshot of every symbol; the quote
+# queue is bounded, so a slow engine holds the source back.
+#
+#   GODVIEW_STORE_DIR=.store python stream.py                    # poll Yahoo every 60s
+#   python stream.py --replay quotes.jsonl --speed 0 --push-interval 1
+#
+# Replay files hold one quote per line, JSON ({"time": ..., "ticker": ..., "price": ...})
+# or CSV with a time,ticker,price header.
+
+POLL_INTERVAL = float(os.environ.get("GODVIEW_POLL_INTERVAL", "60"))
+PUSH_INTERVAL = float(os.environ.get("GODVIEW_STREAM_PUSH_INTERVAL", "5"))
+QUEUE_SIZE = int(os.environ.get("GODVIEW_STREAM_QUEUE_SIZE", "1000"))
+
+# ==========================================
+# Quote Sources
+# ==========================================
+# Async iterators of (time, ticker, price)
+
+async def yahoo_quotes(tickers, interval=POLL_INTERVAL):
+    """Poll 1-minute bars from the data providers; yield the last price of every ticker that moved since the previous poll."""
+    last = {}
+    while True:
+        started = time.monotonic()
+        try:
+            data = await asyncio.to_thread(providers.download, tickers, period='1d', interval='1m')
+        except Exception as e:
+            print(f"Warning: quote poll failed ({e}).")
+            data = None
+        if data is not None and 'Close' in data:
+            close = data['Close']
+            if isinstance(close, pd.Series):
+                close = close.to_frame(tickers[0])
+            for ticker in close.columns:
+                s = close[ticker].dropna()
+                if len(s) and last.get(ticker) != (s.index[-1], s.iloc[-1]):
+                    last[ticker] = (s.index[-1], s.iloc[-1])
+                    yield s.index[-1], ticker, float(s.iloc[-1])
+        await asyncio.sleep(max(interval - (time.monotonic() - started), 0))
+
+def read_replay(path):
+    """(time, ticker, price) rows of a JSON-lines or CSV replay file, in file order."""
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                yield pd.Timestamp(row['time']), row['ticker'], float(row['price'])
+        else:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield pd.Timestamp(row['time']), row['ticker'], float(row['price'])
+
+async def replay_quotes(path, speed=0.0):
+    """Quotes from a replay file; with speed > 0 the recorded gaps are slept, divided by speed."""
+    prev = None
+    for quote in read_replay(path):
+        if speed > 0 and prev is not None:
+            await asyncio.sleep(max((quote[0] - prev).total_seconds(), 0) / speed)
+        prev = quote[0]
+        yield quote
+
+# ==========================================
+# Live Engine
+# ==========================================
+class LiveEngine:
+    """Daily ticker OHLC, synthetic panels and indicator states kept current quote by quote.
+
+    apply() returns {symbol: payload} for the symbols whose payload changed.
+    """
+    def __init__(self, raw_data):
+        self.plan = godview.build_formula_plan()
+        self.names, self.tickers = self.plan.names, self.plan.tickers
+        self.col = {t: j for j, t in enumerate(self.tickers)}
+        self.index = pd.DatetimeIndex(raw_data.index)
+        self.prices = godview.PricePanel.from_frame(raw_data, self.tickers).values  # (field, time, ticker)
+        self.synthetic = self.plan.evaluate(self.prices)
+        self.affected = self.plan.dependents()  # synthetic indices each ticker feeds into
+
+        self.states = {}    # (symbol, frame) -> IndicatorState through the last closed bar
+        self.bar_cache = {} # symbol -> (daily bar count, last date), prepare_bars() output
+        self.payloads = {}  # symbol -> last payload returned
+        self.stale = 0      # quotes for days before the last bar, ignored
+
+    def _row(self, day):
+        """Row of `day` in the panels, appending an empty bar for a new day."""
+        if day > self.index[-1]:
+            self.index = self.index.append(pd.DatetimeIndex([day]))
+            self.prices = np.concatenate([self.prices, np.full((3, 1, len(self.tickers)), np.nan, dtype=self.prices.dtype)], axis=1)
+            self.synthetic = np.concatenate([self.synthetic, np.full((3, 1, len(self.names)), np.nan)], axis=1)
+        return len(self.index) - 1 if day == self.index[-1] else None
+
+    def apply(self, quotes, last_update=None):
+        """Fold quotes into today's bars and recompute the payloads of the affected symbols."""
+        rows, symbols = set(), set()
+        days = godview.trading_days([q[0] for q in quotes])
+        for (_, ticker, price), day in zip(quotes, days):
+            j = self.col.get(ticker)
+            if j is None or not np.isfinite(price):
+                continue
+            r = self._row(day)
+            if r is None:
+                self.stale += 1
+                continue
+            close, high, low = self.prices[:, r, j]
+            self.prices[0, r, j] = price
+            self.prices[1, r, j] = price if np.isnan(high) else max(high, price)
+            self.prices[2, r, j] = price if np.isnan(low) else min(low, price)
+            rows.add(r)
+            symbols |= self.affected[ticker]
+
+        # Only the touched bars are re-evaluated, and only affected indices written
+        if rows:
+            rows = sorted(rows)
+            cols = [k for k, name in enumerate(self.names) if name in symbols]
+            values = self.plan.evaluate(self.prices[:, rows, :])
+            self.synthetic[np.ix_(range(3), rows, cols)] = values[:, :, cols]
+
+        last_update = last_update or datetime.utcnow().isoformat() + "Z"
+        changed = {}
+        for symbol in sorted(symbols, key=self.names.index):
+            payload = self.payload(symbol, last_update)
+            if payload is None:
+                continue
+            key = {k: v for k, v in payload.items() if k != 'last_update'}
+            prev = self.payloads.get(symbol)
+            if prev is None or {k: v for k, v in prev.items() if k != 'last_update'} != key:
+                self.payloads[symbol] = changed[symbol] = payload
+        return changed
+
+    def prime(self, last_update=None):
+        """Payloads of every symbol before any quote, so deltas and the aggregate start from a full set."""
+        last_update = last_update or datetime.utcnow().isoformat() + "Z"
+        for symbol in self.names:
+            payload = self.payload(symbol, last_update)
+            if payload is not None:
+                self.payloads[symbol] = payload
+        return len(self.payloads)
+
+    def payload(self, symbol, last_update):
+        k = self.names.index(symbol)
+        close, high, low = (pd.Series(self.synthetic[i, :, k], index=self.index) for i in range(3))
+        with contextlib.redirect_stdout(io.StringIO()):
+            bars = self.bars(symbol, close, high, low)
+            if bars is None:
+                return None
+            # Weekly/monthly contexts are only read with 90+ bars
+            batches = []
+            for frame, (c, h, l) in zip(('d', 'w', 'm'), bars):
+                ind = self.live_context((symbol, frame), c, h, l) if frame == 'd' or len(c) >= 90 else None
+                batches.append({} if ind is None else {symbol: ind})
+            return godview.calc_symbol_payload(symbol, bars, *batches, last_update)
+
+    def bars(self, symbol, close, high, low):
+        """prepare_bars() output, cached while the symbol keeps the same daily bars.
+
+        Between quotes only the live (last) daily bar moves, so the cached
+        weekly/monthly bars just get their last bar re-aggregated.
+        """
+        valid = (close.notna() & high.notna() & low.notna()).to_numpy()
+        key = (int(valid.sum()), close.index[valid][-1] if valid.any() else None)
+        cached = self.bar_cache.get(symbol)
+        if cached is None or cached[0] != key or cached[1] is None:
+            bars = godview.prepare_bars(symbol, close, high, low)
+            self.bar_cache[symbol] = (key, bars)
+            return bars
+
+        daily = tuple(s[valid] for s in (close, high, low))
+        frames = [daily]
+        for c, h, l in cached[1][1:]:
+            # The last bin holds the daily bars after the previous bin's label
+            start = daily[0].index.searchsorted(c.index[-2], side='right') if len(c) > 1 else 0
+            c, h, l = c.copy(), h.copy(), l.copy()
+            c.iloc[-1] = daily[0].iloc[-1]
+            h.iloc[-1] = daily[1].iloc[start:].max()
+            l.iloc[-1] = daily[2].iloc[start:].min()
+            frames.append((c, h, l))
+        bars = tuple(frames)
+        self.bar_cache[symbol] = (key, bars)
+        return bars
+
+    def live_context(self, key, close, high, low):
+        """Indicators with every bar but the last committed to the saved state and the last one applied on a copy.
+
+        None (full recompute) when the frame has gaps; the state is rebuilt
+        when an already committed bar no longer matches the series.
+        """
+        n = len(close)
+        if n < 2 or close.isna().any() or high.isna().any() or low.isna().any():
+            return None
+        c, h, l = close.to_numpy(dtype=float), high.to_numpy(dtype=float), low.to_numpy(dtype=float)
+        state = self.states.get(key)
+        start = n - 1
+        if state is not None:
+            pos = close.index.searchsorted(state.last_date)
+            if pos < n - 1 and close.index[pos] == state.last_date and state.last_bar == (c[pos], h[pos], l[pos]):
+                start = pos + 1
+            else:
+                state = None
+        if state is None:
+            state = godview.IndicatorState.from_history(close.iloc[:n - 1], high.iloc[:n - 1], low.iloc[:n - 1])
+        for i in range(start, n - 1):
+            state.update(close.index[i], c[i], h[i], l[i])
+        self.states[key] = state
+
+        live = state.copy()
+        live.update(close.index[-1], c[-1], h[-1], l[-1])
+        return live.indicators()
+
+# ==========================================
+# Daemon Loop
+# ==========================================
+async def run_daemon(engine, quotes, client=None, push_interval=PUSH_INTERVAL, queue_size=QUEUE_SIZE):
+    """Feed `quotes` through the engine and push changed payloads until the source ends."""
+    queue = asyncio.Queue(maxsize=queue_size)
+    pending = {}  # symbol -> newest unpushed payload; bounded by the symbol count
+    stats = {'quotes': 0, 'pushed': 0}
+
+    async def produce():
+        async for quote in quotes:
+            await queue.put(quote)  # waits while the engine is behind
+        await queue.put(None)
+
+    async def consume():
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty() and len(batch) < queue_size:
+                batch.append(queue.get_nowait())
+            quotes_ = [q for q in batch if q is not None]
+            if quotes_:
+                stats['quotes'] += len(quotes_)
+                pending.update(engine.apply(quotes_))
+            if len(quotes_) < len(batch):
+                return
+            await asyncio.sleep(0)
+
+    async def flush():
+        if not pending:
+            return
+        results = dict(pending)
+        pending.clear()
+        if client is None:
+            for symbol, payload in results.items():
+                print(json.dumps(godview.clean_nan({'symbol': symbol, 'data': payload})))
+            stats['pushed'] += len(results)
+            return
+        try:
+            stats['pushed'] += await asyncio.to_thread(godview.push_snapshots, client, results)
+            await asyncio.to_thread(godview.publish_aggregate, client, dict(engine.payloads))
+        except Exception as e:
+            # Keep them for the next round unless a newer payload arrived meanwhile
+            print(f"Warning: push of {len(results)} deltas failed ({e}), will retry.")
+            for symbol, payload in results.items():
+                pending.setdefault(symbol, payload)
+
+    async def push_loop():
+        while True:
+            await asyncio.sleep(push_interval)
+            await flush()
+            print(f"Stream: {stats['quotes']} quotes, {stats['pushed']} deltas pushed, "
+                  f"queue {queue.qsize()}, {engine.stale} stale", flush=True)
+
+    producer = asyncio.create_task(produce())
+    pusher = asyncio.create_task(push_loop())
+    try:
+        await consume()
+    finally:
+        producer.cancel()
+        pusher.cancel()
+    await flush()
+    return stats
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GodView streaming daemon")
+    parser.add_argument('--replay', help="quote file to replay instead of polling Yahoo")
+    parser.add_argument('--speed', type=float, default=0.0, help="replay speed-up (0 = as fast as possible)")
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL)
+    parser.add_argument('--push-interval', type=float, default=PUSH_INTERVAL)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    args = parser.parse_args(argv)
+
+    raw_data = godview.fetch_raw_data()
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return
+    # History is loaded once; live indicator states stay in memory
+    engine = LiveEngine(raw_data)
+    print(f"Primed {engine.prime()} symbols.")
+
+    tickers = list(godview.SYMBOLS_MAP.values())
+    quotes = replay_quotes(args.replay, args.speed) if args.replay else yahoo_quotes(tickers, args.poll_interval)
+    client = godview.get_client()
+    if client is None:
+        print("No Supabase Credentials found. Printing deltas.")
+
+    print(f"Streaming {len(tickers)} tickers ({'replay ' + args.replay if args.replay else 'Yahoo poll'})...")
+    stats = asyncio.run(run_daemon(engine, quotes, client, args.push_interval, args.queue_size))
+    print(f"Done. {stats['quotes']} quotes, {stats['pushed']} deltas pushed.")
+
+if __name__ == "__main__":
+    main()
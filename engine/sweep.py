@@ -0,0 +1,189 @@
+import os
+import io
+import argparse
+import itertools
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import godview
+import history
+import backtest
+
+# ==========================================
+# Parameter Sweep
+# ==========================================
+# Evaluates combinations of the vote parameters (RSI SMA lengths, n_votes,
+# DI SMA lengths, MACD periods, weekly cutoff) with the vectorized history
+# and backtest, on all cores, and ranks them by basket metrics.
+#
+# Each worker memory-maps the synthetic panel and keeps, per symbol, the
+# as-of inputs of history.py: RSI/DI/MACD base series are computed once and
+# every SMA length once, the first time a combination asks for it. Statuses
+# are memoized on the parameters they depend on, so e.g. fw_status is not
+# recomputed for combinations that differ only in n_votes.
+#
+#   GODVIEW_STORE_DIR=.store python sweep.py --n-votes 2,3,4 --min-weeks 52,90 \
+#       --rsi-lengths "16,25,37,157,248,369;16,25,37,100,200" --macd "12,26,9;8,21,5"
+
+# Parameters each status depends on (the memo key)
+STATUS_PARAMS = {
+    'trend_status': ('rsi_ma_lengths', 'n_votes', 'adx_lengths', 'macd', 'min_weeks'),
+    'fw_status': ('rsi_ma_lengths', 'adx_lengths', 'macd', 'min_weeks'),
+}
+RANK_METRICS = ['sharpe', 'total_return', 'cagr', 'max_drawdown', 'hit_rate', 'day_hit_rate']
+
+def parse_sets(text):
+    """'16,25,37;10,20,30' -> [(16, 25, 37), (10, 20, 30)]"""
+    return [tuple(int(x) for x in part.split(',')) for part in text.split(';') if part.strip()]
+
+def parse_values(text):
+    return [int(x) for x in text.split(',') if x.strip()]
+
+def param_grid(rsi_lengths, n_votes, adx_lengths, macd, min_weeks):
+    """Every combination as a params dict (history.DEFAULT_PARAMS layout)."""
+    for adx in adx_lengths:
+        if len(adx) != 3:
+            raise ValueError(f"ADX lengths must be three values, got {adx}")
+    keys = ['rsi_ma_lengths', 'n_votes', 'adx_lengths', 'macd', 'min_weeks']
+    return [dict(zip(keys, combo)) for combo in itertools.product(rsi_lengths, n_votes, adx_lengths, macd, min_weeks)]
+
+# ==========================================
+# Worker State
+# ==========================================
+_panel = None   # [close, high, low] frames, memory-mapped in pool workers
+_state = None   # per-process inputs and memo, built on first use
+
+def _init_worker(path, index, symbols):
+    global _panel, _state
+    _state = None
+    panel = np.load(path, mmap_mode='r')
+    _panel = [pd.DataFrame(panel[i], index=index, columns=symbols, copy=False) for i in range(len(panel))]
+
+def _sweep_state():
+    global _state
+    if _state is None:
+        df_syn, df_high, df_low = _panel
+        inputs, rows = {}, {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            aligned = godview.AlignedBars(df_syn, df_high, df_low)
+            for symbol in df_syn.columns:
+                bars = aligned.bars(symbol)
+                if bars is None:
+                    continue
+                inputs[symbol] = history.symbol_inputs(bars)
+                first = godview.min_history_length(symbol) - 1
+                rows[symbol] = (first, df_syn.index.get_indexer(bars[0][0].index[first:]))
+        symbols = list(inputs)
+        _state = {'inputs': inputs, 'rows': rows, 'close': df_syn[symbols], 'memo': {}}
+    return _state
+
+def status_matrix(params, signal):
+    """(date, symbol) status frame for one parameter set, memoized on the parameters it depends on."""
+    state = _sweep_state()
+    key = (signal,) + tuple(params[k] for k in STATUS_PARAMS[signal])
+    if key not in state['memo']:
+        status_fn = history.trend_status if signal == 'trend_status' else history.fw_status
+        close = state['close']
+        out = np.full(close.shape, np.nan)
+        for j, symbol in enumerate(close.columns):
+            d, w = state['inputs'][symbol]
+            first, rows = state['rows'][symbol]
+            out[rows, j] = status_fn(d, w, params)[first:]
+        state['memo'][key] = pd.DataFrame(out, index=close.index, columns=close.columns)
+    return state['memo'][key]
+
+def evaluate(params, signal='trend_status', cost_bps=1.0, long_only=False):
+    """Basket metrics of one parameter set, plus the mean per-symbol Sharpe."""
+    close = _sweep_state()['close']
+    status = status_matrix(params, signal)
+    returns, held = backtest.run_backtest(close, backtest.positions_from_status(status, long_only), cost_bps)
+    table = backtest.summarize(returns, held, close)
+    metrics = table.loc[backtest.BASKET].to_dict()
+    metrics['mean_symbol_sharpe'] = float(table.drop(index=backtest.BASKET)['sharpe'].mean())
+    return metrics
+
+def _evaluate_chunk(configs, signal, cost_bps, long_only):
+    return [evaluate(p, signal, cost_bps, long_only) for p in configs]
+
+# ==========================================
+# Sweep Driver
+# ==========================================
+def run_sweep(df_syn, df_high, df_low, configs, signal='trend_status', cost_bps=1.0, long_only=False, workers=1):
+    """Evaluate every config; returns a DataFrame of params and metrics in config order."""
+    global _panel, _state
+    if workers <= 1:
+        _panel, _state = [df_syn, df_high, df_low], None
+        results = _evaluate_chunk(configs, signal, cost_bps, long_only)
+    else:
+        # Contiguous chunks keep neighbouring configs (which share most
+        # parameters) on one worker, where their sub-results are memoized
+        n_chunks = min(len(configs), workers * 4)
+        bounds = np.linspace(0, len(configs), n_chunks + 1).astype(int)
+        chunks = [configs[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        symbols = list(df_syn.columns)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'panel.npy')
+            np.save(path, np.stack([f[symbols].to_numpy(dtype=float) for f in (df_syn, df_high, df_low)]))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(path, df_syn.index, symbols)) as pool:
+                parts = pool.map(_evaluate_chunk, chunks, *[[x] * len(chunks) for x in (signal, cost_bps, long_only)])
+                results = [m for part in parts for m in part]
+
+    rows = []
+    for params, metrics in zip(configs, results):
+        row = {k: ','.join(map(str, v)) if isinstance(v, tuple) else v for k, v in params.items()}
+        row['default'] = params == history.DEFAULT_PARAMS
+        row.update(metrics)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# ==========================================
+# Main Execution
+# ==========================================
+def main(argv=None):
+    default = history.DEFAULT_PARAMS
+    parser = argparse.ArgumentParser(description="Sweep GodView vote parameters and rank them by backtest")
+    parser.add_argument('--rsi-lengths', default=','.join(map(str, default['rsi_ma_lengths'])),
+                        help="';'-separated sets of RSI SMA lengths")
+    parser.add_argument('--n-votes', default=str(default['n_votes']), help="comma-separated RSI vote thresholds")
+    parser.add_argument('--adx-lengths', default=','.join(map(str, default['adx_lengths'])),
+                        help="';'-separated sets of three DI SMA lengths")
+    parser.add_argument('--macd', default=','.join(map(str, default['macd'])),
+                        help="';'-separated fast,slow,signal periods")
+    parser.add_argument('--min-weeks', default=str(default['min_weeks']), help="comma-separated weekly cutoffs")
+    parser.add_argument('--signal', default='trend_status', choices=list(STATUS_PARAMS))
+    parser.add_argument('--cost-bps', type=float, default=1.0)
+    parser.add_argument('--long-only', action='store_true')
+    parser.add_argument('--rank-by', default='sharpe', choices=RANK_METRICS + ['mean_symbol_sharpe'])
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--json', help="write every evaluated combination to this JSON file")
+    args = parser.parse_args(argv)
+
+    configs = param_grid(parse_sets(args.rsi_lengths), parse_values(args.n_votes), parse_sets(args.adx_lengths),
+                         parse_sets(args.macd), parse_values(args.min_weeks))
+
+    raw_data = godview.fetch_raw_data()
+    if 'Close' not in raw_data:
+        print("Error: No Close data found.")
+        return
+    df_syn, df_high, df_low = godview.calc_synthetic_ohlc(raw_data)
+
+    print(f"Evaluating {len(configs)} parameter sets on {args.workers} workers...")
+    results = run_sweep(df_syn, df_high, df_low, configs, args.signal, args.cost_bps, args.long_only, args.workers)
+    # Higher is better for every metric (drawdowns are negative)
+    ranked = results.sort_values(args.rank_by, ascending=False, ignore_index=True)
+
+    cols = ['rsi_ma_lengths', 'n_votes', 'adx_lengths', 'macd', 'min_weeks', 'default',
+            'sharpe', 'total_return', 'max_drawdown', 'hit_rate', 'mean_symbol_sharpe']
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:.4f}'.format):
+        print(ranked[cols].head(args.top).to_string())
+
+    if args.json:
+        ranked.to_json(args.json, orient='records', indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The engine modules are flat scripts that import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ==========================================
+# Checkpoint Resume Scenarios
+# ==========================================
+# The incremental states saved in the store (godview's IndicatorState,
+# correlation's rolling moments) are kept `revision_bars` behind the last
+# bar. Each scenario runs a resume on the first RESUME_BARS bars, then
+# another on more bars, possibly revised, and says whether that second
+# resume has to rebuild from the full history.
+
+RESUME_BARS = 800
+
+# name: (bars added after the first run, rows revised given revision_bars, rebuild)
+RESUME_SCENARIOS = {
+    'appended_bars': (25, None, False),
+    'revised_recent_bars': (3, lambda rb: np.arange(RESUME_BARS - rb, RESUME_BARS), False),
+    'revision_before_checkpoint': (3, lambda rb: [RESUME_BARS - rb - 100], True),
+}
+
+def _map_bars(bars, f):
+    """f applied to a Series/DataFrame, or to each one of a tuple of them."""
+    return tuple(f(b) for b in bars) if isinstance(bars, tuple) else f(bars)
+
+def head(bars, n):
+    return _map_bars(bars, lambda b: b.iloc[:n])
+
+def revise(bars, positions, factor=1.02):
+    """Copy of `bars` with the rows at `positions` scaled."""
+    def scale(b):
+        b = b.copy()
+        b.iloc[positions] *= factor
+        return b
+    return _map_bars(bars, scale)
+
+def resume_twice(scenario, make_bars, resume, revision_bars):
+    """Play RESUME_SCENARIOS[scenario]: (state of the second resume, the bars it saw, whether it rebuilt).
+
+    make_bars(n) gives n bars; resume(bars) resumes the checkpoint under test.
+    """
+    extra, revised, rebuild = RESUME_SCENARIOS[scenario]
+    bars = make_bars(RESUME_BARS + extra)
+    resume(head(bars, RESUME_BARS))
+    if revised is not None:
+        bars = revise(bars, revised(revision_bars))
+    return resume(bars), bars, rebuild
+
+@pytest.fixture
+def count_calls(monkeypatch):
+    """count_calls(owner, name) -> list that gets the positional args of every later call to owner.name."""
+    def count(owner, name):
+        calls = []
+        original = getattr(owner, name)
+        def wrapper(*args, **kwargs):
+            calls.append(args)
+            return original(*args, **kwargs)
+        monkeypatch.setattr(owner, name, staticmethod(wrapper) if isinstance(owner, type) else wrapper)
+        return calls
+    return count
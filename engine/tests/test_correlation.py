@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+import correlation
+from conftest import RESUME_SCENARIOS, resume_twice
+
+# RollingMoments against DataFrame.rolling().cov()/corr(), and the moments
+# checkpoint (resume_moments) in each of the conftest resume scenarios.
+# Resumed moments see the same bars in the same order as pushing every bar
+# from scratch, so those must match exactly.
+
+WINDOWS = [20, 60]
+
+def make_close(n, seed=0, symbols=('A', 'B', 'C', 'D')):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n, len(symbols))), axis=0))
+    close[rng.uniform(size=close.shape) < 0.03] = np.nan   # holidays on one calendar
+    return pd.DataFrame(close, pd.bdate_range('2020-01-01', periods=n), list(symbols))
+
+@pytest.mark.parametrize('min_periods', [None, 5])
+@pytest.mark.parametrize('resync', [correlation.RESYNC_BARS, 50])
+def test_moments_match_pandas_rolling(monkeypatch, min_periods, resync):
+    monkeypatch.setattr(correlation, 'RESYNC_BARS', resync)
+    close = make_close(400)
+    close.iloc[100:160, 1] = np.nan    # suspended: too few common bars for a while
+    close.iloc[::3, 2] = np.nan        # sparse calendar
+    returns = correlation.log_returns(close)
+    m = correlation.RollingMoments(close.shape[1], 30, min_periods)
+    rolling = returns.rolling(30, min_periods=m.min_periods)
+    cov, corr = rolling.cov(), rolling.corr()
+
+    partial = False
+    for date, row in zip(returns.index, returns.to_numpy()):
+        m.push(row)
+        np.testing.assert_allclose(m.cov(), cov.loc[date].to_numpy(), rtol=1e-10, atol=1e-14, err_msg=f"cov {date}")
+        np.testing.assert_allclose(m.corr(), corr.loc[date].to_numpy(), rtol=1e-10, atol=1e-12, err_msg=f"corr {date}")
+        missing = np.isnan(m.corr())
+        partial |= bool(missing.any() and not missing.all())
+    assert partial   # some pairs were below min_periods while others were not
+
+@pytest.mark.parametrize('scenario', RESUME_SCENARIOS)
+def test_resume(tmp_path, count_calls, scenario):
+    calls = count_calls(correlation, 'rolling_moments')
+    path = str(tmp_path / 'c.json')
+    moments, close, rebuild = resume_twice(scenario, make_close, lambda c: correlation.resume_moments(path, c, WINDOWS),
+                                           correlation.REVISION_BARS)
+    rebuilds = [args for args in calls if args[2] is None]
+    assert len(rebuilds) == 1 + rebuild
+
+    full = correlation.rolling_moments(correlation.log_returns(close), WINDOWS)
+    for w in WINDOWS:
+        assert moments[w].bars == len(close)
+        np.testing.assert_array_equal(moments[w].cov(), full[w].cov(), err_msg=f"cov {w}")
+        np.testing.assert_array_equal(moments[w].corr(), full[w].corr(), err_msg=f"corr {w}")
+
+def test_snapshot_with_store(tmp_path):
+    close = make_close(300)
+    stateless = correlation.calc_matrix_snapshot(close, WINDOWS)
+    for _ in range(2):
+        assert correlation.calc_matrix_snapshot(close, WINDOWS, store_dir=str(tmp_path)) == stateless
+    assert (tmp_path / 'state' / correlation.STATE_FILE).exists()
+
+def test_strength_ranks_tail():
+    close = make_close(300)
+    close.iloc[:200, 1] = np.nan     # late starter
+    close.iloc[-5:, 2] = np.nan      # halted
+    # Reference: the full-history, per-column formulation
+    log_c = np.log(close)
+    score = log_c.apply(lambda s: s - s.dropna().shift(20).reindex(s.index))
+    ranks = score.rank(axis=1, ascending=False, method='min')
+    tail_ranks, tail_score = correlation.strength_ranks(close, 20, bars=correlation.STRENGTH_BARS)
+    pd.testing.assert_frame_equal(tail_ranks, ranks.iloc[-correlation.STRENGTH_BARS:], check_freq=False)
+    pd.testing.assert_frame_equal(tail_score, score.iloc[-correlation.STRENGTH_BARS:], check_freq=False)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+import godview
+from conftest import RESUME_SCENARIOS, resume_twice
+
+# resume_indicator_state against a full recompute of the indicators it
+# carries (RSI, MACD, DI, EMAs), in each of the conftest resume scenarios.
+
+def make_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    index = pd.bdate_range('2020-01-01', periods=n)
+    return pd.Series(close, index), pd.Series(high, index), pd.Series(low, index)
+
+def full_recompute(close, high, low):
+    macd, signal, hist = godview.calc_macd(close)
+    plus_di, minus_di = godview.calc_di(high, low, close, 14)
+    expected = {'rsi': godview.calc_rsi(close, 14), 'macd': macd, 'signal': signal, 'hist': hist,
+                'plus_di': plus_di, 'minus_di': minus_di}
+    for length in godview.EMA_LENGTHS:
+        expected[f'ema{length}'] = godview.calc_ema(close, length)
+    return expected
+
+def assert_matches(state, bars):
+    for key, series in full_recompute(*bars).items():
+        tail = np.array(state.tails[key])
+        np.testing.assert_allclose(tail, series.to_numpy()[-len(tail):], rtol=1e-12, atol=1e-12, err_msg=key)
+
+@pytest.mark.parametrize('scenario', RESUME_SCENARIOS)
+def test_resume(tmp_path, count_calls, scenario):
+    rebuilds = count_calls(godview.IndicatorState, 'from_history')
+    path = str(tmp_path / 'x.json')
+    state, bars, rebuild = resume_twice(scenario, make_bars, lambda b: godview.resume_indicator_state(path, *b),
+                                        godview.REVISION_BARS)
+    assert len(rebuilds) == 1 + rebuild
+    assert state.count == len(bars[0])
+    assert_matches(state, bars)
+
+def test_checkpoint_round_trip(tmp_path):
+    bars = make_bars(800)
+    godview.resume_indicator_state(str(tmp_path / 'x.json'), *bars)
+    saved = godview.load_indicator_state(str(tmp_path / 'x.json'))
+    assert saved.count == 800 - godview.REVISION_BARS
+    assert_matches(saved, tuple(s.iloc[:saved.count] for s in bars))
@@ -0,0 +1,135 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import godview
+
+# The snapshot push path against a local stand-in for PostgREST: a
+# supabase client pointed at an http.server that records every request and
+# answers the first `fail` ones with 503. RPCs answer `version`, or 404 as
+# PostgREST does for a function the schema lacks when `version` is None.
+
+supabase = pytest.importorskip('supabase')
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            failed = server.fail > 0
+            server.fail -= failed
+            if failed:
+                status, reply = 503, {'message': 'unavailable'}
+            elif not self.path.startswith('/rest/v1/rpc/'):
+                status, reply = 201, []
+            elif server.version is None:
+                status, reply = 404, {'code': 'PGRST202', 'message': 'Could not find the function'}
+            else:
+                status, reply = 200, server.version
+            server.requests.append({'path': self.path, 'prefer': self.headers.get('Prefer', ''),
+                                    'body': body, 'status': status})
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(reply).encode())
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def postgrest():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgrestHandler)
+    server.requests, server.fail, server.lock = [], 1, threading.Lock()
+    server.version = 1
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.client = supabase.create_client(f"http://127.0.0.1:{server.server_port}", 'test-key')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff waits of with_retries, recorded instead of slept."""
+    waits = []
+    monkeypatch.setattr(godview.time, 'sleep', waits.append)
+    return waits
+
+def make_results(n):
+    return {f"S{i:02d}": {'symbol': f"S{i:02d}", 'trend_status': 1,
+                          'ema_slopes': {'short': {'d': [float('nan'), float('inf'), -float('inf'), 0.5]}}}
+            for i in range(n)}
+
+def accepted_rows(server):
+    """Rows of the successful snapshot upserts, in request order."""
+    return [r['body'] for r in server.requests if r['status'] == 201 and r['path'].startswith('/rest/v1/godview_snapshot')]
+
+def test_upsert_chunks_retry_and_nulls(postgrest, sleeps):
+    pushed = godview.push_snapshots(postgrest.client, make_results(23), chunk_size=10, retries=2, backoff=0.5)
+
+    assert pushed == 23
+    assert [r['status'] for r in postgrest.requests] == [503, 201, 201, 201]
+    assert postgrest.requests[0]['body'] == postgrest.requests[1]['body']
+    assert sleeps == [0.5]
+    chunks = accepted_rows(postgrest)
+    assert [len(c) for c in chunks] == [10, 10, 3]
+    assert all('resolution=merge-duplicates' in r['prefer'] for r in postgrest.requests)
+    rows = [row for chunk in chunks for row in chunk]
+    assert sorted(row['symbol'] for row in rows) == sorted(make_results(23))
+    assert all(row['data']['ema_slopes']['short']['d'] == [None, None, None, 0.5] for row in rows)
+
+def test_upsert_gives_up_after_retries(postgrest, sleeps):
+    postgrest.fail = 10
+    with pytest.raises(Exception):
+        godview.upsert_rows(postgrest.client, [{'symbol': 'X', 'data': {}}], retries=2, backoff=0.5)
+    assert len(postgrest.requests) == 3
+    assert sleeps == [0.5, 1.0]
+
+def test_pipelined_pusher_sends_every_row_once(postgrest, sleeps):
+    results = make_results(10)
+    pusher = godview.SnapshotPusher(postgrest.client, chunk_size=4, retries=2, backoff=0.5)
+    for symbol, data in results.items():
+        pusher.put(symbol, data)
+    assert pusher.close() == 10
+
+    assert sleeps == [0.5]
+    chunks = accepted_rows(postgrest)
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    rows = [row for chunk in chunks for row in chunk]
+    assert [row['symbol'] for row in rows] == list(results)
+    assert all(row['data']['ema_slopes']['short']['d'] == [None, None, None, 0.5] for row in rows)
+
+def test_pipelined_pusher_reports_push_error(postgrest, sleeps):
+    postgrest.fail = 10
+    pusher = godview.SnapshotPusher(postgrest.client, chunk_size=4, retries=1, backoff=0.5)
+    for symbol, data in make_results(10).items():
+        pusher.put(symbol, data)
+    with pytest.raises(Exception):
+        pusher.close()
+    assert len(postgrest.requests) == 2  # later chunks are drained, not sent
+
+def test_aggregate_rpc_payload(postgrest, sleeps):
+    postgrest.fail = 0
+    results = make_results(3)
+    assert godview.publish_aggregate(postgrest.client, results) == 1
+    for payload in results.values():
+        payload['last_update'] = '2026-01-02T00:00:00Z'
+    godview.publish_aggregate(postgrest.client, results)
+
+    first, rerun = postgrest.requests
+    assert first['path'] == f"/rest/v1/rpc/{godview.AGGREGATE_RPC}"
+    assert set(first['body']) == {'p_hash', 'p_data'}
+    doc = first['body']['p_data']
+    assert set(doc) == {'symbols', 'columns', 'hash', 'last_update'}
+    assert doc['hash'] == first['body']['p_hash']
+    assert doc['symbols'] == list(results)
+    assert doc['columns']['ema_slopes.short.d'] == [[None, None, None, 0.5]] * 3
+    # A rerun on the same payloads hashes the same, whatever its timestamp
+    assert rerun['body']['p_hash'] == first['body']['p_hash']
+    assert rerun['body']['p_data']['last_update'] == '2026-01-02T00:00:00Z'
+
+def test_aggregate_missing_rpc_is_reported(postgrest, sleeps, capsys):
+    postgrest.fail, postgrest.version = 0, None
+    assert godview.publish_aggregate(postgrest.client, make_results(3), retries=1, backoff=0.5) is None
+    assert [r['status'] for r in postgrest.requests] == [404, 404]
+    assert f"could not publish {godview.AGGREGATE_TABLE}" in capsys.readouterr().out
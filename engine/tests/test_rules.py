@@ -0,0 +1,263 @@
+import itertools
+import numpy as np
+import pytest
+import godview
+import rules
+
+# The rule tables of rules.py against frozen copies of the if/elif trees they
+# replaced in godview.py, over every case that reaches a different branch.
+# Both the array form (history.py, pairs.py) and the snapshot functions of
+# godview.py, fed each case through their indicator inputs, are checked.
+
+# ==========================================
+# Reference Trees
+# ==========================================
+def ref_trend(d, w):
+    """calc_symbol_payload's trend aggregation; d/w are (rsi_l, rsi_s, macd_l, macd_s, adx_l, adx_s)."""
+    rsi_l, rsi_s, macd_l, macd_s, adx_l, adx_s = d
+    wrsi_l, wrsi_s, wmacd_l, wmacd_s, wadx_l, wadx_s = w
+    rsi_gen_long = rsi_l and wrsi_l and not rsi_s and not wrsi_s
+    rsi_gen_short = rsi_s and wrsi_s and not rsi_l and not wrsi_l
+    rsi_gen_wait = not rsi_l and not rsi_s and not wrsi_l and not wrsi_s
+    rsi_gen_both = not rsi_gen_long and not rsi_gen_short and not rsi_gen_wait
+
+    macd_gen_long = macd_l and wmacd_l and not macd_s and not wmacd_s
+    macd_gen_short = macd_s and wmacd_s and not macd_l and not wmacd_l
+    macd_gen_both = not macd_gen_long and not macd_gen_short
+
+    adx_gen_long = adx_l and wadx_l and not adx_s and not wadx_s
+    adx_gen_short = adx_s and wadx_s and not adx_l and not wadx_l
+    adx_gen_both = not adx_gen_long and not adx_gen_short
+
+    trend_long = False
+    trend_short = False
+    if not rsi_gen_wait:
+        long_votes = (1 if rsi_gen_long else 0) + (1 if macd_gen_long else 0) + (1 if adx_gen_long else 0)
+        short_votes = (1 if rsi_gen_short else 0) + (1 if macd_gen_short else 0) + (1 if adx_gen_short else 0)
+        both_votes = (1 if rsi_gen_both else 0) + (1 if macd_gen_both else 0) + (1 if adx_gen_both else 0)
+        if not (long_votes > 0 and short_votes > 0):
+            if long_votes == 3 or (long_votes == 2 and both_votes == 1) or (long_votes == 1 and both_votes == 2) or both_votes == 3:
+                trend_long = True
+            if short_votes == 3 or (short_votes == 2 and both_votes == 1) or (short_votes == 1 and both_votes == 2) or both_votes == 3:
+                trend_short = True
+
+    if trend_long and trend_short: return 2
+    if trend_long: return 1
+    if trend_short: return -1
+    return 0
+
+def ref_week_macd(dif, dea, up, down):
+    """calc_fw_week_signals' MACD tree: (macd_l, macd_s, macd_w)."""
+    both_below = dif < 0 and dea < 0
+    both_above = dif > 0 and dea > 0
+    cross_zero = (dif > 0 and dea < 0) or (dif < 0 and dea > 0) or dif == 0 or dea == 0
+    if both_below and up >= 3: return True, False, False
+    if both_above and down >= 3: return False, True, False
+    if cross_zero and up >= 3: return True, False, False
+    if cross_zero and down >= 3: return False, True, False
+    if both_above and up >= 3: return False, False, True
+    if both_below and down >= 3: return False, False, True
+    return False, False, False
+
+def ref_week_adx(counts):
+    """calc_fw_week_signals' ADX tree: (adx_l, adx_s, adx_b, adx_w)."""
+    p_up, p_down, m_up, m_down, p_b, p_a, m_b, m_a = counts
+    if p_up >= 1 and p_b >= 6: return True, False, False, False
+    if m_up >= 1 and m_b >= 6: return False, True, False, False
+    if p_up >= 1 and m_up >= 2: return False, False, True, False
+    if p_down >= 1 and m_down >= 2: return False, False, True, False
+    if p_up == 3 and p_a >= 6:
+        return (False, True, False, False) if p_down >= 1 else (False, False, False, True)
+    if m_up == 3 and m_a >= 6:
+        return (True, False, False, False) if m_down >= 1 else (False, False, False, True)
+    return False, False, False, False
+
+def ref_day_adx(counts):
+    """calc_fw_aggregation's daily ADX tree: (adx_d_l, adx_d_s, adx_d_b, adx_d_wait)."""
+    p_up_d, p_down_d, m_up_d, m_down_d, p_below_d, p_above_d, m_below_d, m_above_d = counts
+    if p_up_d >= 1 and p_below_d >= 6: return True, False, False, False
+    if m_up_d >= 1 and m_below_d >= 6: return False, True, False, False
+    if p_up_d >= 1 and m_up_d >= 2: return False, False, True, False
+    if p_down_d >= 1 and m_down_d >= 2: return False, False, True, False
+    if p_up_d >= 1 and p_above_d >= 6: return False, False, False, True
+    if m_up_d >= 2 and m_above_d >= 6: return False, False, False, True
+    return False, False, False, False
+
+def ref_aggregation(rsi_d_l, rsi_d_s, up_d, down_d, adx_d, rsi_w_l, rsi_w_s,
+                    macd_w_l, macd_w_s, macd_w_wait, adx_w_l, adx_w_s, adx_w_b, adx_w_wait):
+    """calc_fw_aggregation's RSI, MACD, ADX and commander trees; adx_d is ref_day_adx()."""
+    rsi_d_both = rsi_d_l and rsi_d_s
+    rsi_w_both = rsi_w_l and rsi_w_s
+    rsi_gen_l, rsi_gen_s, rsi_gen_wait = False, False, False
+    d_only_l = rsi_d_l and not rsi_d_s
+    d_only_s = rsi_d_s and not rsi_d_l
+    w_only_l = rsi_w_l and not rsi_w_s
+    w_only_s = rsi_w_s and not rsi_w_l
+    if d_only_l and w_only_l: rsi_gen_l = True
+    elif d_only_s and w_only_s: rsi_gen_s = True
+    elif rsi_d_both and w_only_l: rsi_gen_l = True
+    elif rsi_d_both and w_only_s: rsi_gen_s = True
+    elif d_only_l and rsi_w_both: rsi_gen_l = True
+    elif d_only_s and rsi_w_both: rsi_gen_s = True
+    elif d_only_l and w_only_s: rsi_gen_wait = True
+    elif d_only_s and w_only_l: rsi_gen_wait = True
+    elif rsi_d_both and rsi_w_both: rsi_gen_l, rsi_gen_s = True, True
+
+    macd_d_l = up_d >= 3
+    macd_d_s = down_d >= 3
+    macd_d_wait = not macd_d_l and not macd_d_s
+    macd_gen_l, macd_gen_s, macd_gen_b, macd_gen_wait = False, False, False, False
+    if macd_w_wait: macd_gen_wait = True
+    elif macd_d_l and macd_w_l: macd_gen_l = True
+    elif macd_d_s and macd_w_s: macd_gen_s = True
+    elif macd_d_l and macd_w_s: macd_gen_b = True
+    elif macd_d_s and macd_w_l: macd_gen_b = True
+    elif macd_d_wait and macd_w_l: macd_gen_l = True
+    elif macd_d_wait and macd_w_s: macd_gen_s = True
+
+    adx_d_l, adx_d_s, adx_d_b, adx_d_wait = adx_d
+    adx_gen_l, adx_gen_s, adx_gen_b, adx_gen_wait = False, False, False, False
+    if adx_d_wait or adx_w_wait: adx_gen_wait = True
+    elif adx_d_l and adx_w_l: adx_gen_l = True
+    elif adx_d_s and adx_w_s: adx_gen_s = True
+    elif adx_d_l and adx_w_s: adx_gen_b = True
+    elif adx_d_s and adx_w_l: adx_gen_b = True
+    elif adx_d_b and adx_w_l: adx_gen_l = True
+    elif adx_d_b and adx_w_s: adx_gen_s = True
+    elif adx_d_l and adx_w_b: adx_gen_l = True
+    elif adx_d_s and adx_w_b: adx_gen_s = True
+    elif adx_d_b and adx_w_b: adx_gen_b = True
+
+    fw_l, fw_s = False, False
+    if not (rsi_gen_wait or macd_gen_wait or adx_gen_wait):
+        rsi_supp_l = rsi_gen_l or (rsi_gen_l and rsi_gen_s)
+        if rsi_supp_l and macd_gen_l and (adx_gen_l or adx_gen_b):
+            fw_l = True
+        rsi_supp_s = rsi_gen_s or (rsi_gen_l and rsi_gen_s)
+        if rsi_supp_s and macd_gen_s and (adx_gen_s or adx_gen_b):
+            fw_s = True
+
+    if fw_l and fw_s: return 2
+    if fw_l: return 1
+    if fw_s: return -1
+    return 0
+
+# ==========================================
+# Case Domains
+# ==========================================
+# Every value on both sides of every threshold the trees compare against.
+# calc_macd_fw's slope counts are strict (up + down <= 5); the DI slope
+# counts of calc_adx_fw are not (a flat slope counts both ways).
+MACD_CASES = [(dif, dea, up, down) for dif in (-1.0, 0.0, 1.0) for dea in (-1.0, 0.0, 1.0)
+              for up in range(6) for down in range(6 - up)]
+ADX_CASES = [(p_up, p_down, m_up, m_down, *positions)
+             for p_up, p_down, m_up, m_down in itertools.product(range(4), repeat=4)
+             for positions in itertools.product((5, 6), repeat=4)]
+BOOLS = (False, True)
+FLAGS_MACD = [(False, False, False), (True, False, False), (False, True, False), (False, False, True)]
+FLAGS_ADX = [(False, False, False, False), (True, False, False, False), (False, True, False, False),
+             (False, False, True, False), (False, False, False, True)]
+
+def outcome(flags):
+    """rules.py outcome of a tree's one-hot result flags: (l, s), (l, s, w) or (l, s, b, w)."""
+    if len(flags) == 3:
+        return rules.flags_outcome(flags[0], flags[1], wait=flags[2])
+    return rules.flags_outcome(*flags)
+
+def aggregation_cases():
+    """calc_fw_aggregation inputs: daily RSI flags, MACD (up, down), one ADX count case per
+    daily outcome, and the weekly RSI flags and MACD/ADX outcomes."""
+    day_adx = {}
+    for counts in ADX_CASES:
+        day_adx.setdefault(ref_day_adx(counts), counts)
+    macd_counts = [(0, 0), (3, 0), (0, 3), (3, 3), (2, 2)]
+    return list(itertools.product(itertools.product(BOOLS, BOOLS), macd_counts, day_adx.values(),
+                                  itertools.product(BOOLS, BOOLS), FLAGS_MACD, FLAGS_ADX))
+
+@pytest.fixture
+def case(monkeypatch):
+    """Mutable per-case values returned by patched godview indicator functions."""
+    values = {}
+    monkeypatch.setattr(godview, 'calc_rsi_fw_week', lambda *a: values['rsi'])
+    monkeypatch.setattr(godview, 'calc_rsi_fw_day', lambda *a: values['rsi'])
+    monkeypatch.setattr(godview, 'calc_macd_fw', lambda *a: values['macd'])
+    monkeypatch.setattr(godview, 'calc_adx_fw', lambda *a: values['adx'])
+    return values
+
+# ==========================================
+# Trend Aggregation
+# ==========================================
+VOTES = list(itertools.product(BOOLS, repeat=12))
+
+def test_trend_rules():
+    votes = np.array(VOTES)
+    got = rules.combine_votes(list(votes[:, :6].T), list(votes[:, 6:].T))
+    expected = [ref_trend(v[:6], v[6:]) for v in VOTES]
+    assert got.tolist() == expected
+
+def test_trend_snapshot(monkeypatch):
+    votes = {}
+    frame = lambda ind: votes[ind['frame']]
+    monkeypatch.setattr(godview, 'get_indicator_context',
+                        lambda key, *a: {'frame': key[-1], 'ema_slope_grid': np.zeros((4, 3))})
+    monkeypatch.setattr(godview, 'calc_rsi_votes', lambda *a: frame(a[-1])[0:2])
+    monkeypatch.setattr(godview, 'calc_macd_signal', lambda *a: frame(a[-1])[2:4])
+    monkeypatch.setattr(godview, 'calc_adx_signal', lambda *a: frame(a[-1])[4:6])
+    monkeypatch.setattr(godview, 'calc_fw_week_signals', lambda *a: (False,) * 9)
+    monkeypatch.setattr(godview, 'calc_fw_aggregation', lambda *a: (0, [], [], [], [], [], []))
+    series = [0.0] * 100
+    bars = ((series,) * 3,) * 3
+    for v in VOTES:
+        votes.update(d=v[:6], w=v[6:], m=(False,) * 6)
+        payload = godview.calc_symbol_payload('X', bars, {}, {}, {}, None)
+        assert payload['trend_status'] == ref_trend(v[:6], v[6:]), v
+        assert type(payload['trend_status']) is int
+
+# ==========================================
+# First Wave Weekly
+# ==========================================
+def test_fw_week_rules():
+    macd = [MACD_CASES[k % len(MACD_CASES)] for k in range(len(ADX_CASES))]
+    got_macd, got_adx = rules.fw_week_rules(np.array(macd).T, np.array(ADX_CASES).T)
+    assert got_macd.tolist() == [outcome(ref_week_macd(*m)) for m in macd]
+    assert got_adx.tolist() == [outcome(ref_week_adx(a)) for a in ADX_CASES]
+
+def test_fw_week_snapshot(case):
+    case.update(rsi=(True, False), adx=ADX_CASES[0])
+    for m in MACD_CASES:
+        case['macd'] = m
+        got = godview.calc_fw_week_signals(None, None, None, ind=object())
+        assert got[:5] == (True, False, *ref_week_macd(*m)), m
+    case['macd'] = MACD_CASES[0]
+    for a in ADX_CASES:
+        case['adx'] = a
+        got = godview.calc_fw_week_signals(None, None, None, ind=object())
+        assert got[5:] == ref_week_adx(a), a
+        assert all(type(x) is bool for x in got[2:])
+
+# ==========================================
+# First Wave Aggregation
+# ==========================================
+def test_fw_day_adx_rules():
+    got = rules.fw_day_adx(np.array(ADX_CASES).T)
+    assert got.tolist() == [outcome(ref_day_adx(a)) for a in ADX_CASES]
+
+def test_fw_aggregation_rules():
+    cases = aggregation_cases()
+    d_rsi, d_macd, d_adx, w_rsi, w_macd, w_adx = (np.array(x) for x in zip(*cases))
+    got = rules.fw_commander(d_rsi[:, 0], d_rsi[:, 1], d_macd[:, 0], d_macd[:, 1], rules.fw_day_adx(d_adx.T),
+                             w_rsi[:, 0], w_rsi[:, 1],
+                             [outcome(f) for f in map(tuple, w_macd)], [outcome(f) for f in map(tuple, w_adx)])
+    expected = [ref_aggregation(*dr, *dm, ref_day_adx(da), *wr, *wm, *wa) for dr, dm, da, wr, wm, wa in cases]
+    assert got.tolist() == expected
+
+def test_fw_aggregation_snapshot(case):
+    for d_rsi, (up, down), d_adx, w_rsi, w_macd, w_adx in aggregation_cases():
+        case.update(rsi=d_rsi, macd=(0.0, 0.0, up, down), adx=d_adx)
+        status, rsi_d, rsi_w, macd_d, macd_w, adx_d, adx_w = godview.calc_fw_aggregation(
+            None, None, None, *w_rsi, *w_macd, *w_adx, ind=object())
+        ref_adx = ref_day_adx(d_adx)
+        assert status == ref_aggregation(*d_rsi, up, down, ref_adx, *w_rsi, *w_macd, *w_adx)
+        assert type(status) is int
+        assert (rsi_d, rsi_w, macd_d, macd_w, adx_d, adx_w) == (
+            list(d_rsi), list(w_rsi), [up >= 3, down >= 3], list(w_macd[:2]), list(ref_adx[:2]), list(w_adx[:2]))
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import store
+
+# update_store against a fake download serving a fixed (field, ticker)
+# frame and recording each request.
+
+TICKERS = ['A', 'B', 'C']
+
+def make_raw(n=60):
+    index = pd.bdate_range('2024-01-01', periods=n).as_unit('ns')   # the store's date unit
+    rng = np.random.default_rng(0)
+    columns = pd.MultiIndex.from_product([store.FIELDS, TICKERS], names=['Price', 'Ticker'])
+    return pd.DataFrame(rng.uniform(1, 2, (n, len(columns))), index, columns)
+
+class FakeDownload:
+    def __init__(self, raw):
+        self.raw, self.calls = raw, []
+
+    def __call__(self, tickers, period=None, start=None, **kwargs):
+        self.calls.append((sorted(tickers), start))
+        raw = self.raw if start is None else self.raw[self.raw.index >= pd.Timestamp(start)]
+        return raw.loc[:, raw.columns.get_level_values(1).isin(tickers)]
+
+def test_update_store_fetches_each_last_date_group(tmp_path):
+    raw = make_raw()
+    root = str(tmp_path)
+    # A and B stored up to bar 50, C lagging at bar 20
+    for ticker, n in (('A', 50), ('B', 50), ('C', 20)):
+        store.merge_ticker(root, ticker, raw.iloc[:n].xs(ticker, axis=1, level=1))
+
+    download = FakeDownload(raw)
+    written = store.update_store(root, TICKERS, download, tail_days=7)
+
+    starts = {tuple(t): s for t, s in download.calls}
+    assert starts == {('C',): (raw.index[19] - pd.Timedelta(days=7)).strftime('%Y-%m-%d'),
+                      ('A', 'B'): (raw.index[49] - pd.Timedelta(days=7)).strftime('%Y-%m-%d')}
+    assert written['A'] == written['B'] == 16   # 7 days back = 5 bars re-read
+    assert written['C'] == 46
+    data = store.load_frame(root, TICKERS)
+    pd.testing.assert_frame_equal(data, raw.sort_index(axis=1), check_freq=False)
@@ -1,6 +1,6 @@
 'use client'
 
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { supabase } from '@/lib/supabase'
 import { useTheme } from './providers'
 
@@ -12,10 +12,10 @@ interface GodViewData {
   trend_status: number // 1=Long, -1=Short, 2=Both, 0=Wait
   fw_status?: number   // Wave 1: 1=Long, -1=Short, 2=Both, 0=Wait
   last_update?: string // Timestamp from backend payload (preferred source)
-  ema_slopes: {
-    short: { d: number[], w: number[] }
-    mid: { d: number[], w: number[] }
-    long: { d: number[], w: number[] }
+  ema_slopes: {  // null where the engine had no value (NaN/Inf)
+    short: { d: (number | null)[], w: (number | null)[] }
+    mid: { d: (number | null)[], w: (number | null)[] }
+    long: { d: (number | null)[], w: (number | null)[] }
   }
   signals: {
     rsi: { d: boolean[], w: boolean[] }
@@ -35,6 +35,14 @@ interface SnapshotRow {
   data: GodViewData
 }
 
+// godview_aggregate.data: every payload as one array per nested key path
+interface AggregateDoc {
+  symbols: string[]
+  columns: Record<string, unknown[]>
+  hash: string
+  last_update: string | null
+}
+
 type TrendPeriod = 'short' | 'mid' | 'long'
 type ViewMode = 'card' | 'table'
 
@@ -123,6 +131,23 @@ function getTradingViewUrl(symbol: string, interval: string = '30') {
   return `https://cn.tradingview.com/chart/?symbol=${encodedSymbol}&interval=${interval}`
 }
 
+// Rebuild per-symbol rows from the columnar aggregate ('a.b' paths -> nested objects)
+function rowsFromAggregate(doc: AggregateDoc, updatedAt: string): SnapshotRow[] {
+  return doc.symbols.map((symbol, i) => {
+    const data: Record<string, unknown> = { symbol, last_update: doc.last_update ?? undefined }
+    for (const [path, values] of Object.entries(doc.columns)) {
+      if (values[i] === null) continue
+      const keys = path.split('.')
+      let node = data
+      for (const key of keys.slice(0, -1)) {
+        node = (node[key] ??= {}) as Record<string, unknown>
+      }
+      node[keys[keys.length - 1]] = values[i]
+    }
+    return { symbol, updated_at: updatedAt, data: data as unknown as GodViewData }
+  })
+}
+
 function getSlopeStatus(slope: number) {
   const abs = Math.abs(slope)
   if (abs >= THRESHOLDS.healthy) {
@@ -151,7 +176,8 @@ function FWBadge({ status }: { status: number }) {
   return <span className="px-2 py-1 rounded bg-gray-600/30 text-gray-400 text-xs font-bold">反转:待定</span>
 }
 
-function SlopeCell({ slope }: { slope: number }) {
+function SlopeCell({ slope: value }: { slope: number | null }) {
+  const slope = value ?? 0
   const { icon, text, color } = getSlopeStatus(slope)
   return (
     <td className={`px-2 py-1 text-center text-xs ${color}`}>
@@ -161,7 +187,8 @@ function SlopeCell({ slope }: { slope: number }) {
   )
 }
 
-function SlopeCellDiv({ slope, label }: { slope: number, label?: string }) {
+function SlopeCellDiv({ slope: value, label }: { slope: number | null, label?: string }) {
+  const slope = value ?? 0
   const { icon, text, color } = getSlopeStatus(slope)
   return (
     <div className={`text-center text-xs ${color} flex-1`}>
@@ -493,11 +520,48 @@ export default function Home() {
   const [data, setData] = useState<SnapshotRow[]>([])
   const [loading, setLoading] = useState(true)
   const [lastUpdate, setLastUpdate] = useState<string | null>(null)
+  const [checkedAt, setCheckedAt] = useState<string | null>(null)
   const [trendPeriod, setTrendPeriod] = useState<TrendPeriod>('short')
   const [viewMode, setViewMode] = useState<ViewMode>('card')
 
+  const versionRef = useRef<number | null>(null)
+
   useEffect(() => {
+    function showRows(rows: SnapshotRow[]) {
+      const order = Object.keys(SYMBOL_NAMES)
+      const sorted = rows.sort((a, b) => order.indexOf(a.symbol) - order.indexOf(b.symbol))
+      setData(sorted)
+      // Prefer explicit last_update from payload (JSON), fallback to SQL row updated_at
+      const payloadTime = rows[0]?.data?.last_update
+      setLastUpdate(payloadTime || rows[0]?.updated_at)
+    }
+
     async function fetchData() {
+      // Cheap check first: the aggregate's version only moves when the engine output changed,
+      // checked_at on every engine run
+      const { data: head, error: headError } = await supabase
+        .from('godview_aggregate')
+        .select('version, checked_at')
+        .eq('id', 'latest')
+        .maybeSingle()
+
+      if (!headError && head) {
+        setCheckedAt(head.checked_at ?? null)
+        if (head.version === versionRef.current) return
+        const { data: agg, error } = await supabase
+          .from('godview_aggregate')
+          .select('version, updated_at, data')
+          .eq('id', 'latest')
+          .single()
+        if (!error && agg) {
+          versionRef.current = agg.version
+          showRows(rowsFromAggregate(agg.data as AggregateDoc, agg.updated_at))
+          setLoading(false)
+          return
+        }
+      }
+
+      // No aggregate published yet: one row per symbol
       const { data: rows, error } = await supabase
         .from('godview_snapshot')
         .select('*')
@@ -509,12 +573,7 @@ export default function Home() {
       }
 
       if (rows && rows.length > 0) {
-        const order = Object.keys(SYMBOL_NAMES)
-        const sorted = rows.sort((a, b) => order.indexOf(a.symbol) - order.indexOf(b.symbol))
-        setData(sorted as SnapshotRow[])
-        // Prefer explicit last_update from payload (JSON), fallback to SQL row updated_at
-        const payloadTime = rows[0]?.data?.last_update
-        setLastUpdate(payloadTime || rows[0]?.updated_at)
+        showRows(rows as SnapshotRow[])
       }
       setLoading(false)
     }
@@ -543,6 +602,7 @@ export default function Home() {
         </div>
         <p className="text-sm text-slate-400 mt-2 text-center sm:text-left">
           Last Update: {lastUpdate ? new Date(lastUpdate).toLocaleString() : 'N/A'}
+          {checkedAt && <> · Checked: {new Date(checkedAt).toLocaleString()}</>}
         </p>
       </header>
 